@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+import asyncio
+import hmac
+
+from ...core.config import settings
+from ...core.database import get_db
+from ...core.profiling import request_profiler
+from ...core.tracing import trace_summary, tracer
+from ...models.profile import RequestProfile
+from ...services.retention import retention_job
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_request_profiles(
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    min_ms: Optional[float] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """
+    Most recent slow, sampled and requested profiles, without their statements and call stacks
+    """
+    query = db.query(RequestProfile)
+    if reason:
+        query = query.filter(RequestProfile.reason == reason)
+    if path:
+        query = query.filter(RequestProfile.path == path)
+    if min_ms is not None:
+        query = query.filter(RequestProfile.duration_ms >= min_ms)
+
+    profiles = query.order_by(RequestProfile.id.desc()).limit(min(limit, 500)).all()
+
+    return {
+        "profiles": [
+            {
+                "request_id": profile.request_id,
+                "timestamp": profile.timestamp,
+                "method": profile.method,
+                "path": profile.path,
+                "query": profile.query,
+                "status_code": profile.status_code,
+                "reason": profile.reason,
+                "duration_ms": profile.duration_ms,
+                "sql_count": profile.sql_count,
+                "sql_ms": profile.sql_ms,
+                "profiled": profile.profile is not None
+            }
+            for profile in profiles
+        ],
+        "stats": request_profiler.get_stats()
+    }
+
+
+@router.get("/profiles/{request_id}")
+async def get_request_profile(request_id: str, db: Session = Depends(get_db)):
+    """
+    One captured request with every recorded SQL statement and, if profiled, its hottest functions
+    """
+    profile = db.query(RequestProfile).filter(RequestProfile.request_id == request_id).first()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return {
+        "request_id": profile.request_id,
+        "timestamp": profile.timestamp,
+        "method": profile.method,
+        "path": profile.path,
+        "query": profile.query,
+        "status_code": profile.status_code,
+        "reason": profile.reason,
+        "duration_ms": profile.duration_ms,
+        "sql_count": profile.sql_count,
+        "sql_ms": profile.sql_ms,
+        "statements": profile.statements,
+        "profile": profile.profile
+    }
+
+
+def _trace_store():
+    if tracer.memory is None:
+        raise HTTPException(status_code=404, detail="The in-memory trace exporter is not enabled")
+    return tracer.memory
+
+
+@router.get("/traces")
+async def list_traces(limit: int = 50):
+    """
+    Most recent traces with their duration and time spent per hop
+    """
+    return {
+        "traces": [trace_summary(spans) for spans in _trace_store().recent(min(limit, 500))],
+        "stats": tracer.get_stats()
+    }
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    Every span of one trace in start order, with its offset from the start of the trace
+    """
+    spans = _trace_store().trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+
+    started = spans[0]["start"]
+    return {
+        **trace_summary(spans),
+        "spans": [{**span, "offset_ms": (span["start"] - started) * 1000} for span in spans]
+    }
+
+
+@router.post("/retention/reclaim")
+async def reclaim_database_space():
+    """
+    Release all free SQLite pages now; on an older file this first runs the full VACUUM
+    that switches it to incremental mode, which locks the database until it finishes
+    """
+    return await asyncio.to_thread(retention_job.reclaim, True)
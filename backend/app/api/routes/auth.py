@@ -5,6 +5,7 @@ from datetime import timedelta
 from typing import Optional
 
 from ...core.database import get_db
+from ...core.db_writer import db_writer
 from ...core.security import verify_password, get_password_hash, create_access_token, verify_token
 from ...core.config import settings
 from ...models.user import User
@@ -28,16 +29,18 @@ async def register(
         )
     
     hashed_password = get_password_hash(password)
-    db_user = User(
-        email=email,
-        hashed_password=hashed_password,
-        wallet=wallet
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
     
-    return {"message": "User created successfully", "user_id": db_user.id}
+    def save(session: Session) -> int:
+        db_user = User(
+            email=email,
+            hashed_password=hashed_password,
+            wallet=wallet
+        )
+        session.add(db_user)
+        session.flush()
+        return db_user.id
+    
+    return {"message": "User created successfully", "user_id": await db_writer.run(save, db=db)}
 
 
 @router.post("/token")
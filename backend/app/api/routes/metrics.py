@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Request
+
+from ...core.admission import admission_stats
+from ...core.db_writer import db_writer
+from ...core.metrics import latency_snapshot
+from ...services.arbitrage_scanner import arbitrage_scanner
+from ...services.execution_pipeline import execution_pipeline
+from ...services.feature_store import feature_store
+from ...services.model_backend import model_runner
+from ...services.redis_service import redis_service
+from ...services.risk_engine import risk_engine
+from ...services.order_store import order_store
+from ...services.order_stream import order_stream_hub
+from ...services.response_cache import response_cache
+from ...services.retention import retention_job
+from ...services.shared_orders import shared_orders
+from ...services.trade_service import trade_service
+
+router = APIRouter()
+
+
+@router.get("/admission")
+async def get_admission_metrics(request: Request):
+    """
+    Admission control counters: in-flight requests and per-class admitted, rate-limited and shed totals
+    """
+    return admission_stats(request.app)
+
+
+@router.get("/redis")
+async def get_redis_metrics():
+    """
+    Redis connection health, pool usage, reconnect count and spill queue counters
+    """
+    return redis_service.get_stats()
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """
+    Response cache hit, miss, bypass and invalidation counters
+    """
+    return response_cache.get_stats()
+
+
+@router.get("/arbitrage")
+async def get_arbitrage_metrics():
+    """
+    Arbitrage scanner matrix size, ticker updates, scans, last scan time and published opportunities
+    """
+    return arbitrage_scanner.get_stats()
+
+
+@router.get("/execution")
+async def get_execution_metrics():
+    """
+    Auto-execution pipeline counters and signal-to-order latency percentiles
+    """
+    return execution_pipeline.get_stats()
+
+
+@router.get("/latency")
+async def get_latency_metrics():
+    """
+    Every latency histogram recorded in this process, as count, mean and percentiles in ms
+    """
+    return latency_snapshot()
+
+
+@router.get("/risk")
+async def get_risk_metrics():
+    """
+    Risk engine accounts, open orders, check and rejection counts and check latency percentiles
+    """
+    return {**risk_engine.get_stats(), "order_store": order_store.get_stats(), "shared_orders": shared_orders.get_stats()}
+
+
+@router.get("/order-stream")
+async def get_order_stream_metrics():
+    """
+    Order update stream subscribers, replay buffer size and relay, resume and overflow counts
+    """
+    return order_stream_hub.get_stats()
+
+
+@router.get("/model")
+async def get_model_metrics():
+    """
+    Model backend, worker count, batch and row counts and inference batch latency percentiles
+    """
+    return model_runner.get_stats()
+
+
+@router.get("/features")
+async def get_feature_metrics():
+    """
+    Feature store symbols, bars closed, values computed and stored, and lookup hits per tier
+    """
+    return feature_store.get_stats()
+
+
+@router.get("/retention")
+async def get_retention_metrics():
+    """
+    Retention policies, totals of rows deleted and bytes reclaimed, and the last run's report
+    """
+    return retention_job.get_stats()
+
+
+@router.get("/db-writer")
+async def get_db_writer_metrics():
+    """
+    SQLite writer queue depth, writes and transactions committed, and how long writes waited in the queue
+    """
+    return db_writer.get_stats()
+
+
+@router.get("/exchanges")
+async def get_exchange_metrics():
+    """
+    Exchange mode, call, retry and error counts, call latency and per-exchange simulator counters
+    """
+    return trade_service.get_stats()
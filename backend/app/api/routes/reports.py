@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import Optional
+from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime, timedelta
 
+from ...core.bulk import copy_rows
 from ...core.database import get_db
+from ...core.db_writer import db_writer
+from ...core.http_cache import conditional_json, fingerprint
 from ...models.strategy import Strategy
 from ...models.signal import Signal
 from ...models.log import Log
+from ...models.summary import SignalDailySummary
+from ...services.response_cache import response_cache
 
 router = APIRouter()
 
 
+class LogEntry(BaseModel):
+    timestamp: Optional[datetime] = None
+    bot_id: Optional[str] = None
+    exchange: Optional[str] = None
+    action: Optional[str] = None
+    status: Optional[str] = None
+    metadata: Optional[str] = None
+
+
 @router.get("/dashboard")
 async def get_dashboard_stats(
+    request: Request,
     user_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
@@ -29,17 +45,23 @@ async def get_dashboard_stats(
         Signal.timestamp >= datetime.utcnow() - timedelta(hours=24)
     ).count()
     
-    return {
-        "total_strategies": total_strategies,
-        "active_strategies": active_strategies,
-        "total_pnl": total_pnl,
-        "recent_signals_24h": recent_signals,
-        "timestamp": datetime.utcnow()
-    }
+    # The stats are the validator; a 304 saves the payload and the timestamp
+    return await conditional_json(
+        request,
+        (total_strategies, active_strategies, total_pnl, recent_signals),
+        lambda: {
+            "total_strategies": total_strategies,
+            "active_strategies": active_strategies,
+            "total_pnl": total_pnl,
+            "recent_signals_24h": recent_signals,
+            "timestamp": datetime.utcnow()
+        }
+    )
 
 
 @router.get("/performance")
 async def get_performance_report(
+    request: Request,
     user_id: Optional[int] = None,
     days: int = 30,
     db: Session = Depends(get_db)
@@ -50,29 +72,40 @@ async def get_performance_report(
     if user_id:
         query = query.filter(Strategy.user_id == user_id)
     
-    strategies = query.filter(Strategy.created_at >= start_date).all()
-    
-    performance_data = []
-    for strategy in strategies:
-        performance_data.append({
-            "strategy_id": strategy.id,
-            "name": strategy.name,
-            "market": strategy.market,
-            "pnl": strategy.pnl,
-            "state": strategy.state,
-            "created_at": strategy.created_at
-        })
-    
-    return {
-        "period_days": days,
-        "strategies": performance_data,
-        "total_pnl": sum(s["pnl"] for s in performance_data),
-        "generated_at": datetime.utcnow()
-    }
+    query = query.filter(Strategy.created_at >= start_date)
+    # updated_at has second precision; the strategy tag versions, bumped on every
+    # write, catch two edits within the same second, and without them no validator is safe
+    versions = await response_cache.tag_versions(f"strategies:user:{user_id}" if user_id else "strategies")
+    validator = None if versions is None else fingerprint(query, Strategy, Strategy.updated_at) + (
+        query.with_entities(func.sum(Strategy.pnl)).scalar(),
+        versions,
+    )
+    
+    def build():
+        performance_data = []
+        for strategy in query.all():
+            performance_data.append({
+                "strategy_id": strategy.id,
+                "name": strategy.name,
+                "market": strategy.market,
+                "pnl": strategy.pnl,
+                "state": strategy.state,
+                "created_at": strategy.created_at
+            })
+        
+        return {
+            "period_days": days,
+            "strategies": performance_data,
+            "total_pnl": sum(s["pnl"] for s in performance_data),
+            "generated_at": datetime.utcnow()
+        }
+    
+    return await conditional_json(request, validator, build, last_modified=validator[2] if validator else None)
 
 
 @router.get("/signals/analytics")
 async def get_signal_analytics(
+    request: Request,
     exchange: Optional[str] = None,
     symbol: Optional[str] = None,
     hours: int = 24,
@@ -87,31 +120,70 @@ async def get_signal_analytics(
     if symbol:
         query = query.filter(Signal.symbol == symbol)
     
-    signals = query.all()
-    
-    signal_types = {}
-    confidence_avg = 0.0
-    
-    for signal in signals:
-        signal_types[signal.signal_type] = signal_types.get(signal.signal_type, 0) + 1
-        confidence_avg += signal.confidence
-    
-    if signals:
-        confidence_avg /= len(signals)
-    
-    return {
-        "period_hours": hours,
-        "total_signals": len(signals),
-        "signal_types": signal_types,
-        "average_confidence": confidence_avg,
-        "exchange": exchange,
-        "symbol": symbol,
-        "generated_at": datetime.utcnow()
-    }
+    validator = fingerprint(query, Signal, Signal.timestamp)
+    
+    def build():
+        signals = query.all()
+        
+        signal_types = {}
+        confidence_avg = 0.0
+        
+        for signal in signals:
+            signal_types[signal.signal_type] = signal_types.get(signal.signal_type, 0) + 1
+            confidence_avg += signal.confidence
+        
+        if signals:
+            confidence_avg /= len(signals)
+        
+        return {
+            "period_hours": hours,
+            "total_signals": len(signals),
+            "signal_types": signal_types,
+            "average_confidence": confidence_avg,
+            "exchange": exchange,
+            "symbol": symbol,
+            "generated_at": datetime.utcnow()
+        }
+    
+    return await conditional_json(request, validator, build, last_modified=validator[2] if validator else None)
+
+
+@router.get("/signals/daily")
+async def get_signal_daily_summary(
+    exchange: Optional[str] = None,
+    symbol: Optional[str] = None,
+    days: int = 365,
+    db: Session = Depends(get_db)
+):
+    """
+    Per-day signal counts and averages for signals already rolled up and removed by retention
+    """
+    query = db.query(SignalDailySummary).filter(
+        SignalDailySummary.day >= (datetime.utcnow() - timedelta(days=days)).date()
+    )
+    if exchange:
+        query = query.filter(SignalDailySummary.exchange == exchange)
+    if symbol:
+        query = query.filter(SignalDailySummary.symbol == symbol)
+    
+    return [
+        {
+            "day": row.day,
+            "exchange": row.exchange,
+            "symbol": row.symbol,
+            "signal_type": row.signal_type,
+            "count": row.count,
+            "average_confidence": row.confidence_sum / row.count if row.count else 0.0,
+            "average_price": row.price_sum / row.count if row.count else 0.0,
+            "volume": row.volume_sum
+        }
+        for row in query.order_by(SignalDailySummary.day, SignalDailySummary.exchange, SignalDailySummary.symbol).all()
+    ]
 
 
 @router.get("/logs")
 async def get_system_logs(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     bot_id: Optional[str] = None,
@@ -125,19 +197,49 @@ async def get_system_logs(
     if exchange:
         query = query.filter(Log.exchange == exchange)
     
-    logs = query.order_by(Log.timestamp.desc()).offset(skip).limit(limit).all()
-    
-    return {
-        "logs": [
-            {
-                "id": log.id,
-                "timestamp": log.timestamp,
-                "bot_id": log.bot_id,
-                "exchange": log.exchange,
-                "action": log.action,
-                "status": log.status,
-                "metadata": log.log_metadata
-            }
-            for log in logs
-        ]
-    }
+    validator = fingerprint(query, Log, Log.timestamp)
+    
+    def build():
+        logs = query.order_by(Log.timestamp.desc()).offset(skip).limit(limit).all()
+        
+        return {
+            "logs": [
+                {
+                    "id": log.id,
+                    "timestamp": log.timestamp,
+                    "bot_id": log.bot_id,
+                    "exchange": log.exchange,
+                    "action": log.action,
+                    "status": log.status,
+                    "metadata": log.log_metadata
+                }
+                for log in logs
+            ]
+        }
+    
+    return await conditional_json(request, validator, build, last_modified=validator[2])
+
+
+@router.post("/logs")
+async def ingest_logs(entries: List[LogEntry], db: Session = Depends(get_db)):
+    """
+    Append a batch of log entries in one bulk write (COPY on PostgreSQL)
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "timestamp": entry.timestamp or now,
+            "bot_id": entry.bot_id,
+            "exchange": entry.exchange,
+            "action": entry.action,
+            "status": entry.status,
+            "log_metadata": entry.metadata
+        }
+        for entry in entries
+    ]
+    try:
+        await db_writer.run(lambda session: copy_rows(session, Log.__table__, rows), db=db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to ingest logs: {str(e)}")
+    
+    return {"message": "Logs ingested", "accepted": len(rows)}
@@ -4,6 +4,7 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 
 from ...core.database import get_db
+from ...core.db_writer import db_writer
 from ...models.request import DemoRequest, InvestorRequest
 
 router = APIRouter()
@@ -26,19 +27,19 @@ async def create_demo_request(
     request: DemoRequestCreate,
     db: Session = Depends(get_db)
 ):
-    demo_request = DemoRequest(
-        name=request.name,
-        email=request.email,
-        telegram=request.telegram
-    )
-    
-    db.add(demo_request)
-    db.commit()
-    db.refresh(demo_request)
+    def save(session: Session) -> int:
+        demo_request = DemoRequest(
+            name=request.name,
+            email=request.email,
+            telegram=request.telegram
+        )
+        session.add(demo_request)
+        session.flush()
+        return demo_request.id
     
     return {
         "message": "Demo request submitted successfully",
-        "id": demo_request.id
+        "id": await db_writer.run(save, db=db)
     }
 
 
@@ -47,17 +48,17 @@ async def create_investor_request(
     request: InvestorRequestCreate,
     db: Session = Depends(get_db)
 ):
-    investor_request = InvestorRequest(
-        name=request.name,
-        email=request.email,
-        expected_investment=request.expected_investment
-    )
-    
-    db.add(investor_request)
-    db.commit()
-    db.refresh(investor_request)
+    def save(session: Session) -> int:
+        investor_request = InvestorRequest(
+            name=request.name,
+            email=request.email,
+            expected_investment=request.expected_investment
+        )
+        session.add(investor_request)
+        session.flush()
+        return investor_request.id
     
     return {
         "message": "Investor request submitted successfully",
-        "id": investor_request.id
+        "id": await db_writer.run(save, db=db)
     }
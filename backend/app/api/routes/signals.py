@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
 from ...core.database import get_db
+from ...core.db_writer import db_writer
+from ...core.http_cache import conditional_json, fingerprint
 from ...models.signal import Signal
+from ...services.ai_service import ai_service
+from ...services.signal_ingest import signal_ingestor
+from ...services.signal_metadata import metadata_filters, parse_metadata, promoted_columns
+from ...services.response_cache import response_cache
 
 router = APIRouter()
 
 
 @router.get("/")
 async def get_signals(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     exchange: Optional[str] = None,
     symbol: Optional[str] = None,
+    model_version: Optional[str] = None,
+    market_sentiment: Optional[str] = None,
+    min_volatility: Optional[float] = None,
+    max_volatility: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
     query = db.query(Signal)
@@ -23,25 +34,32 @@ async def get_signals(
         query = query.filter(Signal.exchange == exchange)
     if symbol:
         query = query.filter(Signal.symbol == symbol)
+    query = query.filter(*metadata_filters(model_version, market_sentiment, min_volatility, max_volatility))
     
-    signals = query.offset(skip).limit(limit).all()
+    # Signals are never updated: inserts raise the newest id and retention deletes lower the count
+    validator = fingerprint(query, Signal, Signal.timestamp)
     
-    return {
-        "signals": [
-            {
-                "id": signal.id,
-                "timestamp": signal.timestamp,
-                "exchange": signal.exchange,
-                "symbol": signal.symbol,
-                "signal_type": signal.signal_type,
-                "confidence": signal.confidence,
-                "price": signal.price,
-                "volume": signal.volume,
-                "metadata": signal.signal_metadata
-            }
-            for signal in signals
-        ]
-    }
+    def build():
+        signals = query.offset(skip).limit(limit).all()
+        
+        return {
+            "signals": [
+                {
+                    "id": signal.id,
+                    "timestamp": signal.timestamp,
+                    "exchange": signal.exchange,
+                    "symbol": signal.symbol,
+                    "signal_type": signal.signal_type,
+                    "confidence": signal.confidence,
+                    "price": signal.price,
+                    "volume": signal.volume,
+                    "metadata": signal.signal_metadata
+                }
+                for signal in signals
+            ]
+        }
+    
+    return await conditional_json(request, validator, build, last_modified=validator[2])
 
 
 @router.post("/")
@@ -55,44 +73,95 @@ async def create_signal(
     metadata: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    signal = Signal(
-        exchange=exchange,
-        symbol=symbol,
-        signal_type=signal_type,
-        confidence=confidence,
-        price=price,
-        volume=volume,
-        signal_metadata=metadata
-    )
+    try:
+        signal_metadata = parse_metadata(metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
     
-    db.add(signal)
-    db.commit()
-    db.refresh(signal)
+    def save(session: Session):
+        signal = Signal(
+            exchange=exchange,
+            symbol=symbol,
+            signal_type=signal_type,
+            confidence=confidence,
+            price=price,
+            volume=volume,
+            signal_metadata=signal_metadata,
+            **promoted_columns(signal_metadata)
+        )
+        session.add(signal)
+        session.flush()
+        session.refresh(signal, ["timestamp"])
+        return signal.id, signal.timestamp
+    
+    signal_id, timestamp = await db_writer.run(save, db=db)
+    await response_cache.invalidate(f"signal:{signal_id}")
     
     return {
         "message": "Signal created successfully",
-        "signal_id": signal.id,
-        "timestamp": signal.timestamp
+        "signal_id": signal_id,
+        "timestamp": timestamp
     }
 
 
+@router.post("/bulk")
+async def ingest_signals(request: Request, db: Session = Depends(get_db)):
+    """
+    Ingest newline-delimited JSON signals, deduplicated on idempotency_key.
+    
+    The body is streamed and inserted in chunks; each accepted chunk is
+    published to new_signals in one pipelined call.
+    """
+    try:
+        result = await signal_ingestor.ingest(db, request.stream())
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to ingest signals: {str(e)}")
+    
+    return {"message": "Signals ingested", **result}
+
+
+@router.get("/sentiment")
+async def get_market_sentiment(symbols: Optional[str] = None, window: str = "1h"):
+    """
+    Confidence-weighted signal sentiment over a 5m, 1h or 24h window, for comma-separated symbols or all
+    """
+    symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else []
+    try:
+        return await ai_service.analyze_market_sentiment(symbol_list, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{signal_id}")
-async def get_signal(signal_id: int, db: Session = Depends(get_db)):
-    signal = db.query(Signal).filter(Signal.id == signal_id).first()
-    if not signal:
-        raise HTTPException(status_code=404, detail="Signal not found")
+async def get_signal(signal_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        signal = db.query(Signal).filter(Signal.id == signal_id).first()
+        if not signal:
+            raise HTTPException(status_code=404, detail="Signal not found")
+        
+        return {
+            "id": signal.id,
+            "timestamp": signal.timestamp,
+            "exchange": signal.exchange,
+            "symbol": signal.symbol,
+            "signal_type": signal.signal_type,
+            "confidence": signal.confidence,
+            "price": signal.price,
+            "volume": signal.volume,
+            "metadata": signal.signal_metadata
+        }
     
-    return {
-        "id": signal.id,
-        "timestamp": signal.timestamp,
-        "exchange": signal.exchange,
-        "symbol": signal.symbol,
-        "signal_type": signal.signal_type,
-        "confidence": signal.confidence,
-        "price": signal.price,
-        "volume": signal.volume,
-        "metadata": signal.signal_metadata
-    }
+    validator = fingerprint(db.query(Signal).filter(Signal.id == signal_id), Signal, Signal.timestamp)
+    
+    return await conditional_json(
+        request,
+        validator,
+        lambda: response_cache.get_or_load(
+            "signals:get", {"signal_id": signal_id}, ["signals", f"signal:{signal_id}"], load
+        ),
+        last_modified=validator[2]
+    )
 
 
 @router.get("/live/stream")
@@ -1,16 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from ...core.database import get_db
+from ...core.db_writer import db_writer
+from ...core.http_cache import conditional_json, fingerprint
 from ...models.strategy import Strategy
 from ...models.user import User
+from ...services.response_cache import response_cache, strategy_tags
 
 router = APIRouter()
 
 
+def _serialize_strategy(strategy: Strategy) -> dict:
+    return {
+        "id": strategy.id,
+        "user_id": strategy.user_id,
+        "name": strategy.name,
+        "market": strategy.market,
+        "state": strategy.state,
+        "pnl": strategy.pnl,
+        "config": strategy.config,
+        "created_at": strategy.created_at,
+        "updated_at": strategy.updated_at
+    }
+
+
+async def _validator(query, *tags) -> Optional[tuple]:
+    """
+    Row fingerprint plus the cache tag versions, or None while the versions are unknown.
+
+    updated_at only has second precision on some backends; the tag versions,
+    bumped on every write, catch repeated edits within the same second.
+    Without them two such edits would share a validator.
+    """
+    versions = await response_cache.tag_versions(*tags)
+    if versions is None:
+        return None
+    return fingerprint(query, Strategy, Strategy.updated_at) + (versions,)
+
+
 @router.get("/")
 async def get_strategies(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[int] = None,
@@ -21,24 +53,23 @@ async def get_strategies(
     if user_id:
         query = query.filter(Strategy.user_id == user_id)
     
-    strategies = query.offset(skip).limit(limit).all()
+    def load():
+        strategies = query.offset(skip).limit(limit).all()
+        
+        return {
+            "strategies": [_serialize_strategy(strategy) for strategy in strategies]
+        }
     
-    return {
-        "strategies": [
-            {
-                "id": strategy.id,
-                "user_id": strategy.user_id,
-                "name": strategy.name,
-                "market": strategy.market,
-                "state": strategy.state,
-                "pnl": strategy.pnl,
-                "config": strategy.config,
-                "created_at": strategy.created_at,
-                "updated_at": strategy.updated_at
-            }
-            for strategy in strategies
-        ]
-    }
+    tags = [f"strategies:user:{user_id}"] if user_id else ["strategies"]
+    validator = await _validator(query, *tags)
+    return await conditional_json(
+        request,
+        validator,
+        lambda: response_cache.get_or_load(
+            "strategies:list", {"skip": skip, "limit": limit, "user_id": user_id}, tags, load
+        ),
+        last_modified=validator[2] if validator else None
+    )
 
 
 @router.post("/")
@@ -53,40 +84,43 @@ async def create_strategy(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    strategy = Strategy(
-        user_id=user_id,
-        name=name,
-        market=market,
-        config=config
-    )
+    def save(session: Session) -> int:
+        strategy = Strategy(
+            user_id=user_id,
+            name=name,
+            market=market,
+            config=config
+        )
+        session.add(strategy)
+        session.flush()
+        return strategy.id
     
-    db.add(strategy)
-    db.commit()
-    db.refresh(strategy)
+    strategy_id = await db_writer.run(save, db=db)
+    await response_cache.invalidate(*strategy_tags(strategy_id, user_id))
     
     return {
         "message": "Strategy created successfully",
-        "strategy_id": strategy.id
+        "strategy_id": strategy_id
     }
 
 
 @router.get("/{strategy_id}")
-async def get_strategy(strategy_id: int, db: Session = Depends(get_db)):
-    strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
-    if not strategy:
-        raise HTTPException(status_code=404, detail="Strategy not found")
+async def get_strategy(strategy_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+        if not strategy:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        
+        return _serialize_strategy(strategy)
     
-    return {
-        "id": strategy.id,
-        "user_id": strategy.user_id,
-        "name": strategy.name,
-        "market": strategy.market,
-        "state": strategy.state,
-        "pnl": strategy.pnl,
-        "config": strategy.config,
-        "created_at": strategy.created_at,
-        "updated_at": strategy.updated_at
-    }
+    tags = [f"strategy:{strategy_id}"]
+    validator = await _validator(db.query(Strategy).filter(Strategy.id == strategy_id), *tags)
+    return await conditional_json(
+        request,
+        validator,
+        lambda: response_cache.get_or_load("strategies:get", {"strategy_id": strategy_id}, tags, load),
+        last_modified=validator[2] if validator else None
+    )
 
 
 @router.put("/{strategy_id}")
@@ -98,35 +132,39 @@ async def update_strategy(
     config: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
-    if not strategy:
-        raise HTTPException(status_code=404, detail="Strategy not found")
-    
-    if name:
-        strategy.name = name
-    if market:
-        strategy.market = market
-    if state:
-        strategy.state = state
-    if config:
-        strategy.config = config
+    def update(session: Session) -> Optional[int]:
+        strategy = session.query(Strategy).filter(Strategy.id == strategy_id).first()
+        if not strategy:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        if name:
+            strategy.name = name
+        if market:
+            strategy.market = market
+        if state:
+            strategy.state = state
+        if config:
+            strategy.config = config
+        return strategy.user_id
     
-    db.commit()
-    db.refresh(strategy)
+    user_id = await db_writer.run(update, db=db)
+    await response_cache.invalidate(*strategy_tags(strategy_id, user_id))
     
     return {
         "message": "Strategy updated successfully",
-        "strategy_id": strategy.id
+        "strategy_id": strategy_id
     }
 
 
 @router.delete("/{strategy_id}")
 async def delete_strategy(strategy_id: int, db: Session = Depends(get_db)):
-    strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
-    if not strategy:
-        raise HTTPException(status_code=404, detail="Strategy not found")
+    def delete(session: Session) -> Optional[int]:
+        strategy = session.query(Strategy).filter(Strategy.id == strategy_id).first()
+        if not strategy:
+            raise HTTPException(status_code=404, detail="Strategy not found")
+        session.delete(strategy)
+        return strategy.user_id
     
-    db.delete(strategy)
-    db.commit()
+    user_id = await db_writer.run(delete, db=db)
+    await response_cache.invalidate(*strategy_tags(strategy_id, user_id))
     
     return {"message": "Strategy deleted successfully"}
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import logging
 
+from ...core.config import settings
 from ...core.database import get_db
 from ...services.trade_service import trade_service
+from ...services.arbitrage_scanner import arbitrage_scanner
+from ...services.risk_engine import risk_engine
+from ...services.order_stream import order_stream_hub, format_event
+from ...services.feature_store import feature_store, FEATURE_SETS
+from .admin import require_admin
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +25,13 @@ class OrderRequest(BaseModel):
     side: str  # 'buy' or 'sell'
     amount: float
     price: Optional[float] = None
+    user_id: Optional[int] = None
+
+class RiskLimitsRequest(BaseModel):
+    max_order_notional: Optional[float] = None
+    max_position_notional: Optional[float] = None
+    max_open_orders: Optional[int] = None
+    max_open_notional: Optional[float] = None
 
 class OrderResponse(BaseModel):
     success: bool
@@ -48,7 +63,8 @@ async def place_order(order: OrderRequest):
             symbol=order.symbol,
             side=order.side,
             amount=order.amount,
-            price=order.price
+            price=order.price,
+            user_id=order.user_id
         )
         
         return OrderResponse(
@@ -119,3 +135,82 @@ async def get_portfolio_balance(exchange: str):
     except Exception as e:
         logger.error(f"Error fetching portfolio balance: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch portfolio balance: {str(e)}")
+
+@router.get("/arbitrage")
+async def get_arbitrage_opportunities(symbol: Optional[str] = None, limit: int = 100):
+    """
+    Current fee-adjusted cross-exchange arbitrage opportunities, best first
+    """
+    opportunities = arbitrage_scanner.opportunities
+    if symbol:
+        opportunities = [o for o in opportunities if o["symbol"] == symbol]
+    return {"opportunities": opportunities[:limit], "min_spread": settings.arbitrage_min_spread}
+
+@router.get("/risk/{user_id}")
+async def get_risk_exposure(user_id: int):
+    """
+    Positions, open-order exposure and effective limits held by the risk engine for a user
+    """
+    return risk_engine.exposure(user_id)
+
+@router.put("/risk/{user_id}/limits", dependencies=[Depends(require_admin)])
+async def set_risk_limits(user_id: int, limits: RiskLimitsRequest):
+    """
+    Override a user's risk limits on every worker; omitted fields are unchanged. Requires X-Admin-Token
+    """
+    return {"user_id": user_id, "limits": await risk_engine.save_limits(user_id, **limits.model_dump())}
+
+@router.get("/features/{exchange}")
+async def get_features(exchange: str, symbols: str, feature_set: str = "market", at: Optional[float] = None):
+    """
+    Latest feature values for comma-separated symbols, optionally as of an epoch timestamp
+    """
+    if feature_set not in FEATURE_SETS:
+        raise HTTPException(status_code=404, detail=f"Unknown feature set {feature_set}")
+    keys = [(exchange, symbol.strip()) for symbol in symbols.split(",") if symbol.strip()]
+    found = await feature_store.get_many(keys, feature_set, at)
+    return {
+        "feature_set": feature_set,
+        "version": FEATURE_SETS[feature_set].version,
+        "features": {symbol: found[(exchange, symbol)] for _, symbol in keys}
+    }
+
+@router.get("/orders/stream")
+async def stream_order_updates(
+    request: Request,
+    user_id: Optional[int] = None,
+    exchange: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events stream of order updates, optionally for one user and/or exchange.
+    Reconnecting clients resume after Last-Event-ID while it is still buffered;
+    otherwise they get a "reset" event and should re-fetch order state.
+    """
+    subscriber, resumed = order_stream_hub.subscribe(user_id, exchange, last_event_id_header or last_event_id)
+    keepalive = settings.order_stream_keepalive_seconds
+    
+    async def events():
+        try:
+            # Sent immediately so headers reach the client before the first update
+            yield "retry: 3000\n: connected\n\n"
+            if not resumed:
+                yield format_event(order_stream_hub.event_id(order_stream_hub.sequence), {"reason": "resume unavailable"}, "reset")
+            while not subscriber.overflowed:
+                try:
+                    sequence, update = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(order_stream_hub.event_id(sequence), update)
+        finally:
+            order_stream_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Optional
+import logging
+
+from ...core.database import get_db
+from ...models.vault import Vault, Investment
+from ...services.nav_engine import nav_engine
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class NAVMarkRequest(BaseModel):
+    nav_per_share: Optional[float] = None
+    return_pct: Optional[float] = None
+
+def _get_vault(db: Session, vault_id: int) -> Vault:
+    vault = db.query(Vault).filter(Vault.id == vault_id).first()
+    if not vault:
+        raise HTTPException(status_code=404, detail="Vault not found")
+    return vault
+
+@router.get("/")
+async def get_vaults(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    List vaults with their latest NAV and fee totals
+    """
+    vaults = db.query(Vault).order_by(Vault.id).offset(skip).limit(limit).all()
+    
+    return {
+        "vaults": [
+            {
+                "id": vault.id,
+                "name": vault.name,
+                "strategy_type": vault.strategy_type,
+                "risk_level": vault.risk_level,
+                "is_active": vault.is_active,
+                "nav_per_share": vault.nav_per_share,
+                "total_value": vault.total_value,
+                "accrued_management_fee": vault.accrued_management_fee,
+                "accrued_performance_fee": vault.accrued_performance_fee,
+                "last_accrual_at": vault.last_accrual_at
+            }
+            for vault in vaults
+        ]
+    }
+
+@router.get("/{vault_id}/nav")
+async def get_vault_nav(vault_id: int, db: Session = Depends(get_db)):
+    """
+    Get the vault's current NAV summary from the in-memory book
+    """
+    vault = _get_vault(db, vault_id)
+    book = await run_in_threadpool(nav_engine.get_book, db, vault)
+    return book.summary()
+
+@router.post("/{vault_id}/nav")
+async def mark_vault_nav(
+    vault_id: int,
+    mark: NAVMarkRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Mark the vault to a new NAV per share and accrue fees since the last mark.
+    
+    Pass either nav_per_share or return_pct (relative to the current NAV);
+    with neither, fees are accrued at the current NAV.
+    """
+    if mark.nav_per_share is not None and mark.return_pct is not None:
+        raise HTTPException(status_code=400, detail="Pass nav_per_share or return_pct, not both")
+    
+    vault = _get_vault(db, vault_id)
+    nav = mark.nav_per_share
+    if mark.return_pct is not None:
+        nav = (vault.nav_per_share or 1.0) * (1.0 + mark.return_pct / 100.0)
+    if nav is not None and nav <= 0:
+        raise HTTPException(status_code=400, detail="NAV per share must be positive")
+    
+    try:
+        return await run_in_threadpool(nav_engine.mark, db, vault, nav)
+    except Exception as e:
+        logger.error(f"Error marking vault {vault_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to mark vault: {str(e)}")
+
+@router.get("/{vault_id}/investments")
+async def get_vault_investments(
+    vault_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    List a vault's investments with their last marked value and P&L
+    """
+    _get_vault(db, vault_id)
+    investments = db.query(Investment).filter(
+        Investment.vault_id == vault_id
+    ).order_by(Investment.id).offset(skip).limit(limit).all()
+    
+    return {
+        "investments": [
+            {
+                "id": investment.id,
+                "investor_id": investment.investor_id,
+                "amount": investment.amount,
+                "token": investment.token,
+                "status": investment.status,
+                "entry_price": investment.entry_price,
+                "current_value": investment.current_value,
+                "profit_loss": investment.profit_loss,
+                "high_water_mark": investment.high_water_mark,
+                "accrued_fees": investment.accrued_fees
+            }
+            for investment in investments
+        ]
+    }
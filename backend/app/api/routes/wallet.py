@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import logging
 
+from ...core.config import settings
 from ...core.database import get_db
+from ...core.db_writer import db_writer
 from ...models.wallet import WalletTransaction
+from ...services.wallet_service import wallet_service, summarize
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,19 @@ class TransactionResponse(BaseModel):
     status: str
     created_at: str
 
+class StatusUpdateRequest(BaseModel):
+    hash: str
+    status: str
+
+def _check_batch_size(size: int):
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if size > settings.wallet_batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {size} exceeds the limit of {settings.wallet_batch_max_size} items"
+        )
+
 @router.post("/tx", response_model=dict)
 async def create_transaction(
     transaction: TransactionRequest,
@@ -39,7 +55,7 @@ async def create_transaction(
     """
     Save a new crypto transaction to the database
     """
-    try:
+    def save(session: Session) -> int:
         db_transaction = WalletTransaction(
             hash=transaction.hash,
             from_address=transaction.from_address,
@@ -49,16 +65,18 @@ async def create_transaction(
             network=transaction.network,
             status=transaction.status
         )
-        
-        db.add(db_transaction)
-        db.commit()
-        db.refresh(db_transaction)
+        session.add(db_transaction)
+        session.flush()
+        return db_transaction.id
+    
+    try:
+        transaction_id = await db_writer.run(save, db=db)
         
         logger.info(f"Transaction saved: {transaction.hash}")
         
         return {
             "message": "Transaction saved successfully",
-            "id": db_transaction.id,
+            "id": transaction_id,
             "hash": transaction.hash
         }
         
@@ -67,6 +85,64 @@ async def create_transaction(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save transaction: {str(e)}")
 
+@router.post("/tx/batch", response_model=dict)
+async def create_transactions_batch(
+    transactions: List[TransactionRequest],
+    db: Session = Depends(get_db)
+):
+    """
+    Idempotently upsert a batch of transactions keyed on hash, in one database transaction
+    """
+    _check_batch_size(len(transactions))
+    
+    try:
+        rows = [transaction.model_dump() for transaction in transactions]
+        results = await db_writer.run(lambda session: wallet_service.upsert_transactions(session, rows), db=db)
+        
+        counts = summarize(results)
+        logger.info(f"Transaction batch of {len(transactions)} processed: {counts}")
+        
+        return {
+            "message": "Transaction batch processed",
+            "total": len(transactions),
+            "counts": counts,
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error saving transaction batch: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to save transaction batch: {str(e)}")
+
+@router.patch("/tx/status/batch", response_model=dict)
+async def update_transaction_statuses_batch(
+    updates: List[StatusUpdateRequest],
+    db: Session = Depends(get_db)
+):
+    """
+    Update the status of many transactions in one database transaction
+    """
+    _check_batch_size(len(updates))
+    
+    try:
+        changes = [update.model_dump() for update in updates]
+        results = await db_writer.run(lambda session: wallet_service.update_statuses(session, changes), db=db)
+        
+        counts = summarize(results)
+        logger.info(f"Transaction status batch of {len(updates)} processed: {counts}")
+        
+        return {
+            "message": "Transaction status batch processed",
+            "total": len(updates),
+            "counts": counts,
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error updating transaction status batch: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update transaction batch: {str(e)}")
+
 @router.get("/tx/{tx_hash}", response_model=TransactionResponse)
 async def get_transaction(
     tx_hash: str,
@@ -110,17 +186,18 @@ async def update_transaction_status(
     """
     Update transaction status (pending, confirmed, failed)
     """
-    try:
-        transaction = db.query(WalletTransaction).filter(
+    def set_status(session: Session) -> bool:
+        transaction = session.query(WalletTransaction).filter(
             WalletTransaction.hash == tx_hash
         ).first()
-        
-        if not transaction:
+        if transaction:
+            transaction.status = status
+        return transaction is not None
+    
+    try:
+        if not await db_writer.run(set_status, db=db):
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        transaction.status = status
-        db.commit()
-        
         logger.info(f"Transaction {tx_hash} status updated to {status}")
         
         return {"message": "Transaction status updated", "status": status}
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import math
+from typing import Dict
+
+from .config import settings
+from ..services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# First matching prefix wins. Order placement and cancellation are critical;
+# reports and exports are the first traffic to be shed under load.
+ROUTE_CLASSES = [
+    ("/api/trade/orders/stream", NORMAL),
+    ("/api/trade/order", CRITICAL),
+    ("/api/reports/", LOW),
+]
+
+EXEMPT_PATHS = {"/healthz", "/docs", "/redoc", "/openapi.json"}
+
+# Long-lived streams are rate limited on connect but do not hold a concurrency slot
+STREAMING_PATHS = {"/api/trade/orders/stream"}
+
+
+def route_class(path: str) -> str:
+    if "/export" in path:
+        return LOW
+    for prefix, priority in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return priority
+    return NORMAL
+
+
+def client_id(scope) -> str:
+    """Identify the caller by API key or bearer token if present, otherwise by address"""
+    headers = dict(scope.get("headers") or [])
+    credential = headers.get(b"x-api-key") or headers.get(b"authorization")
+    if credential:
+        return "key:" + hashlib.sha1(credential).hexdigest()[:16]
+
+    if settings.trust_forwarded_for and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].split(b",")[0].strip().decode()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight requests with priority-tiered admission.
+
+    Each class may only be admitted while total in-flight work is below its
+    share of capacity, so low-priority requests are refused first and the
+    remaining headroom stays reserved for critical order traffic.
+    """
+
+    def __init__(self, capacity: int, shares: Dict[str, float]):
+        self.capacity = capacity
+        self.limits = {priority: max(1, int(capacity * share)) for priority, share in shares.items()}
+        self.in_flight = 0
+
+    def try_acquire(self, priority: str) -> bool:
+        if self.in_flight >= self.limits.get(priority, self.capacity):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+
+class AdmissionMiddleware:
+    """Per-client token-bucket limits plus priority load shedding, evaluated before routing"""
+
+    def __init__(self, app):
+        self.app = app
+        self.limiter = ConcurrencyLimiter(
+            settings.admission_max_concurrency,
+            {CRITICAL: 1.0, NORMAL: settings.admission_normal_share, LOW: settings.admission_low_share}
+        )
+        self.stats = {
+            priority: {"admitted": 0, "rate_limited": 0, "shed": 0}
+            for priority in (CRITICAL, NORMAL, LOW)
+        }
+
+    async def _reject(self, send, status: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_class(scope["path"])
+        stats = self.stats[priority]
+        holds_slot = scope["path"] not in STREAMING_PATHS
+
+        # Shed before spending a Redis round trip on a request we would refuse anyway
+        if holds_slot and not self.limiter.try_acquire(priority):
+            stats["shed"] += 1
+            await self._reject(send, 503, "Server is overloaded, retry later", 1)
+            return
+
+        try:
+            client = client_id(scope)
+            client_rate, client_burst = settings.rate_limit_client
+            route_rate, route_burst = settings.rate_limit_routes[priority]
+            allowed, retry_after = await rate_limiter.check([
+                (f"rl:{{{client}}}:all", client_rate, client_burst),
+                (f"rl:{{{client}}}:{priority}", route_rate, route_burst),
+            ])
+            if not allowed:
+                stats["rate_limited"] += 1
+                await self._reject(send, 429, "Rate limit exceeded", retry_after)
+                return
+
+            stats["admitted"] += 1
+            await self.app(scope, receive, send)
+        finally:
+            if holds_slot:
+                self.limiter.release()
+
+
+def admission_stats(app) -> Dict:
+    """Find the admission middleware in the built stack and report its counters"""
+    layer = getattr(app, "middleware_stack", None)
+    while layer is not None:
+        if isinstance(layer, AdmissionMiddleware):
+            return {
+                "in_flight": layer.limiter.in_flight,
+                "capacity": layer.limiter.capacity,
+                "class_limits": layer.limiter.limits,
+                "classes": layer.stats,
+            }
+        layer = getattr(layer, "app", None)
+    return {"enabled": False}
@@ -0,0 +1,133 @@
+import gzip
+import logging
+from typing import Dict, List, Optional
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # optional, install the "compression" extra for br support
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    codings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[name] = q
+    return codings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Pick br over gzip when both are acceptable, honouring q-values and q=0 exclusions"""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression for complete responses above a size threshold.
+
+    Only responses sent as a single body message are compressed; streaming
+    responses (NDJSON exports, event streams) pass through untouched so they
+    are never buffered. Small bodies are sent as-is because compressing them
+    costs more CPU than the bytes it saves.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.compression_min_size if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start, body):
+                await send(self._with_vary(start))
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            response_headers = [
+                (name, value) for name, value in start["headers"] if name.lower() != b"content-length"
+            ]
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            await send(self._with_vary({**start, "headers": response_headers}))
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start.get("status", 200) in (204, 304):
+            return False
+        content_type = b""
+        for name, value in start["headers"]:
+            name = name.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1")
+        return any(content_type.startswith(kind) for kind in COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _with_vary(start):
+        headers: List = list(start["headers"])
+        for index, (name, value) in enumerate(headers):
+            if name.lower() == b"vary":
+                if b"accept-encoding" not in value.lower():
+                    headers[index] = (name, value + b", Accept-Encoding")
+                return {**start, "headers": headers}
+        headers.append((b"vary", b"Accept-Encoding"))
+        return {**start, "headers": headers}
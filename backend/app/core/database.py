@@ -1,13 +1,71 @@
-from sqlalchemy import create_engine
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./cerebellumbot.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def normalize_url(url: str) -> str:
+    """Use the psycopg 3 driver for plain postgres:// and postgresql:// URLs"""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+
+def engine_options(url: str) -> Dict:
+    """create_engine keyword arguments for the backend the URL selects"""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        # A pooled connection dropped by the server or a failover is replaced instead of failing a request
+        "pool_pre_ping": True,
+        "insertmanyvalues_page_size": settings.database_bulk_page_size,
+        "connect_args": {"options": f"-c statement_timeout={settings.database_statement_timeout_ms}"},
+    }
+
+
+def configure_sqlite(engine: Engine):
+    """
+    WAL journaling, tuned pragmas and explicit transactions for a file-backed SQLite engine.
+
+    WAL lets readers run alongside the single writer instead of blocking on
+    it, and synchronous=NORMAL is durable across application crashes under
+    WAL. pysqlite's implicit transaction handling is switched off so that
+    SQLAlchemy emits BEGIN itself: SAVEPOINTs then work, and the writer can
+    ask for BEGIN IMMEDIATE to take the write lock up front rather than
+    failing to upgrade a read lock mid-transaction.
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        options = conn.get_execution_options()
+        if options.get("isolation_level") != "AUTOCOMMIT":
+            conn.exec_driver_sql(f"BEGIN {options.get('sqlite_begin', 'DEFERRED')}")
+
+
+SQLALCHEMY_DATABASE_URL = normalize_url(settings.database_url)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite") and settings.sqlite_wal:
+    configure_sqlite(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
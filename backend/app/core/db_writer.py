@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal, engine as default_engine
+from .metrics import histogram
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWriter:
+    """
+    Funnels SQLite writes through one dedicated thread and connection.
+
+    Callers hand over a function of a Session; it runs on the writer thread
+    inside a SAVEPOINT, and every write that queued up while the previous
+    transaction was committing shares the next BEGIN IMMEDIATE ... COMMIT.
+    Writers therefore never contend for the database lock (no "database is
+    locked" stalls), one fsync covers many writes, and a failing function
+    only rolls back its own savepoint. Reads keep using their own pooled
+    connections and, under WAL, are not blocked by the writer.
+
+    Functions must not commit, and should return plain data rather than ORM
+    instances, which belong to the writer's session. Work aimed at another
+    database (a test or benchmark session) and any work while the writer is
+    not running is executed directly by the caller, then committed.
+    """
+
+    def __init__(self, session_factory=SessionLocal, engine=default_engine):
+        self.session_factory = session_factory
+        self.engine = engine
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.wait = histogram("db_writer_wait")
+        self.stats = {"writes": 0, "transactions": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or self.engine.dialect.name != "sqlite" or not settings.sqlite_single_writer:
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        logger.info("Database writer started")
+
+    def stop(self):
+        if self.running:
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _targets_writer(self, db: Optional[Session], session_factory) -> bool:
+        if not self.running:
+            return False
+        if db is not None:
+            return db.get_bind() is self.engine
+        return session_factory is None or session_factory is self.session_factory
+
+    def submit(self, fn: Callable[[Session], Any]) -> Future:
+        future: Future = Future()
+        # fn runs in the submitter's context, so its statements join the submitter's trace
+        self._queue.put((fn, future, time.perf_counter(), contextvars.copy_context()))
+        return future
+
+    async def run(self, fn: Callable[[Session], Any], db: Optional[Session] = None, session_factory=None) -> Any:
+        """
+        Run fn(session) in a committed write transaction and return its result.
+
+        `db` is the caller's session, used (and committed) directly when the
+        writer does not own its database; without one, a session from
+        `session_factory` is opened in a thread.
+        """
+        with tracer.span("db.write", root=False, queued=self._targets_writer(db, session_factory)):
+            if self._targets_writer(db, session_factory):
+                return await asyncio.wrap_future(self.submit(fn))
+            if db is not None:
+                return self._run_in(db, fn)
+            return await asyncio.to_thread(self._run_alone, fn, session_factory or self.session_factory)
+
+    def run_sync(self, fn: Callable[[Session], Any], db: Optional[Session] = None, session_factory=None) -> Any:
+        """Blocking variant of run() for code already on a worker thread"""
+        if self._targets_writer(db, session_factory):
+            return self.submit(fn).result()
+        if db is not None:
+            return self._run_in(db, fn)
+        return self._run_alone(fn, session_factory or self.session_factory)
+
+    @staticmethod
+    def _run_in(db: Session, fn: Callable[[Session], Any]) -> Any:
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+
+    def _run_alone(self, fn: Callable[[Session], Any], session_factory) -> Any:
+        db = session_factory()
+        try:
+            return self._run_in(db, fn)
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            # Everything that queued while the last transaction committed goes into this one
+            while len(batch) < settings.sqlite_writer_batch_max:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch):
+        db = self.session_factory()
+        outcomes = []
+        try:
+            db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+            started = time.perf_counter()
+            for fn, future, enqueued, context in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.wait.record(started - enqueued)
+                try:
+                    with db.begin_nested():
+                        outcomes.append((future, context.run(fn, db), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Database writer transaction of {len(batch)} writes failed: {e}")
+            self.stats["failed"] += len(batch)
+            for _, future, _, _ in batch:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self.stats["transactions"] += 1
+        for future, result, error in outcomes:
+            self.stats["writes"] += 1
+            if error is not None:
+                self.stats["failed"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            **self.stats,
+            "writes_per_transaction": self.stats["writes"] / self.stats["transactions"] if self.stats["transactions"] else 0.0,
+            "queue_wait": self.wait.snapshot(),
+        }
+
+
+db_writer = DatabaseWriter()
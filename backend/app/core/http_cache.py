@@ -0,0 +1,100 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from inspect import isawaitable
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import func
+
+# Bump when a response shape changes so clients drop validators from older builds
+RESPONSE_VERSION = 1
+
+
+def fingerprint(query, model, timestamp_column=None) -> tuple:
+    """One aggregate over a filtered query that changes whenever its rows are added, removed or touched"""
+    columns = [func.count(model.id), func.max(model.id)]
+    if timestamp_column is not None:
+        columns.append(func.max(timestamp_column))
+    return tuple(query.order_by(None).with_entities(*columns).one())
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def make_etag(request: Request, validator: Sequence) -> str:
+    raw = json.dumps(
+        [RESPONSE_VERSION, request.url.path, sorted(request.query_params.multi_items()), list(validator)],
+        default=str
+    )
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison: W/ prefixes are ignored on both sides
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+async def _json(build: Callable[[], Any], headers: dict) -> Response:
+    body = build()
+    if isawaitable(body):
+        body = await body
+    return JSONResponse(content=jsonable_encoder(body), headers=headers)
+
+
+async def conditional_json(
+    request: Request,
+    validator: Optional[Sequence],
+    build: Callable[[], Any],
+    last_modified: Optional[datetime] = None,
+    max_age: int = 0
+) -> Response:
+    """
+    Answer a GET with 304 when the client's validators still match, else build the JSON body.
+
+    `validator` must be cheap to compute and change whenever the body would;
+    `build` is only called on a miss, so an unchanged poll costs the
+    validator query and nothing else. A None validator means changes cannot
+    be detected right now: the body is always sent, without ETag or
+    Last-Modified for the client to revalidate against.
+    """
+    if validator is None:
+        return await _json(build, {"Cache-Control": "no-store"})
+
+    etag = make_etag(request, validator)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}, must-revalidate"}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        if _not_modified_since(request.headers["if-modified-since"], last_modified):
+            return Response(status_code=304, headers=headers)
+
+    return await _json(build, headers)
@@ -0,0 +1,77 @@
+import bisect
+import math
+import threading
+from typing import Dict, List
+
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced latency buckets, cheap enough to record on every event.
+
+    Bucket bounds grow by ~12% from 1us to ~100s, so a percentile read from
+    the buckets is within about 6% of the true value.
+    """
+
+    def __init__(self, name: str, min_seconds: float = 1e-6, max_seconds: float = 100.0, growth: float = 1.12):
+        self.name = name
+        count = int(math.ceil(math.log(max_seconds / min_seconds, growth))) + 1
+        self.bounds: List[float] = [min_seconds * growth ** i for i in range(count)]
+        self.counts = [0] * (count + 1)  # last bucket is overflow
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0-100), in seconds"""
+        if self.total == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.total * p / 100.0))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.total = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    def snapshot(self) -> Dict:
+        """Summary in milliseconds"""
+        return {
+            "count": self.total,
+            "mean_ms": self.sum / self.total * 1000 if self.total else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+
+
+def histogram(name: str) -> LatencyHistogram:
+    """Get or create the process-wide histogram with this name"""
+    if name not in _histograms:
+        _histograms[name] = LatencyHistogram(name)
+    return _histograms[name]
+
+
+def latency_snapshot() -> Dict[str, Dict]:
+    return {name: h.snapshot() for name, h in sorted(_histograms.items())}
@@ -0,0 +1,51 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _default_literal(column, dialect):
+    if column.default is None or not column.default.is_scalar:
+        return None
+    processor = column.type.literal_processor(dialect)
+    return processor(column.default.arg) if processor else repr(column.default.arg)
+
+
+def add_missing_columns(engine: Engine):
+    """
+    Add columns and indexes declared on the models but missing from existing tables.
+
+    Base.metadata.create_all only creates missing tables, so databases created
+    before a column was added would otherwise fail on every query touching it.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            added = set()
+            for column in table.columns:
+                if column.name in present:
+                    continue
+
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                default = _default_literal(column, engine.dialect)
+                if default is not None:
+                    ddl += f" DEFAULT {default}"
+                conn.execute(text(ddl))
+                added.add(column.name)
+                logger.info(f"Added column {table.name}.{column.name}")
+
+            present_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in present_indexes and any(c.name in added for c in index.columns):
+                    index.create(conn)
+                    logger.info(f"Created index {index.name}")
@@ -0,0 +1,261 @@
+import cProfile
+import hmac
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from .admission import STREAMING_PATHS
+from .config import settings
+from .database import SessionLocal
+from .db_writer import db_writer
+from .metrics import histogram
+from ..models.profile import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+SQL_TEXT_LIMIT = 2000
+
+
+class ProfileCollector:
+    """SQL statements executed on behalf of one request, with their timings"""
+
+    def __init__(self):
+        self.statements: List[Dict] = []
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+
+    def add_statement(self, statement: str, seconds: float, executemany: bool):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        if len(self.statements) < settings.profiling_max_statements:
+            self.statements.append({
+                "sql": statement[:SQL_TEXT_LIMIT],
+                "ms": seconds * 1000,
+                "executemany": executemany,
+            })
+
+
+# The collector of the request being handled; copied into worker threads with the context
+_collector: ContextVar[Optional[ProfileCollector]] = ContextVar("profile_collector", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collector.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collector = _collector.get()
+    started = conn.info.get("profile_started")
+    if collector is not None and started:
+        collector.add_statement(statement, time.perf_counter() - started.pop(), executemany)
+
+
+def _package(filename: str) -> str:
+    """Group a profiled function by the package it lives in"""
+    if filename.startswith("~") or filename.startswith("<"):
+        return "builtins"
+    parts = filename.replace("\\", "/").split("/")
+    if "site-packages" in parts:
+        return parts[parts.index("site-packages") + 1].split(".")[0]
+    if "app" in parts:
+        return "app"
+    return "stdlib"
+
+
+def summarize_profile(profiler: cProfile.Profile, top: int) -> Dict:
+    """Hottest functions by cumulative time, and self time per package"""
+    stats = pstats.Stats(profiler).stats
+    packages: Dict[str, float] = {}
+    for (filename, _, _), (_, _, self_seconds, _, _) in stats.items():
+        package = _package(filename)
+        packages[package] = packages.get(package, 0.0) + self_seconds * 1000
+    hottest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return {
+        "functions": [
+            {
+                "function": name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "self_ms": self_seconds * 1000,
+                "cumulative_ms": cumulative * 1000,
+            }
+            for (filename, line, name), (_, calls, self_seconds, cumulative, _) in hottest
+        ],
+        "packages_self_ms": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+class RequestProfiler:
+    """Saves profile records and counts what the middleware captured"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.latency = histogram("profiled_requests")
+        self.stats = {"requests": 0, "requested": 0, "sampled": 0, "slow": 0,
+                      "profiles_skipped": 0, "saved": 0, "errors": 0}
+        # cProfile hooks the whole interpreter thread, so one call-stack profile runs at a time
+        self._busy = threading.Lock()
+        self.in_flight = 0
+        # Other requests that ran on the event loop while the current profile was on
+        self._overlapping = 0
+
+    def enter(self):
+        self.in_flight += 1
+        if self._busy.locked():
+            self._overlapping += 1
+
+    def leave(self):
+        self.in_flight -= 1
+
+    def try_start(self) -> Optional[cProfile.Profile]:
+        if not self._busy.acquire(blocking=False):
+            self.stats["profiles_skipped"] += 1
+            return None
+        self._overlapping = self.in_flight - 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler: Optional[cProfile.Profile]) -> int:
+        """Stop the profile; returns how many other requests ran while it was on"""
+        if profiler is None:
+            return 0
+        profiler.disable()
+        overlapping = self._overlapping
+        self._busy.release()
+        return overlapping
+
+    async def save(self, record: Dict):
+        self.stats[record["reason"]] += 1
+        try:
+            await db_writer.run(
+                lambda db: db.execute(insert(RequestProfile.__table__), [record]),
+                session_factory=self.session_factory
+            )
+            self.stats["saved"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to save request profile for {record['path']}: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": settings.profiling_enabled,
+            "sample_rate": settings.profiling_sample_rate,
+            "slow_request_ms": settings.slow_request_ms,
+            **self.stats,
+            "captured_latency": self.latency.snapshot(),
+        }
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in call-stack profiles and automatic slow-request capture.
+
+    Every request gets a collector for the SQL it executes, which costs a
+    context lookup per statement. A request carrying `X-Profile: <admin
+    token>`, or picked at `profiling_sample_rate`, is also run under cProfile
+    and answered with an `X-Profile-Id` header. Profiled requests, and any
+    request slower than `slow_request_ms`, are saved to request_profiles and
+    can be read at /api/admin/profiles.
+
+    cProfile sees only the event loop thread and counts coroutine time only
+    while a coroutine is running, so time spent awaiting Redis or the network
+    shows up as the gap between the request's duration and the profile's
+    total; SQL from threadpool routes is still captured statement by statement.
+    It also sees every other coroutine on that thread: requests served while
+    the profile was on add their own calls to it. The saved profile records
+    how many there were as `concurrent_requests`; only a profile with none
+    belongs to the one request alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _reason(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(PROFILE_HEADER, b"")
+        if token and settings.admin_token and hmac.compare_digest(token, settings.admin_token.encode()):
+            return "requested"
+        if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_enabled or scope["path"] in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = request_profiler
+        profiler.stats["requests"] += 1
+        reason = self._reason(scope)
+        request_id = uuid.uuid4().hex
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if reason:
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (PROFILE_ID_HEADER, request_id.encode())]}
+            await send(message)
+
+        collector = ProfileCollector()
+        token = _collector.set(collector)
+        profiler.enter()
+        call_profile = profiler.try_start() if reason else None
+        started = time.perf_counter()
+        try:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = time.perf_counter() - started
+                concurrent = profiler.finish(call_profile)
+                profiler.leave()
+                _collector.reset(token)
+        except Exception:
+            await self._record(profiler, scope, request_id, reason, status["code"] or 500,
+                               duration, collector, call_profile, concurrent)
+            raise
+        await self._record(profiler, scope, request_id, reason, status["code"], duration, collector,
+                           call_profile, concurrent)
+
+    async def _record(self, profiler: RequestProfiler, scope, request_id: str, reason: Optional[str],
+                      status_code: Optional[int], duration: float, collector: ProfileCollector,
+                      call_profile: Optional[cProfile.Profile], concurrent: int):
+        if reason is None:
+            if duration * 1000 < settings.slow_request_ms:
+                return
+            reason = "slow"
+        profiler.latency.record(duration)
+        await profiler.save({
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1") or None,
+            "status_code": status_code,
+            "reason": reason,
+            "duration_ms": duration * 1000,
+            "sql_count": collector.sql_count,
+            "sql_ms": collector.sql_seconds * 1000,
+            "statements": collector.statements,
+            "profile": {
+                **summarize_profile(call_profile, settings.profiling_top_functions),
+                "concurrent_requests": concurrent,
+            } if call_profile else None,
+        })
+
+
+request_profiler = RequestProfiler()
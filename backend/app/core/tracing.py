@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+SQL_ATTRIBUTE_LIMIT = 300
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        """W3C trace context header value"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return SpanContext(parts[1], parts[2], sampled)
+
+
+class Span:
+    """One timed operation; finished spans are handed to the tracer's exporters"""
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext, parent_id: Optional[str], attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer.export(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": (self.duration or 0.0) * 1000,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for spans of unsampled traces so instrumented code never checks"""
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Carries an unsampled trace's context so its children are not sampled either"""
+
+    def __init__(self, context: SpanContext):
+        self.context = context
+
+
+class InMemoryExporter:
+    """Keeps the most recent spans, grouped by trace, for the admin endpoints and tests"""
+
+    def __init__(self, max_spans: int):
+        self.max_spans = max_spans
+        self.spans: deque = deque()
+        self.traces: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict):
+        with self._lock:
+            self.spans.append(span)
+            self.traces.setdefault(span["trace_id"], []).append(span)
+            while len(self.spans) > self.max_spans:
+                oldest = self.spans.popleft()
+                trace = self.traces.get(oldest["trace_id"])
+                if trace:
+                    trace.remove(oldest)
+                    if not trace:
+                        del self.traces[oldest["trace_id"]]
+
+    def trace(self, trace_id: str) -> List[Dict]:
+        with self._lock:
+            return sorted(self.traces.get(trace_id, ()), key=lambda span: span["start"])
+
+    def recent(self, limit: int) -> List[List[Dict]]:
+        with self._lock:
+            trace_ids = list(self.traces)[-limit:]
+            return [list(self.traces[trace_id]) for trace_id in reversed(trace_ids)]
+
+    def flush(self):
+        pass
+
+
+class FileExporter:
+    """Appends finished spans as JSON lines, for offline analysis without a collector"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict):
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+            self._pending = 0
+
+
+def make_exporters() -> List:
+    exporters = []
+    for name in settings.tracing_exporters:
+        if name == "memory":
+            exporters.append(InMemoryExporter(settings.tracing_memory_spans))
+        elif name == "file":
+            exporters.append(FileExporter(settings.tracing_file))
+        else:
+            logger.warning(f"Unknown trace exporter {name!r} ignored")
+    return exporters
+
+
+# The span the running code belongs to; asyncio tasks and to_thread calls inherit it
+_current: ContextVar[Optional[SpanContext]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Span-based tracing with context carried in a ContextVar.
+
+    `span()` times a block as a child of the current span, or as the root of
+    a new trace at `tracing_sample_rate`; instrumentation that should never
+    start a trace on its own (SQL, Redis, inference) passes root=False.
+    Because the current span lives in the context, it follows the request
+    into tasks created inside it, asyncio.to_thread and threadpool routes.
+    Across processes it travels as a W3C traceparent: in the HTTP header and
+    as a field of Redis message payloads (inject/extract).
+    """
+
+    def __init__(self, exporters: Optional[List] = None):
+        self.exporters = exporters if exporters is not None else make_exporters()
+        self.stats = {"traces": 0, "spans": 0, "unsampled": 0, "export_errors": 0}
+
+    @property
+    def memory(self) -> Optional[InMemoryExporter]:
+        return next((e for e in self.exporters if isinstance(e, InMemoryExporter)), None)
+
+    def current(self) -> Optional[SpanContext]:
+        return _current.get()
+
+    def start_span(self, name: str, parent: Optional[SpanContext] = None, root: bool = True, **attributes):
+        """Begin a span without making it current; the caller must end() it"""
+        if not settings.tracing_enabled:
+            return NOOP_SPAN
+        parent = parent or _current.get()
+        if parent is None:
+            if not root:
+                return NOOP_SPAN
+            self.stats["traces"] += 1
+            sampled = random.random() < settings.tracing_sample_rate
+            if not sampled:
+                self.stats["unsampled"] += 1
+            context = SpanContext(f"{random.getrandbits(128):032x}", f"{random.getrandbits(64):016x}", sampled)
+            return Span(self, name, context, None, attributes) if sampled else _UnsampledRoot(context)
+        if not parent.sampled:
+            return _UnsampledRoot(parent)
+        context = SpanContext(parent.trace_id, f"{random.getrandbits(64):016x}", True)
+        return Span(self, name, context, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[SpanContext] = None, root: bool = True, **attributes):
+        """Time the block as a span and make it the current one while it runs"""
+        span = self.start_span(name, parent, root, **attributes)
+        context = getattr(span, "context", None)
+        token = _current.set(context) if context is not None else None
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            if token is not None:
+                _current.reset(token)
+        span.end()
+
+    def inject(self, message: Dict) -> Dict:
+        """Copy of a message payload carrying the current trace context"""
+        context = _current.get()
+        if context is None:
+            return message
+        return {**message, TRACEPARENT: context.traceparent()}
+
+    def extract(self, message: Dict) -> Optional[SpanContext]:
+        """Trace context a payload was published under, if any"""
+        value = message.get(TRACEPARENT) if isinstance(message, dict) else None
+        return parse_traceparent(value) if isinstance(value, str) else None
+
+    def export(self, span: Span):
+        self.stats["spans"] += 1
+        record = span.to_dict()
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                self.stats["export_errors"] += 1
+                logger.error(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    def flush(self):
+        for exporter in self.exporters:
+            exporter.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": settings.tracing_enabled,
+            "sample_rate": settings.tracing_sample_rate,
+            "exporters": [type(exporter).__name__ for exporter in self.exporters],
+            **self.stats,
+        }
+
+
+def trace_summary(spans: List[Dict]) -> Dict:
+    """Per-hop breakdown of one trace: every span's offset from the start, and time per span name"""
+    spans = sorted(spans, key=lambda span: span["start"])
+    started = spans[0]["start"]
+    ended = max(span["start"] + span["duration_ms"] / 1000 for span in spans)
+    ids = {span["span_id"] for span in spans}
+    hops: Dict[str, Dict] = {}
+    for span in spans:
+        hop = hops.setdefault(span["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        hop["count"] += 1
+        hop["total_ms"] += span["duration_ms"]
+        hop["max_ms"] = max(hop["max_ms"], span["duration_ms"])
+    roots = [span for span in spans if span["parent_id"] not in ids]
+    return {
+        "trace_id": spans[0]["trace_id"],
+        "root": roots[0]["name"] if roots else spans[0]["name"],
+        "start": started,
+        "duration_ms": (ended - started) * 1000,
+        "span_count": len(spans),
+        "errors": sum(1 for span in spans if span["error"]),
+        "hops": hops,
+    }
+
+
+class TracingMiddleware:
+    """Root span per HTTP request, continuing an incoming traceparent and returning the trace's own"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        parent = parse_traceparent(headers.get(TRACEPARENT.encode(), b"").decode("latin-1"))
+        with tracer.span(f"HTTP {scope['method']} {scope['path']}", parent=parent,
+                         method=scope["method"], path=scope["path"]) as span:
+            context = tracer.current()
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set(status_code=message["status"])
+                    if context is not None:
+                        message = {**message, "headers": [*message.get("headers", []),
+                                                          (TRACEPARENT.encode(), context.traceparent().encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("trace_spans", []).append(tracer.start_span(
+            "db.query", root=False, statement=statement[:SQL_ATTRIBUTE_LIMIT], executemany=executemany
+        ))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans and _current.get() is not None:
+        spans.pop().end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        spans.pop().end(exception_context.original_exception)
+
+
+tracer = Tracer()
@@ -3,10 +3,28 @@ from fastapi.middleware.cors import CORSMiddleware
 import psycopg
 
 from .core.database import engine, Base
+from .core.db_writer import db_writer
 from .core.config import settings
+from .core.admission import AdmissionMiddleware
+from .core.compression import CompressionMiddleware
+from .core.migrations import add_missing_columns
+from .core.profiling import ProfilingMiddleware
+from .core.tracing import TracingMiddleware, tracer
 from .services.ai_service import ai_service
+from .services.arbitrage_scanner import arbitrage_scanner
+from .services.execution_pipeline import execution_pipeline
+from .services.market_recorder import market_recorder
+from .services.order_store import order_store
+from .services.order_stream import order_stream_hub
+from .services.feature_store import feature_store
+from .services.sentiment import sentiment_tracker
+from .services.retention import retention_job
+from .services.redis_service import redis_service
+from .services.signal_metadata import migrate_signal_metadata
 from .services.trade_service import trade_service
-from .api.routes import auth, signals, strategies, reports, requests, wallet, trade
+from .services.tx_reconciler import tx_reconciler
+from .services.withdrawal_processor import withdrawal_processor
+from .api.routes import auth, signals, strategies, reports, requests, wallet, trade, vaults, metrics, admin
 
 app = FastAPI(
     title=settings.app_name,
@@ -14,6 +32,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Innermost, so admission rejections are never compressed and route output always is
+app.add_middleware(CompressionMiddleware)
+
+# Inside admission, so rejected requests are not profiled, and outside compression, which it times
+app.add_middleware(ProfilingMiddleware)
+
+# Registered before CORS so that rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
+
 # Disable CORS. Do not remove this for full-stack development.
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +50,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Outermost, so the root span covers admission, CORS and everything below
+app.add_middleware(TracingMiddleware)
+
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+migrate_signal_metadata(engine)
 
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(signals.router, prefix="/api/signals", tags=["signals"])
@@ -32,16 +64,53 @@ app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
 app.include_router(requests.router, prefix="/api/requests", tags=["requests"])
 app.include_router(wallet.router, prefix="/api/wallet", tags=["wallet"])
 app.include_router(trade.router, prefix="/api/trade", tags=["trade"])
+app.include_router(vaults.router, prefix="/api/vaults", tags=["vaults"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.on_event("startup")
 async def startup_event():
+    db_writer.start()
+    await redis_service.connect()
     await ai_service.initialize()
     await ai_service.seed_initial_signals(100)
+    if settings.sentiment_enabled:
+        await sentiment_tracker.start()
+    if settings.market_recorder_enabled:
+        await market_recorder.start()
+    if settings.feature_store_enabled:
+        await feature_store.start()
     await trade_service.initialize_exchanges()
+    await trade_service.restore_orders()
+    await order_store.start()
+    await order_stream_hub.start()
+    if settings.tx_reconciler_enabled:
+        await tx_reconciler.start()
+    if settings.withdrawal_processor_enabled:
+        await withdrawal_processor.start()
+    if settings.arbitrage_enabled:
+        await arbitrage_scanner.start()
+    if settings.execution_enabled:
+        await execution_pipeline.start()
+    if settings.retention_enabled:
+        await retention_job.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     await ai_service.shutdown()
+    await retention_job.stop()
+    await sentiment_tracker.stop()
+    await tx_reconciler.stop()
+    await withdrawal_processor.stop()
+    await arbitrage_scanner.stop()
+    await execution_pipeline.stop()
+    await order_stream_hub.stop()
+    await feature_store.stop()
+    await order_store.stop()
+    await market_recorder.stop()
+    db_writer.stop()
+    await redis_service.disconnect()
+    tracer.flush()
 
 @app.get("/healthz")
 async def healthz():
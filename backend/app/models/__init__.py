@@ -5,3 +5,7 @@ from .log import Log
 from .request import DemoRequest, InvestorRequest
 from .wallet import WalletTransaction
 from .vault import Vault, Investor, Investment, WithdrawalRequest
+from .order import Order
+from .feature import FeatureValue
+from .summary import SignalDailySummary, LogDailySummary
+from .profile import RequestProfile
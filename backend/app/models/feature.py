@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from ..core.database import Base
+
+
+class FeatureValue(Base):
+    __tablename__ = "feature_values"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feature_set = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    exchange = Column(String, nullable=False)
+    symbol = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)  # close of the bar the values describe, UTC
+    data = Column(JSON, nullable=False)  # feature name -> value
+
+    __table_args__ = (
+        Index("ix_feature_values_key", "feature_set", "version", "exchange", "symbol", "timestamp", unique=True),
+    )
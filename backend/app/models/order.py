@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class Order(Base):
+    __tablename__ = "orders"
+
+    id = Column(String, primary_key=True, index=True)  # id assigned by TradeService
+    user_id = Column(Integer, index=True)
+    strategy_id = Column(Integer, index=True)
+    exchange = Column(String, nullable=False)
+    symbol = Column(String, nullable=False)
+    side = Column(String, nullable=False)  # buy, sell
+    type = Column(String, nullable=False)  # market, limit
+    amount = Column(Float, nullable=False)
+    price = Column(Float)  # limit price, or reference price for market orders
+    filled = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, filled, cancelled, rejected
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
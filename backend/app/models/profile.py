@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class RequestProfile(Base):
+    """A profiled or slow API request: timings, SQL statements and, when profiled, the hottest functions"""
+    __tablename__ = "request_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(String, unique=True, nullable=False)
+    timestamp = Column(DateTime, server_default=func.now(), index=True)
+    method = Column(String, nullable=False)
+    path = Column(String, nullable=False, index=True)
+    query = Column(String)
+    status_code = Column(Integer)
+    reason = Column(String, nullable=False)  # requested, sampled or slow
+    duration_ms = Column(Float, nullable=False, index=True)
+    sql_count = Column(Integer, nullable=False, default=0)
+    sql_ms = Column(Float, nullable=False, default=0.0)
+    statements = Column(JSON)  # [{"sql", "ms"}] in execution order, capped
+    # {"functions": [...], "packages_self_ms": {...}, "concurrent_requests": n} when a call-stack profile was taken
+    profile = Column(JSON)
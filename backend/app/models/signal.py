@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -14,4 +14,9 @@ class Signal(Base):
     confidence = Column(Float)
     price = Column(Float)
     volume = Column(Float)
-    signal_metadata = Column(Text)
+    signal_metadata = Column(JSON(none_as_null=True))
+    # Promoted from signal_metadata so they can be filtered without parsing it
+    model_version = Column(String, index=True)
+    market_sentiment = Column(String, index=True)
+    volatility = Column(Float, index=True)
+    idempotency_key = Column(String, unique=True, index=True)  # supplied by external producers
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Date, Float, UniqueConstraint
+from ..core.database import Base
+
+
+class SignalDailySummary(Base):
+    """Signals rolled up per day by the retention job before the raw rows are deleted"""
+    __tablename__ = "signal_daily_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    exchange = Column(String)
+    symbol = Column(String)
+    signal_type = Column(String)
+    count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    price_sum = Column(Float, nullable=False, default=0.0)
+    volume_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (UniqueConstraint("day", "exchange", "symbol", "signal_type", name="uq_signal_daily_summary"),)
+
+
+class LogDailySummary(Base):
+    """Log entries counted per day by the retention job before the raw rows are deleted"""
+    __tablename__ = "log_daily_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    bot_id = Column(String)
+    exchange = Column(String)
+    action = Column(String)
+    status = Column(String)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("day", "bot_id", "exchange", "action", "status", name="uq_log_daily_summary"),)
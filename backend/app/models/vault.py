@@ -15,6 +15,10 @@ class Vault(Base):
     max_investment = Column(Float, default=100000.0)
     performance_fee = Column(Float, default=0.2)  # 20% performance fee
     management_fee = Column(Float, default=0.02)  # 2% annual management fee
+    nav_per_share = Column(Float, default=1.0)
+    accrued_management_fee = Column(Float, default=0.0)
+    accrued_performance_fee = Column(Float, default=0.0)
+    last_accrual_at = Column(DateTime(timezone=True))
     strategy_type = Column(String, default="market_making")  # market_making, arbitrage, trend_following
     risk_level = Column(String, default="medium")  # low, medium, high
     is_active = Column(Boolean, default=True)
@@ -47,9 +51,11 @@ class Investment(Base):
     token = Column(String, nullable=False)  # ETH, USDT, etc.
     transaction_hash = Column(String, unique=True, index=True)
     status = Column(String, default="pending")  # pending, confirmed, failed
-    entry_price = Column(Float)
+    entry_price = Column(Float)  # vault nav_per_share at the time of investment
     current_value = Column(Float)
     profit_loss = Column(Float, default=0.0)
+    high_water_mark = Column(Float)
+    accrued_fees = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -66,5 +72,9 @@ class WithdrawalRequest(Base):
     transaction_hash = Column(String, unique=True, index=True)
     processing_fee = Column(Float, default=0.0)
     reason = Column(Text)
+    lease_token = Column(String, index=True)  # set while a worker holds the request
+    lease_expires_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True))
@@ -1,13 +1,20 @@
 import random
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import logging
 import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from .feature_store import feature_store
+from .model_backend import model_runner
 from .redis_service import redis_service
-from ..core.database import get_db
+from .sentiment import sentiment_tracker
+from .signal_metadata import promoted_columns
+from ..core.bulk import copy_rows
+from ..core.db_writer import db_writer
+from ..core.tracing import tracer
 from ..models.signal import Signal
 
 logger = logging.getLogger(__name__)
@@ -21,6 +28,7 @@ class AIService:
     async def initialize(self):
         """Initialize AI models and services"""
         try:
+            await model_runner.start()
             self.model_loaded = True
             
             self.scheduler = AsyncIOScheduler()
@@ -39,93 +47,103 @@ class AIService:
     
     async def _generate_and_save_signal(self):
         """Background task to generate and save signals"""
-        try:
-            symbols = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT"]
-            exchanges = ["binance", "coinbase"]
+        with tracer.span("ai.generate_signals"):
+            try:
+                symbols = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT"]
+                exchanges = ["binance", "coinbase"]
+                
+                # Every symbol goes through the model in one batch
+                signals_data = await self.generate_signals([
+                    (exchange, symbol, None) for symbol in symbols for exchange in exchanges
+                ])
+                
+                rows = [self._to_row(signal_data) for signal_data in signals_data]
+                try:
+                    # One multi-row INSERT ... RETURNING; the ids are needed for publishing and
+                    # are paired with rows by position, which only sort_by_parameter_order guarantees
+                    ids = await db_writer.run(lambda db: db.execute(
+                        insert(Signal.__table__).returning(Signal.__table__.c.id, sort_by_parameter_order=True), rows
+                    ).scalars().all())
+                except Exception as e:
+                    logger.error(f"Failed to save signals to database: {e}")
+                    return
+                
+                await redis_service.publish_batch("new_signals", [
+                    {
+                        "id": signal_id,
+                        "exchange": row["exchange"],
+                        "symbol": row["symbol"],
+                        "signal_type": row["signal_type"],
+                        "confidence": row["confidence"],
+                        "price": row["price"],
+                        "timestamp": row["timestamp"].isoformat()
+                    }
+                    for signal_id, row in zip(ids, rows)
+                ])
+                
+                logger.info(f"Generated and saved {len(rows)} signals")
             
-            for symbol in symbols:
-                for exchange in exchanges:
-                    signal_data = await self.generate_signal(exchange, symbol)
-                    
-                    db = next(get_db())
-                    try:
-                        signal = Signal(
-                            timestamp=datetime.utcnow(),
-                            exchange=signal_data["exchange"],
-                            symbol=signal_data["symbol"],
-                            signal_type=signal_data["signal_type"],
-                            confidence=signal_data["confidence"],
-                            price=signal_data["price"],
-                            volume=signal_data["volume"],
-                            metadata=str(signal_data["metadata"])
-                        )
-                        
-                        db.add(signal)
-                        db.commit()
-                        db.refresh(signal)
-                        
-                        await redis_service.publish_signal("new_signals", {
-                            "id": signal.id,
-                            "exchange": signal.exchange,
-                            "symbol": signal.symbol,
-                            "signal_type": signal.signal_type,
-                            "confidence": signal.confidence,
-                            "timestamp": signal.timestamp.isoformat()
-                        })
-                        
-                        logger.info(f"Generated and saved signal: {signal.signal_type} for {symbol} on {exchange}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to save signal to database: {e}")
-                        db.rollback()
-                    finally:
-                        db.close()
-                        
-        except Exception as e:
-            logger.error(f"Error in background signal generation: {e}")
+            except Exception as e:
+                logger.error(f"Error in background signal generation: {e}")
     
-    async def generate_signal(self, exchange: str = "binance", symbol: str = "BTC/USDT", market_data: Dict = None) -> Dict:
-        """Generate a trading signal using AI analysis"""
+    @staticmethod
+    def _to_row(signal_data: Dict) -> Dict:
+        return {
+            "timestamp": datetime.utcnow(),
+            "exchange": signal_data["exchange"],
+            "symbol": signal_data["symbol"],
+            "signal_type": signal_data["signal_type"],
+            "confidence": signal_data["confidence"],
+            "price": signal_data["price"],
+            "volume": signal_data["volume"],
+            "signal_metadata": signal_data["metadata"],
+            "idempotency_key": None,
+            **promoted_columns(signal_data["metadata"])
+        }
+    
+    async def generate_signals(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Dict]:
+        """Generate trading signals for many (exchange, symbol, market_data) in one model batch"""
         if not self.model_loaded:
             await self.initialize()
         
-        signal_types = ["BUY", "SELL", "HOLD"]
-        confidence_score = random.uniform(0.6, 0.95)
+        features = await feature_store.get_many([(exchange, symbol) for exchange, symbol, _ in requests])
         
-        if market_data:
-            price = market_data.get("price", random.uniform(40000, 60000))
-            volume = market_data.get("volume", random.uniform(1000, 10000))
-        else:
-            price = random.uniform(40000, 60000)
-            volume = random.uniform(1000, 10000)
+        rows = []
+        for exchange, symbol, market_data in requests:
+            market_data = market_data or {}
+            found = features.get((exchange, symbol))
+            rows.append({
+                "exchange": exchange,
+                "symbol": symbol,
+                "price": market_data.get("price", random.uniform(40000, 60000)),
+                "volume": market_data.get("volume", random.uniform(1000, 10000)),
+                "features": found["values"] if found else None,
+            })
         
-        signal = {
-            "exchange": exchange,
-            "symbol": symbol,
-            "signal_type": random.choice(signal_types),
-            "confidence": confidence_score,
-            "price": price,
-            "volume": volume,
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": {
-                "model_version": "v1.0",
-                "indicators": ["RSI", "MACD", "Bollinger Bands"],
-                "market_sentiment": random.choice(["bullish", "bearish", "neutral"]),
-                "volatility": random.uniform(0.1, 0.5)
-            }
-        }
+        predictions = await model_runner.predict(rows)
         
-        logger.info(f"Generated signal: {signal['signal_type']} for {symbol} with confidence {confidence_score:.2f}")
+        timestamp = datetime.utcnow().isoformat()
+        signals = []
+        for row, prediction in zip(rows, predictions):
+            signals.append({
+                **{k: v for k, v in row.items() if k != "features"},
+                "signal_type": prediction["signal_type"],
+                "confidence": prediction["confidence"],
+                "timestamp": timestamp,
+                "metadata": prediction["metadata"]
+            })
+            logger.debug(f"Generated signal: {prediction['signal_type']} for {row['symbol']} with confidence {prediction['confidence']:.2f}")
+        return signals
+    
+    async def generate_signal(self, exchange: str = "binance", symbol: str = "BTC/USDT", market_data: Dict = None) -> Dict:
+        """Generate a trading signal using AI analysis"""
+        signal = (await self.generate_signals([(exchange, symbol, market_data)]))[0]
+        logger.info(f"Generated signal: {signal['signal_type']} for {symbol} with confidence {signal['confidence']:.2f}")
         return signal
     
-    async def analyze_market_sentiment(self, symbols: List[str]) -> Dict:
-        """Analyze overall market sentiment"""
-        return {
-            "overall_sentiment": random.choice(["bullish", "bearish", "neutral"]),
-            "confidence": random.uniform(0.7, 0.9),
-            "fear_greed_index": random.randint(20, 80),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    async def analyze_market_sentiment(self, symbols: List[str], window: str = "1h") -> Dict:
+        """Analyze market sentiment from confidence-weighted signals over a 5m, 1h or 24h window"""
+        return sentiment_tracker.analyze(symbols, window)
     
     async def seed_initial_signals(self, count: int = 100):
         """Seed the database with initial mock signals"""
@@ -133,34 +151,16 @@ class AIService:
             symbols = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT", "SOL/USDT"]
             exchanges = ["binance", "coinbase", "kraken"]
             
-            db = next(get_db())
+            signals_data = await self.generate_signals([
+                (random.choice(exchanges), random.choice(symbols), None) for _ in range(count)
+            ])
+            
+            rows = [self._to_row(signal_data) for signal_data in signals_data]
             try:
-                for i in range(count):
-                    symbol = random.choice(symbols)
-                    exchange = random.choice(exchanges)
-                    signal_data = await self.generate_signal(exchange, symbol)
-                    
-                    signal = Signal(
-                        timestamp=datetime.utcnow(),
-                        exchange=signal_data["exchange"],
-                        symbol=signal_data["symbol"],
-                        signal_type=signal_data["signal_type"],
-                        confidence=signal_data["confidence"],
-                        price=signal_data["price"],
-                        volume=signal_data["volume"],
-                        signal_metadata=str(signal_data["metadata"])
-                    )
-                    
-                    db.add(signal)
-                
-                db.commit()
+                await db_writer.run(lambda db: copy_rows(db, Signal.__table__, rows))
                 logger.info(f"Seeded {count} initial signals successfully")
-                
             except Exception as e:
                 logger.error(f"Failed to seed signals: {e}")
-                db.rollback()
-            finally:
-                db.close()
                 
         except Exception as e:
             logger.error(f"Error in signal seeding: {e}")
@@ -170,6 +170,7 @@ class AIService:
         if self.scheduler:
             self.scheduler.shutdown()
             logger.info("AI Service scheduler shutdown")
+        await model_runner.stop()
 
 
 ai_service = AIService()
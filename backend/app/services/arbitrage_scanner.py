@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .redis_service import redis_service
+from .trade_service import trade_service
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "arbitrage_opportunities"
+
+
+class PriceMatrix:
+    """
+    Fee-adjusted best bid and ask per symbol (rows) and exchange (columns).
+
+    Fees are folded in when a ticker is written, so a scan is a single
+    broadcast division over every buy-exchange x sell-exchange pair.
+    """
+
+    def __init__(self, fees: Dict[str, float], default_fee: float, capacity: int = 256):
+        self.fees = fees
+        self.default_fee = default_fee
+        self.symbols: Dict[str, int] = {}
+        self.exchanges: Dict[str, int] = {}
+        self.symbol_names: List[str] = []
+        self.exchange_names: List[str] = []
+        self.bid = np.full((capacity, 0), np.nan)
+        self.ask = np.full((capacity, 0), np.nan)
+        self.bid_net = np.full((capacity, 0), np.nan)  # what a sale actually yields
+        self.ask_net = np.full((capacity, 0), np.nan)  # what a purchase actually costs
+        self.updated_at = np.zeros((capacity, 0))
+
+    def _grow(self, rows: int, columns: int):
+        for name in ("bid", "ask", "bid_net", "ask_net", "updated_at"):
+            old = getattr(self, name)
+            new = np.full((rows, columns), 0.0 if name == "updated_at" else np.nan)
+            new[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def _index(self, symbol: str, exchange: str) -> Tuple[int, int]:
+        row = self.symbols.get(symbol)
+        column = self.exchanges.get(exchange)
+        if row is not None and column is not None:
+            return row, column
+
+        if row is None:
+            row = self.symbols[symbol] = len(self.symbol_names)
+            self.symbol_names.append(symbol)
+        if column is None:
+            column = self.exchanges[exchange] = len(self.exchange_names)
+            self.exchange_names.append(exchange)
+        rows, columns = self.bid.shape
+        if row >= rows or column >= columns:
+            self._grow(max(rows, 1) * 2 if row >= rows else rows, max(columns, column + 1))
+        return row, column
+
+    def update(self, exchange: str, symbol: str, bid: Optional[float], ask: Optional[float], at: float):
+        row, column = self._index(symbol, exchange)
+        fee = self.fees.get(exchange, self.default_fee)
+        bid = np.nan if not bid else bid
+        ask = np.nan if not ask else ask
+        self.bid[row, column] = bid
+        self.ask[row, column] = ask
+        self.bid_net[row, column] = bid * (1.0 - fee)
+        self.ask_net[row, column] = ask * (1.0 + fee)
+        self.updated_at[row, column] = at
+
+    def scan(self, min_spread: float, max_age: float, now: Optional[float] = None):
+        """
+        Net spread of buying on exchange i and selling on exchange j for every symbol.
+
+        Returns index arrays (symbol, buy exchange, sell exchange) and spreads
+        of the pairs above min_spread. Quotes older than max_age and same-
+        exchange pairs never qualify.
+        """
+        n, e = len(self.symbol_names), len(self.exchange_names)
+        if n == 0 or e < 2:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, empty, np.empty(0)
+
+        now = time.time() if now is None else now
+        fresh = self.updated_at[:n, :e] >= now - max_age
+        bid_net = np.where(fresh, self.bid_net[:n, :e], np.nan)
+        ask_net = np.where(fresh, self.ask_net[:n, :e], np.nan)
+
+        # spread[s, i, j] = bid_net[s, j] / ask_net[s, i] - 1
+        spread = bid_net[:, None, :] / ask_net[:, :, None]
+        spread -= 1.0
+        diagonal = np.arange(e)
+        spread[:, diagonal, diagonal] = np.nan
+
+        with np.errstate(invalid="ignore"):
+            symbol_idx, buy_idx, sell_idx = np.nonzero(spread > min_spread)
+        return symbol_idx, buy_idx, sell_idx, spread[symbol_idx, buy_idx, sell_idx]
+
+
+class ArbitrageScanner:
+    """
+    Cross-exchange arbitrage detection over the TradeService ticker cache.
+
+    Every ticker update marks the matrix dirty and schedules one scan for the
+    next event-loop iteration, so a burst of updates costs a single pass.
+    Opportunities are published to Redis when they appear, not on every scan
+    they persist through.
+    """
+
+    def __init__(self, matrix: Optional[PriceMatrix] = None):
+        self.matrix = matrix or PriceMatrix(settings.arbitrage_fees, settings.arbitrage_default_fee)
+        self.opportunities: List[Dict] = []
+        self.active: Set[Tuple[int, int, int]] = set()
+        self.scheduler = None
+        self._scan_pending = False
+        self.tasks: Set[asyncio.Task] = set()
+        self.stats = {"updates": 0, "scans": 0, "published": 0, "last_scan_ms": 0.0}
+
+    def on_ticker(self, ticker: Dict):
+        self.matrix.update(
+            ticker["exchange"], ticker["symbol"], ticker.get("bid"), ticker.get("ask"),
+            ticker.get("received_at", time.time())
+        )
+        self.stats["updates"] += 1
+        if not self._scan_pending:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.scan()
+                return
+            self._scan_pending = True
+            # Referenced until it finishes; the loop itself only holds a weak reference
+            task = loop.create_task(self._scan_and_publish())
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _scan_and_publish(self):
+        self._scan_pending = False
+        new = self.scan()
+        if new:
+            await redis_service.publish_batch(CHANNEL, new)
+            self.stats["published"] += len(new)
+
+    def scan(self) -> List[Dict]:
+        """Rescan the matrix; returns opportunities that were not present in the previous scan"""
+        start = time.perf_counter()
+        symbol_idx, buy_idx, sell_idx, spreads = self.matrix.scan(
+            settings.arbitrage_min_spread, settings.arbitrage_max_quote_age
+        )
+        self.stats["scans"] += 1
+        self.stats["last_scan_ms"] = (time.perf_counter() - start) * 1000
+
+        matrix = self.matrix
+        opportunities = []
+        active = set()
+        new = []
+        for s, i, j, spread in zip(symbol_idx.tolist(), buy_idx.tolist(), sell_idx.tolist(), spreads.tolist()):
+            opportunity = {
+                "symbol": matrix.symbol_names[s],
+                "buy_exchange": matrix.exchange_names[i],
+                "sell_exchange": matrix.exchange_names[j],
+                "ask": float(matrix.ask[s, i]),
+                "bid": float(matrix.bid[s, j]),
+                "net_spread": spread,
+            }
+            opportunities.append(opportunity)
+            active.add((s, i, j))
+            if (s, i, j) not in self.active:
+                new.append(opportunity)
+
+        opportunities.sort(key=lambda o: o["net_spread"], reverse=True)
+        self.opportunities = opportunities
+        self.active = active
+        return new
+
+    async def poll_tickers(self):
+        """Refresh the ticker cache for the configured symbols on every connected exchange"""
+        await asyncio.gather(*[
+            trade_service.get_market_data(exchange, symbol)
+            for exchange in list(trade_service.exchanges)
+            for symbol in settings.arbitrage_symbols
+        ])
+
+    async def start(self):
+        trade_service.add_ticker_listener(self.on_ticker)
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.poll_tickers,
+            'interval',
+            seconds=settings.arbitrage_poll_seconds,
+            id='arbitrage_ticker_poll',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+        logger.info(f"Arbitrage scanner started for {len(settings.arbitrage_symbols)} symbols")
+
+    async def stop(self):
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+        if self.on_ticker in trade_service.ticker_listeners:
+            trade_service.ticker_listeners.remove(self.on_ticker)
+
+    def get_stats(self) -> Dict:
+        return {
+            "symbols": len(self.matrix.symbol_names),
+            "exchanges": self.matrix.exchange_names,
+            "opportunities": len(self.opportunities),
+            **self.stats,
+        }
+
+
+arbitrage_scanner = ArbitrageScanner()
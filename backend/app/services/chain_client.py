@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+
+
+class ChainClient(ABC):
+    """Access to a blockchain node for confirmation lookups and outgoing transfers"""
+
+    @abstractmethod
+    async def get_transaction_statuses(self, network: str, hashes: List[str]) -> Dict[str, str]:
+        """Return 'pending', 'confirmed' or 'failed' for each known hash; unknown hashes are omitted"""
+
+    @abstractmethod
+    async def prepare_transfer(self, network: str, to_address: str, amount: float, reference: str) -> str:
+        """Build and sign a transfer, returning its hash without broadcasting it"""
+
+    @abstractmethod
+    async def broadcast(self, network: str, tx_hash: str):
+        """Broadcast a prepared transfer; broadcasting an already known hash is a no-op"""
+
+    async def close(self):
+        pass
+
+
+class FakeChainClient(ChainClient):
+    """
+    Local stand-in for a chain node.
+
+    A transaction is first seen when it is queried, confirms `confirm_after`
+    seconds later, and a deterministic fraction of hashes fail instead.
+    """
+
+    def __init__(self, confirm_after: float = 30.0, failure_rate: float = 0.02,
+                 latency: tuple = (0.01, 0.05)):
+        self.confirm_after = confirm_after
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.first_seen: Dict[str, float] = {}
+        self.prepared: Dict[str, tuple] = {}
+        self.broadcasts = 0
+        self.calls = 0
+
+    def _fails(self, tx_hash: str) -> bool:
+        digest = hashlib.sha256(tx_hash.encode()).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 < self.failure_rate
+
+    async def get_transaction_statuses(self, network: str, hashes: List[str]) -> Dict[str, str]:
+        self.calls += 1
+        await asyncio.sleep(random.uniform(*self.latency))
+
+        now = time.monotonic()
+        statuses = {}
+        for tx_hash in hashes:
+            seen = self.first_seen.setdefault(tx_hash, now)
+            if now - seen < self.confirm_after:
+                statuses[tx_hash] = "pending"
+            elif self._fails(tx_hash):
+                statuses[tx_hash] = "failed"
+            else:
+                statuses[tx_hash] = "confirmed"
+        return statuses
+
+    async def prepare_transfer(self, network: str, to_address: str, amount: float, reference: str) -> str:
+        tx_hash = "0x" + hashlib.sha256(f"{network}:{to_address}:{amount}:{reference}".encode()).hexdigest()
+        self.prepared[tx_hash] = (network, to_address, amount)
+        return tx_hash
+
+    async def broadcast(self, network: str, tx_hash: str):
+        await asyncio.sleep(random.uniform(*self.latency))
+        if tx_hash not in self.first_seen:
+            self.broadcasts += 1
+            self.first_seen[tx_hash] = time.monotonic()
+
+
+def create_chain_client(name: Optional[str] = None) -> ChainClient:
+    name = name or settings.chain_client
+    if name == "fake":
+        return FakeChainClient(confirm_after=settings.fake_chain_confirm_seconds)
+    raise ValueError(f"Unknown chain client: {name}")
@@ -0,0 +1,286 @@
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import ccxt
+
+from ..core.config import settings
+from ..core.metrics import histogram
+
+# Starting mid prices; unknown symbols start at 100 quote units
+BASE_PRICES = {"BTC/USDT": 50000.0, "ETH/USDT": 3000.0, "BNB/USDT": 400.0, "ADA/USDT": 0.5, "SOL/USDT": 100.0}
+SPREAD_BPS = 2.0
+TAKER_FEE = 0.001
+Z_99 = 2.326
+
+
+class LatencyModel:
+    """Lognormal round-trip latency fitted to a median and a 99th percentile"""
+
+    def __init__(self, median_ms: float, p99_ms: float, rng: random.Random):
+        self.enabled = median_ms > 0
+        self.mu = math.log(max(median_ms, 1e-3) / 1000)
+        self.sigma = math.log(max(p99_ms, median_ms, 1e-3) / max(median_ms, 1e-3)) / Z_99
+        self.rng = rng
+
+    def sample(self) -> float:
+        return self.rng.lognormvariate(self.mu, self.sigma) if self.enabled else 0.0
+
+
+class SimulatedExchange:
+    """
+    In-process exchange with the async ccxt client interface TradeService uses.
+
+    fetch_ticker, create_order, fetch_order, cancel_order and fetch_balance
+    return ccxt's unified structures and raise ccxt's exception types, so the
+    live code path runs unchanged against it. Prices follow a random walk per
+    symbol; market orders fill at once against the simulated spread, and
+    limit orders rest until the price crosses them. Every call waits a sampled
+    latency and is subject to a token-bucket rate limit (RateLimitExceeded,
+    like an HTTP 429) and to an error rate. Half of the errors happen before
+    the request is processed (NetworkError) and half after, with the response
+    lost (RequestTimeout), so clients must retry with a clientOrderId, which
+    the simulator deduplicates like a real exchange.
+    """
+
+    def __init__(self, exchange_id: str, latency_ms: Optional[Tuple[float, float]] = None,
+                 error_rate: Optional[float] = None, rate_limit: Optional[Tuple[float, float]] = None,
+                 balances: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.id = exchange_id
+        self.rng = random.Random(seed)
+        median_ms, p99_ms = latency_ms or settings.simulator_latency_ms
+        self.latency = LatencyModel(median_ms, p99_ms, self.rng)
+        self.error_rate = settings.simulator_error_rate if error_rate is None else error_rate
+        self.rate, self.burst = rate_limit or settings.simulator_rate_limit
+        self.tokens = self.burst
+        self.refilled = time.monotonic()
+        self.free = dict(balances or settings.simulator_balances)
+        self.used: Dict[str, float] = {}
+        # Each exchange quotes slightly off the others, as real venues do
+        self.offset = 1 + self.rng.uniform(-0.001, 0.001)
+        self.prices: Dict[str, Tuple[float, float]] = {}
+        self.orders: Dict[str, Dict] = {}
+        self.client_order_ids: Dict[str, str] = {}
+        self.order_counter = 0
+        self.response_time = histogram(f"simulator_{exchange_id}")
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "lost_responses": 0, "orders": 0, "fills": 0}
+
+    # -- transport ---------------------------------------------------------
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    async def _call(self, handler, *args):
+        self.stats["requests"] += 1
+        start = time.perf_counter()
+        delay = self.latency.sample()
+        try:
+            if not self._take_token():
+                self.stats["rate_limited"] += 1
+                await asyncio.sleep(delay / 2)
+                raise ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests")
+            await asyncio.sleep(delay / 2)
+            if self.rng.random() < self.error_rate / 2:
+                self.stats["errors"] += 1
+                raise ccxt.NetworkError(f"{self.id} connection reset by peer")
+            result = handler(*args)
+            await asyncio.sleep(delay / 2)
+            if self.rng.random() < self.error_rate / 2:
+                self.stats["lost_responses"] += 1
+                raise ccxt.RequestTimeout(f"{self.id} request timed out")
+            return result
+        finally:
+            self.response_time.record(time.perf_counter() - start)
+
+    # -- market ------------------------------------------------------------
+
+    def _mid(self, symbol: str) -> float:
+        now = time.monotonic()
+        price, updated = self.prices.get(symbol, (BASE_PRICES.get(symbol, 100.0) * self.offset, now))
+        elapsed = now - updated
+        if elapsed > 0:
+            price *= math.exp(settings.simulator_volatility * math.sqrt(elapsed) * self.rng.gauss(0, 1))
+        self.prices[symbol] = (price, now)
+        return price
+
+    def _quote(self, symbol: str) -> Tuple[float, float]:
+        mid = self._mid(symbol)
+        half_spread = mid * SPREAD_BPS / 20000
+        return mid - half_spread, mid + half_spread
+
+    def _ticker(self, symbol: str) -> Dict:
+        bid, ask = self._quote(symbol)
+        now = time.time()
+        return {
+            "symbol": symbol,
+            "timestamp": int(now * 1000),
+            "datetime": _iso(now),
+            "bid": bid,
+            "ask": ask,
+            "last": (bid + ask) / 2,
+            "baseVolume": self.rng.uniform(1000, 10000),
+            "info": {},
+        }
+
+    # -- orders ------------------------------------------------------------
+
+    def _create(self, symbol: str, order_type: str, side: str, amount: float, price: Optional[float], params: Dict) -> Dict:
+        client_order_id = params.get("clientOrderId")
+        if client_order_id and client_order_id in self.client_order_ids:
+            return _public(self.orders[self.client_order_ids[client_order_id]])
+        if side not in ("buy", "sell") or order_type not in ("market", "limit"):
+            raise ccxt.InvalidOrder(f"{self.id} unsupported {order_type} {side} order")
+        if amount <= 0 or (order_type == "limit" and not price):
+            raise ccxt.InvalidOrder(f"{self.id} invalid amount or price")
+
+        base, quote = symbol.split("/")
+        bid, ask = self._quote(symbol)
+        reference = price if order_type == "limit" else (ask if side == "buy" else bid)
+        # Buys lock the quote they can cost at worst: price, taker fee and slippage
+        margin = 1 + TAKER_FEE + settings.simulator_slippage_bps / 10000
+        currency, needed = (quote, amount * reference * margin) if side == "buy" else (base, amount)
+        if self.free.get(currency, 0.0) < needed:
+            raise ccxt.InsufficientFunds(f"{self.id} insufficient {currency} balance")
+
+        self.order_counter += 1
+        now = time.time()
+        order = {
+            "id": f"{self.id}-{self.order_counter}",
+            "clientOrderId": client_order_id,
+            "timestamp": int(now * 1000),
+            "datetime": _iso(now),
+            "lastTradeTimestamp": None,
+            "symbol": symbol,
+            "type": order_type,
+            "side": side,
+            "price": price,
+            "average": None,
+            "amount": amount,
+            "filled": 0.0,
+            "remaining": amount,
+            "cost": 0.0,
+            "status": "open",
+            "fee": {"currency": quote, "cost": 0.0},
+            "trades": [],
+            "info": {},
+        }
+        self.orders[order["id"]] = order
+        if client_order_id:
+            self.client_order_ids[client_order_id] = order["id"]
+        self.stats["orders"] += 1
+        self._move(currency, needed, to_used=True)
+        order["locked"] = (currency, needed)
+        self._match(order, bid, ask)
+        return _public(order)
+
+    def _move(self, currency: str, amount: float, to_used: bool):
+        source, target = (self.free, self.used) if to_used else (self.used, self.free)
+        source[currency] = source.get(currency, 0.0) - amount
+        target[currency] = target.get(currency, 0.0) + amount
+
+    def _match(self, order: Dict, bid: float, ask: float):
+        """Fill an open order completely if it is marketable at the current quote"""
+        side, price = order["side"], order["price"]
+        if order["type"] == "limit" and ((side == "buy" and price < ask) or (side == "sell" and price > bid)):
+            return
+        slippage = settings.simulator_slippage_bps / 10000
+        fill_price = ask * (1 + slippage) if side == "buy" else bid * (1 - slippage)
+        if order["type"] == "limit":
+            fill_price = min(fill_price, price) if side == "buy" else max(fill_price, price)
+
+        base, quote = order["symbol"].split("/")
+        amount = order["remaining"]
+        cost = amount * fill_price
+        fee = cost * TAKER_FEE
+        currency, locked = order.pop("locked")
+        self.used[currency] = self.used.get(currency, 0.0) - locked
+        if side == "buy":
+            self.free[quote] = self.free.get(quote, 0.0) + locked - cost - fee
+            self.free[base] = self.free.get(base, 0.0) + amount
+        else:
+            self.free[base] = self.free.get(base, 0.0) + locked - amount
+            self.free[quote] = self.free.get(quote, 0.0) + cost - fee
+
+        order.update({
+            "status": "closed",
+            "filled": order["amount"],
+            "remaining": 0.0,
+            "cost": order["cost"] + cost,
+            "average": fill_price,
+            "lastTradeTimestamp": int(time.time() * 1000),
+            "fee": {"currency": quote, "cost": order["fee"]["cost"] + fee},
+        })
+        self.stats["fills"] += 1
+
+    def _get(self, order_id: str) -> Dict:
+        order = self.orders.get(order_id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"{self.id} order {order_id} not found")
+        return order
+
+    def _fetch(self, order_id: Optional[str], client_order_id: Optional[str] = None) -> Dict:
+        if order_id is None and client_order_id in self.client_order_ids:
+            order_id = self.client_order_ids[client_order_id]
+        order = self._get(order_id or client_order_id)
+        if order["status"] == "open":
+            self._match(order, *self._quote(order["symbol"]))
+        return _public(order)
+
+    def _cancel(self, order_id: str) -> Dict:
+        order = self._get(order_id)
+        if order["status"] != "open":
+            raise ccxt.OrderNotFound(f"{self.id} order {order_id} is {order['status']}")
+        currency, locked = order.pop("locked")
+        self._move(currency, locked, to_used=False)
+        order["status"] = "canceled"
+        return _public(order)
+
+    def _balance(self) -> Dict:
+        balance = {"free": {}, "used": {}, "total": {}, "info": {}}
+        for currency in sorted(set(self.free) | set(self.used)):
+            free, used = self.free.get(currency, 0.0), self.used.get(currency, 0.0)
+            balance[currency] = {"free": free, "used": used, "total": free + used}
+            balance["free"][currency], balance["used"][currency], balance["total"][currency] = free, used, free + used
+        return balance
+
+    # -- ccxt interface ----------------------------------------------------
+
+    async def fetch_ticker(self, symbol: str, params: Optional[Dict] = None) -> Dict:
+        return await self._call(self._ticker, symbol)
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: Optional[float] = None, params: Optional[Dict] = None) -> Dict:
+        return await self._call(self._create, symbol, type, side, amount, price, params or {})
+
+    async def fetch_order(self, id: str, symbol: Optional[str] = None, params: Optional[Dict] = None) -> Dict:
+        return await self._call(self._fetch, id, (params or {}).get("clientOrderId"))
+
+    async def cancel_order(self, id: str, symbol: Optional[str] = None, params: Optional[Dict] = None) -> Dict:
+        return await self._call(self._cancel, id)
+
+    async def fetch_balance(self, params: Optional[Dict] = None) -> Dict:
+        return await self._call(self._balance)
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "open_orders": sum(1 for o in self.orders.values() if o["status"] == "open"),
+                "response_time": self.response_time.snapshot()}
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _public(order: Dict) -> Dict:
+    return {key: value for key, value in order.items() if key != "locked"}
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .redis_service import CONNECTION_ERRORS, redis_service
+from .trade_service import trade_service
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.metrics import histogram
+from ..core.tracing import tracer
+from ..models.strategy import Strategy
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "new_signals"
+SIDES = {"BUY": "buy", "SELL": "sell"}
+SEEN_SIGNALS_MAX = 10000
+CLAIM_KEY = "exec:signal:{}"
+
+
+def position_size(config: Dict, confidence: float, price: float) -> float:
+    """
+    Base amount for a signal: the strategy's notional, scaled linearly from
+    half at its confidence threshold to the full notional at confidence 1.
+    """
+    if not price or price <= 0:
+        return 0.0
+    threshold = config["min_confidence"]
+    headroom = (confidence - threshold) / (1.0 - threshold) if threshold < 1.0 else 1.0
+    scale = 0.5 + 0.5 * min(1.0, max(0.0, headroom))
+    return config["notional"] * scale / price
+
+
+def _signal_time(signal: Dict) -> Optional[float]:
+    timestamp = signal.get("timestamp")
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class ExecutionPipeline:
+    """
+    Turns published signals into orders for active auto-executing strategies.
+
+    A strategy opts in through its JSON config, e.g.
+    {"auto_execute": true, "min_confidence": 0.8, "exchange": "binance", "notional": 250}.
+    Orders bound for the same exchange are collected for
+    `execution_batch_window_ms` (or until `execution_batch_max` are queued)
+    and handed to TradeService together. Latency from the signal's timestamp
+    to order placement is recorded in the signal_to_order histogram.
+
+    Every worker subscribes to new_signals, so each signal is claimed with
+    SET NX on exec:signal:<id> before it is acted on: only the worker that
+    wins the claim places its orders. If Redis cannot be reached the signal
+    is executed anyway, deduplicated only against the ids this worker saw.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.strategies: Dict[str, List[Dict]] = {}
+        self.queues: Dict[str, List[Tuple[Dict, Optional[float], float]]] = defaultdict(list)
+        self.flush_timers: Dict[str, asyncio.Task] = {}
+        self.seen: "OrderedDict[int, None]" = OrderedDict()
+        self.scheduler = None
+        self._consumer: Optional[asyncio.Task] = None
+        self.end_to_end = histogram("signal_to_order")
+        self.in_pipeline = histogram("execution_pipeline")
+        self.stats = {"signals": 0, "duplicates": 0, "claimed_elsewhere": 0, "orders": 0, "failed": 0,
+                      "batches": 0, "redis_errors": 0}
+
+    def load_strategies(self):
+        """Reload active strategies that opted into auto-execution, grouped by market"""
+        db = self.session_factory()
+        try:
+            rows = db.query(Strategy).filter(Strategy.state == "active").all()
+        finally:
+            db.close()
+
+        strategies = defaultdict(list)
+        for strategy in rows:
+            try:
+                config = json.loads(strategy.config) if strategy.config else {}
+            except ValueError:
+                logger.warning(f"Strategy {strategy.id} has invalid config JSON, skipping")
+                continue
+            if not isinstance(config, dict) or not config.get("auto_execute"):
+                continue
+            strategies[strategy.market].append({
+                "strategy_id": strategy.id,
+                "user_id": strategy.user_id,
+                "exchange": config.get("exchange"),
+                "min_confidence": float(config.get("min_confidence", settings.execution_min_confidence)),
+                "notional": float(config.get("notional", settings.execution_default_notional)),
+            })
+        self.strategies = dict(strategies)
+
+    def orders_for(self, signal: Dict) -> List[Dict]:
+        side = SIDES.get(str(signal.get("signal_type", "")).upper())
+        if side is None:
+            return []
+        confidence = float(signal.get("confidence") or 0.0)
+        price = signal.get("price")
+        if price is None:
+            ticker = trade_service.tickers.get((signal["exchange"], signal["symbol"]))
+            price = ticker["price"] if ticker else None
+
+        orders = []
+        for config in self.strategies.get(signal.get("symbol"), ()):
+            if config["exchange"] and config["exchange"] != signal.get("exchange"):
+                continue
+            if confidence < config["min_confidence"]:
+                continue
+            amount = position_size(config, confidence, price)
+            if amount <= 0:
+                continue
+            orders.append({
+                "exchange": signal["exchange"],
+                "symbol": signal["symbol"],
+                "side": side,
+                "amount": amount,
+                "strategy_id": config["strategy_id"],
+                "user_id": config["user_id"],
+                "signal_id": signal.get("id"),
+            })
+        return orders
+
+    async def submit(self, signal: Dict):
+        """Entry point for one signal, from the Redis subscription or in-process callers"""
+        # Continues the trace the signal was published under; a batch flush scheduled here joins it too
+        with tracer.span("execution.signal", parent=tracer.extract(signal), root=False, signal_id=signal.get("id")):
+            received_at = time.perf_counter()
+            signal_id = signal.get("id")
+            if signal_id is not None:
+                if signal_id in self.seen:
+                    self.stats["duplicates"] += 1
+                    return
+                self.seen[signal_id] = None
+                if len(self.seen) > SEEN_SIGNALS_MAX:
+                    self.seen.popitem(last=False)
+                if not await self._claim(signal_id):
+                    self.stats["claimed_elsewhere"] += 1
+                    return
+            self.stats["signals"] += 1
+
+            signal_time = _signal_time(signal)
+            for order in self.orders_for(signal):
+                self._enqueue(order, signal_time, received_at)
+
+    async def _claim(self, signal_id) -> bool:
+        """Whether this worker is the one to execute the signal"""
+        client = redis_service.redis_client
+        if client is None:
+            return True
+        try:
+            return bool(await client.set(CLAIM_KEY.format(signal_id), 1, nx=True, ex=settings.execution_claim_ttl))
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            if isinstance(e, CONNECTION_ERRORS):
+                redis_service.mark_down(e)
+            else:
+                logger.error(f"Failed to claim signal {signal_id}: {e}")
+            return True
+
+    def _enqueue(self, order: Dict, signal_time: Optional[float], received_at: float):
+        exchange = order["exchange"]
+        queue = self.queues[exchange]
+        queue.append((order, signal_time, received_at))
+
+        if len(queue) >= settings.execution_batch_max:
+            timer = self.flush_timers.pop(exchange, None)
+            if timer:
+                timer.cancel()
+            asyncio.get_running_loop().create_task(self._flush(exchange))
+        elif exchange not in self.flush_timers:
+            self.flush_timers[exchange] = asyncio.get_running_loop().create_task(self._flush_later(exchange))
+
+    async def _flush_later(self, exchange: str):
+        await asyncio.sleep(settings.execution_batch_window_ms / 1000)
+        self.flush_timers.pop(exchange, None)
+        await self._flush(exchange)
+
+    async def _flush(self, exchange: str):
+        batch = self.queues.pop(exchange, None)
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        try:
+            with tracer.span("execution.batch", root=False, exchange=exchange, orders=len(batch)):
+                results = await trade_service.place_orders(exchange, [order for order, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Failed to place batch of {len(batch)} orders on {exchange}: {e}")
+            self.stats["failed"] += len(batch)
+            return
+
+        now, perf_now = time.time(), time.perf_counter()
+        for (order, signal_time, received_at), result in zip(batch, results):
+            if not result.get("success"):
+                self.stats["failed"] += 1
+                logger.warning(f"Auto-execution order for strategy {order['strategy_id']} rejected: {result.get('message')}")
+                continue
+            self.stats["orders"] += 1
+            self.in_pipeline.record(perf_now - received_at)
+            if signal_time is not None:
+                self.end_to_end.record(now - signal_time)
+
+    async def _consume(self):
+        """Follow new_signals, resubscribing whenever the subscription is lost"""
+        while True:
+            pubsub = await redis_service.subscribe_to_signals(CHANNEL)
+            if pubsub is None:
+                await asyncio.sleep(settings.redis_reconnect_min_delay)
+                continue
+            try:
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        await self.submit(json.loads(message["data"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"Skipping malformed signal message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Signal subscription failed, resubscribing: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def start(self):
+        self.load_strategies()
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.load_strategies,
+            'interval',
+            seconds=settings.execution_strategy_refresh_seconds,
+            id='execution_strategy_refresh',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+        self._consumer = asyncio.create_task(self._consume())
+        logger.info(f"Execution pipeline started for {sum(len(s) for s in self.strategies.values())} strategies")
+
+    async def stop(self):
+        if self._consumer:
+            self._consumer.cancel()
+            self._consumer = None
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+        for exchange in list(self.queues):
+            timer = self.flush_timers.pop(exchange, None)
+            if timer:
+                timer.cancel()
+            await self._flush(exchange)
+
+    def get_stats(self) -> Dict:
+        return {
+            "strategies": sum(len(s) for s in self.strategies.values()),
+            "queued": sum(len(q) for q in self.queues.values()),
+            **self.stats,
+            "signal_to_order": self.end_to_end.snapshot(),
+            "execution_pipeline": self.in_pipeline.snapshot(),
+        }
+
+
+execution_pipeline = ExecutionPipeline()
@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .redis_service import redis_service
+from .trade_service import trade_service
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.db_writer import db_writer
+from ..models.feature import FeatureValue
+
+logger = logging.getLogger(__name__)
+
+features = FeatureValue.__table__
+
+REDIS_PREFIX = "features:"
+
+Key = Tuple[str, str]  # (exchange, symbol)
+
+
+class FeatureSet:
+    """
+    A named, versioned function from recent bar closes to feature values.
+
+    Bump `version` whenever `compute` changes: values are stored and looked up
+    per version, so a model never mixes features from two definitions.
+    `compute` receives up to `window` + 1 closing prices and volumes, oldest
+    first, and at least two of each.
+    """
+
+    def __init__(self, name: str, version: int, window: int,
+                 compute: Callable[[np.ndarray, np.ndarray], Dict[str, float]]):
+        self.name = name
+        self.version = version
+        self.window = window
+        self.compute = compute
+
+
+def market_features(prices: np.ndarray, volumes: np.ndarray) -> Dict[str, float]:
+    log_returns = np.diff(np.log(prices))
+    volume_mean = volumes.mean()
+    volume_std = volumes.std()
+    return {
+        "return_1": float(log_returns[-1]),
+        "return_window": float(np.log(prices[-1] / prices[0])),
+        "volatility": float(log_returns.std()),
+        "sma_ratio": float(prices[-1] / prices.mean() - 1.0),
+        "volume_mean": float(volume_mean),
+        "volume_zscore": float((volumes[-1] - volume_mean) / volume_std) if volume_std > 0 else 0.0,
+    }
+
+
+FEATURE_SETS: Dict[str, FeatureSet] = {}
+
+
+def register(feature_set: FeatureSet) -> FeatureSet:
+    FEATURE_SETS[feature_set.name] = feature_set
+    return feature_set
+
+
+register(FeatureSet("market", 1, 60, market_features))
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class _Series:
+    """Closing price and volume of the most recent bars of one symbol"""
+
+    __slots__ = ("bar", "price", "volume", "prices", "volumes")
+
+    def __init__(self, bar: int, size: int):
+        self.bar = bar
+        self.price = 0.0
+        self.volume = 0.0
+        self.prices: Deque[float] = deque(maxlen=size)
+        self.volumes: Deque[float] = deque(maxlen=size)
+
+
+class FeatureStore:
+    """
+    Computes every registered feature set once per (exchange, symbol, bar) and serves batched lookups.
+
+    Tickers are bucketed into bars of `feature_interval_seconds` by their own
+    timestamp (the recorded time for replayed data), so a live run and a
+    replay of the same data produce identical values. When a bar closes,
+    each feature set is computed from the closes so far and stored in three
+    tiers: the last `feature_hot_window` bars in memory, the latest value per
+    symbol in a Redis hash shared by every worker, and the full history in
+    the feature_values table. Redis and the table are written in batches
+    every `feature_flush_seconds`.
+    """
+
+    def __init__(self, interval: Optional[int] = None, hot_window: Optional[int] = None, session_factory=SessionLocal):
+        self.interval = interval or settings.feature_interval_seconds
+        self.hot_window = hot_window or settings.feature_hot_window
+        self.session_factory = session_factory
+        self.series: Dict[Key, _Series] = {}
+        self.hot: Dict[Tuple[str, str, str], Deque[Tuple[float, Dict]]] = {}  # (feature set, exchange, symbol)
+        self.pending: List[Dict] = []
+        self.pending_redis: Dict[str, Dict[str, str]] = {}  # Redis hash -> field -> latest value
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"bars": 0, "computed": 0, "stored": 0, "errors": 0,
+                      "hot_hits": 0, "redis_hits": 0, "history_hits": 0, "misses": 0}
+
+    def on_ticker(self, ticker: Dict):
+        price = ticker.get("price")
+        if not price or price <= 0:
+            return
+        timestamp = ticker.get("recorded_at") or ticker.get("received_at") or time.time()
+        bar = int(timestamp // self.interval)
+        key = (ticker["exchange"], ticker["symbol"])
+
+        series = self.series.get(key)
+        if series is None:
+            size = max(feature_set.window for feature_set in FEATURE_SETS.values()) + 1
+            series = self.series[key] = _Series(bar, size)
+        elif bar > series.bar:
+            self._close_bar(key, series)
+            series.bar = bar
+        elif bar < series.bar:
+            return  # late tick for a bar that is already closed
+        series.price = price
+        series.volume = ticker.get("volume") or 0.0
+
+    def _close_bar(self, key: Key, series: _Series):
+        series.prices.append(series.price)
+        series.volumes.append(series.volume)
+        self.stats["bars"] += 1
+        if len(series.prices) < 2:
+            return
+        timestamp = float((series.bar + 1) * self.interval)
+        prices = np.fromiter(series.prices, dtype=float, count=len(series.prices))
+        volumes = np.fromiter(series.volumes, dtype=float, count=len(series.volumes))
+        for feature_set in FEATURE_SETS.values():
+            size = feature_set.window + 1
+            try:
+                values = feature_set.compute(prices[-size:], volumes[-size:])
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Feature set {feature_set.name} failed for {key}: {e}")
+                continue
+            self._store(feature_set, key, timestamp, values)
+
+    def _store(self, feature_set: FeatureSet, key: Key, timestamp: float, values: Dict):
+        exchange, symbol = key
+        hot_key = (feature_set.name, exchange, symbol)
+        window = self.hot.get(hot_key)
+        if window is None:
+            window = self.hot[hot_key] = deque(maxlen=self.hot_window)
+        window.append((timestamp, values))
+
+        self.pending.append({
+            "feature_set": feature_set.name, "version": feature_set.version, "exchange": exchange,
+            "symbol": symbol, "timestamp": _to_datetime(timestamp), "data": values,
+        })
+        redis_key = f"{REDIS_PREFIX}{feature_set.name}:v{feature_set.version}"
+        self.pending_redis.setdefault(redis_key, {})[f"{exchange}|{symbol}"] = json.dumps(
+            {"timestamp": timestamp, "values": values}
+        )
+        self.stats["computed"] += 1
+
+    def _hot_lookup(self, name: str, key: Key, at: Optional[float]) -> Optional[Dict]:
+        window = self.hot.get((name, *key))
+        if not window:
+            return None
+        if at is None:
+            timestamp, values = window[-1]
+            return {"timestamp": timestamp, "values": values}
+        if window[0][0] > at:
+            return None  # older than the hot window; only the history has it
+        for timestamp, values in reversed(window):
+            if timestamp <= at:
+                return {"timestamp": timestamp, "values": values}
+        return None
+
+    async def get_many(self, keys: Iterable[Key], feature_set: str = "market", at: Optional[float] = None,
+                       version: Optional[int] = None) -> Dict[Key, Optional[Dict]]:
+        """
+        Latest values of one feature set for many symbols, as of `at` (epoch seconds) or now.
+
+        Each result is {"timestamp", "values"} or None. Keys are served from
+        memory first; the rest cost at most one Redis round trip (latest only)
+        and one database query together.
+        """
+        definition = FEATURE_SETS[feature_set]
+        version = version or definition.version
+        results: Dict[Key, Optional[Dict]] = {}
+        misses: List[Key] = []
+        for key in dict.fromkeys(keys):
+            found = self._hot_lookup(feature_set, key, at) if version == definition.version else None
+            results[key] = found
+            if found is None:
+                misses.append(key)
+        self.stats["hot_hits"] += len(results) - len(misses)
+
+        client = redis_service.redis_client
+        if misses and at is None and client is not None:
+            try:
+                cached = await client.hmget(f"{REDIS_PREFIX}{feature_set}:v{version}", [f"{e}|{s}" for e, s in misses])
+                found = {key: json.loads(value) for key, value in zip(misses, cached) if value is not None}
+                results.update(found)
+                misses = [key for key in misses if key not in found]
+                self.stats["redis_hits"] += len(found)
+            except Exception as e:
+                logger.warning(f"Feature lookup in Redis failed: {e}")
+
+        if misses:
+            try:
+                found = await asyncio.to_thread(self._history_lookup, feature_set, version, misses, at)
+            except Exception as e:
+                logger.error(f"Feature history lookup failed: {e}")
+                found = {}
+            results.update(found)
+            self.stats["history_hits"] += len(found)
+            self.stats["misses"] += len(misses) - len(found)
+        return results
+
+    def _history_lookup(self, name: str, version: int, keys: List[Key], at: Optional[float]) -> Dict[Key, Dict]:
+        conditions = [
+            features.c.feature_set == name,
+            features.c.version == version,
+            tuple_(features.c.exchange, features.c.symbol).in_(keys),
+        ]
+        if at is not None:
+            conditions.append(features.c.timestamp <= _to_datetime(at))
+        latest = (
+            select(features.c.exchange, features.c.symbol, func.max(features.c.timestamp).label("timestamp"))
+            .where(*conditions)
+            .group_by(features.c.exchange, features.c.symbol)
+            .subquery()
+        )
+        query = (
+            select(features.c.exchange, features.c.symbol, features.c.timestamp, features.c.data)
+            .join(latest, and_(
+                features.c.exchange == latest.c.exchange,
+                features.c.symbol == latest.c.symbol,
+                features.c.timestamp == latest.c.timestamp,
+            ))
+            .where(features.c.feature_set == name, features.c.version == version)
+        )
+        db = self.session_factory()
+        try:
+            return {
+                (row.exchange, row.symbol): {"timestamp": _to_epoch(row.timestamp), "values": row.data}
+                for row in db.execute(query)
+            }
+        finally:
+            db.close()
+
+    def history(self, exchange: str, symbol: str, feature_set: str = "market", start: Optional[float] = None,
+                end: Optional[float] = None, version: Optional[int] = None) -> List[Dict]:
+        """Stored values for one symbol in [start, end), oldest first, e.g. for a backtest"""
+        version = version or FEATURE_SETS[feature_set].version
+        query = select(features.c.timestamp, features.c.data).where(
+            features.c.feature_set == feature_set,
+            features.c.version == version,
+            features.c.exchange == exchange,
+            features.c.symbol == symbol,
+        )
+        if start is not None:
+            query = query.where(features.c.timestamp >= _to_datetime(start))
+        if end is not None:
+            query = query.where(features.c.timestamp < _to_datetime(end))
+        db = self.session_factory()
+        try:
+            return [
+                {"timestamp": _to_epoch(row.timestamp), "values": row.data}
+                for row in db.execute(query.order_by(features.c.timestamp))
+            ]
+        finally:
+            db.close()
+
+    def _insert(self, db, rows: List[Dict]):
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Every worker computes the same bars; the first write wins
+            statement = (postgresql if dialect == "postgresql" else sqlite).insert(features)
+            db.execute(statement.on_conflict_do_nothing(), rows)
+        else:
+            db.execute(insert(features), rows)
+
+    async def write(self, rows: List[Dict]):
+        await db_writer.run(lambda db: self._insert(db, rows), session_factory=self.session_factory)
+
+    async def flush(self) -> int:
+        rows, self.pending = self.pending, []
+        redis_updates, self.pending_redis = self.pending_redis, {}
+
+        client = redis_service.redis_client
+        if redis_updates and client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for redis_key, fields in redis_updates.items():
+                        pipe.hset(redis_key, mapping=fields)
+                    await pipe.execute()
+            except Exception as e:
+                # Dropped rather than retried: the next bar overwrites these values anyway
+                logger.warning(f"Failed to publish latest features to Redis: {e}")
+
+        if not rows:
+            return 0
+        try:
+            await self.write(rows)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to persist {len(rows)} feature rows, will retry: {e}")
+            self.pending = rows + self.pending
+            return 0
+        self.stats["stored"] += len(rows)
+        return len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.feature_flush_seconds)
+            await self.flush()
+
+    async def start(self):
+        trade_service.add_ticker_listener(self.on_ticker)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.on_ticker in trade_service.ticker_listeners:
+            trade_service.ticker_listeners.remove(self.on_ticker)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            "feature_sets": {name: definition.version for name, definition in FEATURE_SETS.items()},
+            "symbols": len(self.series),
+            "pending": len(self.pending),
+            **self.stats,
+        }
+
+
+feature_store = FeatureStore()
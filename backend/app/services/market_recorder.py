@@ -0,0 +1,325 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .trade_service import trade_service
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CBMD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, record count
+HEADER_SIZE = 16
+
+TICKER = 1
+ORDER_UPDATE = 2
+
+# timestamp, kind, exchange, symbol, ref, aux, then four values:
+#   ticker:       ref/aux unused;          bid, ask, last, volume
+#   order update: ref = order id, aux = status;  filled, remaining, cost, unused
+RECORD = struct.Struct("<dBxHIII4d")
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"), ("kind", "u1"), ("pad", "u1"), ("exchange", "<u2"), ("symbol", "<u4"),
+    ("ref", "<u4"), ("aux", "<u4"), ("values", "<f8", (4,)),
+])
+assert RECORD.size == RECORD_DTYPE.itemsize == 56
+
+STRINGS_FILE = "strings.jsonl"
+
+
+def _number(value) -> float:
+    return float(value) if value is not None else float("nan")
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+class StringTable:
+    """Append-only string interning shared by every segment in a directory"""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, STRINGS_FILE)
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+        self._file = None
+
+    def _add(self, value: str) -> int:
+        self.ids[value] = len(self.strings)
+        self.strings.append(value)
+        return self.ids[value]
+
+    def intern(self, value: Optional[str]) -> int:
+        value = value or ""
+        string_id = self.ids.get(value)
+        if string_id is not None:
+            return string_id
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        # Written before any record refers to it, so a reader never sees a dangling id
+        self._file.write(json.dumps(value) + "\n")
+        self._file.flush()
+        return self._add(value)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class MarketRecorder:
+    """
+    Appends ticker and order-update events to fixed-width, memory-mapped segment files.
+
+    Each segment is preallocated for `segment_records` records of 56 bytes
+    and mapped once; an append is a struct pack into the mapping plus a
+    header count update, with no system call. Strings (exchanges, symbols,
+    order ids, statuses) are interned into a shared table so records stay
+    fixed-width. A full segment is flushed and the next one started.
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_records: Optional[int] = None):
+        self.directory = directory or settings.market_recorder_dir
+        self.segment_records = segment_records or settings.market_recorder_segment_records
+        self.strings: Optional[StringTable] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._segment = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "segments": 0}
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.strings = StringTable(self.directory)
+        existing = segment_paths(self.directory)
+        self._segment = int(os.path.basename(existing[-1])[8:14]) if existing else 0
+        if existing:
+            # Resume appending to the last segment if it still has room
+            self._map_segment(existing[-1], create=False)
+            if self._count >= self.segment_records:
+                self._roll()
+        else:
+            self._roll()
+
+    def _map_segment(self, path: str, create: bool):
+        size = HEADER_SIZE + self.segment_records * RECORD.size
+        self._file = open(path, "w+b" if create else "r+b")
+        if create:
+            self._file.truncate(size)  # sparse until written
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if create:
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD.size, 0)
+            self._count = 0
+        else:
+            magic, _, record_size, self._count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"{path} is not a market data segment")
+            self.segment_records = (len(self._map) - HEADER_SIZE) // RECORD.size
+
+    def _roll(self):
+        self._close_segment()
+        self._segment += 1
+        path = os.path.join(self.directory, f"segment-{self._segment:06d}.bin")
+        self._map_segment(path, create=True)
+        self.stats["segments"] += 1
+
+    def _close_segment(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, timestamp: float, kind: int, exchange: str, symbol: str,
+               ref: int = 0, aux: int = 0, values=(0.0, 0.0, 0.0, 0.0)):
+        if self._map is None:
+            self.open()
+        if self._count >= self.segment_records:
+            self._roll()
+        RECORD.pack_into(
+            self._map, HEADER_SIZE + self._count * RECORD.size,
+            timestamp, kind, self.strings.intern(exchange), self.strings.intern(symbol), ref, aux, *values
+        )
+        self._count += 1
+        # The count is published after the record bytes, so readers never see a partial record
+        struct.pack_into("<Q", self._map, 8, self._count)
+        self.stats["recorded"] += 1
+
+    def record_ticker(self, ticker: Dict):
+        if ticker.get("replayed"):
+            return
+        self.append(
+            ticker.get("received_at") or time.time(), TICKER, ticker["exchange"], ticker["symbol"],
+            values=(_number(ticker.get("bid")), _number(ticker.get("ask")),
+                    _number(ticker.get("price")), _number(ticker.get("volume")))
+        )
+
+    def record_order_update(self, update: Dict):
+        if update.get("replayed"):
+            return
+        if self._map is None:
+            self.open()
+        self.append(
+            time.time(), ORDER_UPDATE, update.get("exchange"), update.get("symbol"),
+            ref=self.strings.intern(update.get("order_id")), aux=self.strings.intern(update.get("status")),
+            values=(_number(update.get("filled")), _number(update.get("remaining")), _number(update.get("cost")), 0.0)
+        )
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.market_recorder_flush_seconds)
+            self.flush()
+
+    async def start(self):
+        self.open()
+        trade_service.add_ticker_listener(self.record_ticker)
+        trade_service.add_order_listener(self.record_order_update)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Recording market data to {self.directory}")
+
+    async def stop(self):
+        if self.record_ticker in trade_service.ticker_listeners:
+            trade_service.ticker_listeners.remove(self.record_ticker)
+        if self.record_order_update in trade_service.order_listeners:
+            trade_service.order_listeners.remove(self.record_order_update)
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self.close()
+
+    def close(self):
+        self._close_segment()
+        if self.strings:
+            self.strings.close()
+
+    def get_stats(self) -> Dict:
+        return {"directory": self.directory, "segment": self._segment, "segment_fill": self._count, **self.stats}
+
+
+def segment_paths(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if name.startswith("segment-") and name.endswith(".bin")
+    ]
+
+
+class MarketDataReader:
+    """Zero-copy access to recorded segments as numpy record arrays"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.strings = StringTable(directory).strings
+
+    def segments(self) -> Iterator[np.ndarray]:
+        for path in segment_paths(self.directory):
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, _, record_size, count = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"{path} is not a market data segment")
+            yield np.frombuffer(mapped, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+
+    def records(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[np.ndarray]:
+        """Segments trimmed to [start, end); records are in timestamp order within a segment"""
+        for records in self.segments():
+            if start is not None or end is not None:
+                lo = np.searchsorted(records["timestamp"], start, "left") if start is not None else 0
+                hi = np.searchsorted(records["timestamp"], end, "left") if end is not None else len(records)
+                records = records[lo:hi]
+            if len(records):
+                yield records
+
+    def event(self, row: tuple) -> Dict:
+        """Decode one record, as a tuple from `records().tolist()`"""
+        strings = self.strings
+        timestamp, kind, _, exchange, symbol, ref, aux, values = row
+        if kind == TICKER:
+            bid, ask, last, volume = values
+            return {
+                "kind": "ticker", "recorded_at": timestamp, "exchange": strings[exchange], "symbol": strings[symbol],
+                "bid": _optional(bid), "ask": _optional(ask), "price": _optional(last), "volume": _optional(volume),
+            }
+        filled, remaining, cost, _ = values
+        return {
+            "kind": "order_update", "recorded_at": timestamp, "exchange": strings[exchange], "symbol": strings[symbol],
+            "order_id": strings[ref], "status": strings[aux],
+            "filled": _optional(filled), "remaining": _optional(remaining), "cost": _optional(cost),
+        }
+
+    def events(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Dict]:
+        for records in self.records(start, end):
+            # One tolist() per segment is far cheaper than touching numpy scalars per record
+            for row in records.tolist():
+                yield self.event(row)
+
+
+class MarketReplayer:
+    """
+    Feeds recorded events back through TradeService and the order_updates channel.
+
+    `speed` is a multiplier on recorded time (1.0 real time, 10.0 ten times
+    faster); None or 0 replays as fast as possible, yielding to the event
+    loop every `batch` events so other tasks keep running.
+    """
+
+    def __init__(
+        self,
+        reader: MarketDataReader,
+        on_ticker: Optional[Callable[[Dict], None]] = None,
+        on_order_update: Optional[Callable] = None,
+        batch: int = 1000
+    ):
+        self.reader = reader
+        self.on_ticker = on_ticker or trade_service.update_ticker
+        self.on_order_update = on_order_update or trade_service.publish_order_update
+        self.batch = batch
+
+    async def replay(self, speed: Optional[float] = 1.0, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        replayed = 0
+        first_recorded = None
+        wall_start = time.monotonic()
+        for event in self.reader.events(start, end):
+            if speed:
+                if first_recorded is None:
+                    first_recorded = event["recorded_at"]
+                delay = (event["recorded_at"] - first_recorded) / speed - (time.monotonic() - wall_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif replayed % self.batch == 0:
+                await asyncio.sleep(0)
+
+            event["replayed"] = True
+            kind = event.pop("kind")
+            if kind == "ticker":
+                self.on_ticker(event)
+            else:
+                result = self.on_order_update(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            replayed += 1
+        return replayed
+
+
+market_recorder = MarketRecorder()
@@ -0,0 +1,186 @@
+import asyncio
+import importlib
+from abc import ABC, abstractmethod
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.metrics import histogram
+from ..core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_TYPES = ("BUY", "SELL", "HOLD")
+SENTIMENTS = ("bullish", "bearish", "neutral")
+
+
+class ModelBackend(ABC):
+    """
+    Interface for signal models.
+
+    A backend is instantiated and `load`ed once per worker process, then
+    `predict` is called with a batch of rows (exchange, symbol, price, volume
+    and `features`, the latest feature-store values or None) and must return
+    one prediction per row, in order, each with signal_type, confidence and
+    metadata. Rows and predictions cross a process boundary, so both must be
+    picklable. A subclass without `predict` cannot be instantiated, so it
+    fails in `load_backend` rather than on its first batch.
+    """
+
+    version = "unversioned"
+
+    def load(self):
+        pass
+
+    @abstractmethod
+    def predict(self, rows: List[Dict]) -> List[Dict]:
+        ...
+
+
+class MockModel(ModelBackend):
+    """Random predictions with the shape of a real model's output"""
+
+    version = "v1.0"
+
+    def load(self):
+        self.rng = np.random.default_rng()
+
+    def predict(self, rows: List[Dict]) -> List[Dict]:
+        count = len(rows)
+        signal_types = self.rng.integers(0, len(SIGNAL_TYPES), count).tolist()
+        confidences = self.rng.uniform(0.6, 0.95, count).tolist()
+        sentiments = self.rng.integers(0, len(SENTIMENTS), count).tolist()
+        volatilities = self.rng.uniform(0.1, 0.5, count).tolist()
+        return [
+            {
+                "signal_type": SIGNAL_TYPES[signal_type],
+                "confidence": confidence,
+                "metadata": {
+                    "model_version": self.version,
+                    "indicators": ["RSI", "MACD", "Bollinger Bands"],
+                    "market_sentiment": SENTIMENTS[sentiment],
+                    "volatility": volatility,
+                },
+            }
+            for signal_type, confidence, sentiment, volatility
+            in zip(signal_types, confidences, sentiments, volatilities)
+        ]
+
+
+def load_backend(path: str) -> ModelBackend:
+    """Instantiate and load a backend given as "package.module:ClassName" """
+    module_name, _, class_name = path.partition(":")
+    backend = getattr(importlib.import_module(module_name), class_name)()
+    backend.load()
+    return backend
+
+
+# The model held by each pool worker, loaded by the pool initializer
+_worker_model: Optional[ModelBackend] = None
+
+
+def _init_worker(path: str):
+    global _worker_model
+    _worker_model = load_backend(path)
+
+
+def _predict(rows: List[Dict]) -> List[Dict]:
+    return _worker_model.predict(rows) if rows else []
+
+
+class ModelRunner:
+    """
+    Runs model inference off the event loop, one batch per call.
+
+    With `workers` > 0 the model is loaded once in each of that many
+    processes and batches are sent to the pool, so inference neither blocks
+    the loop nor contends for the GIL. With 0 workers the model is loaded in
+    this process and batches run in a thread, which is enough for light models
+    and for tests. A crashed worker breaks the pool; it is recreated on the
+    next batch. If the pool cannot start at all, the runner falls back to
+    in-process inference.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: Optional[int] = None):
+        self.path = path or settings.ai_model_backend
+        self.workers = settings.ai_model_workers if workers is None else workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._model: Optional[ModelBackend] = None
+        self.latency = histogram("model_inference")
+        self.stats = {"batches": 0, "rows": 0, "errors": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None or self._model is not None
+
+    async def start(self):
+        if self.started:
+            return
+        if self.workers > 0:
+            # spawn, not fork: the API process has live threads and an event loop that must not be copied
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.path,)
+            )
+            # Pay worker start-up and model load now rather than on the first real batch
+            try:
+                await asyncio.gather(*[
+                    asyncio.get_running_loop().run_in_executor(self._pool, _predict, [])
+                    for _ in range(self.workers)
+                ])
+            except BrokenProcessPool as e:
+                logger.error(f"Model worker pool failed to start, running the model in-process: {e}")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._model = await asyncio.to_thread(load_backend, self.path)
+        else:
+            self._model = await asyncio.to_thread(load_backend, self.path)
+        logger.info(f"Model backend {self.path} loaded ({self.workers} worker processes)")
+
+    async def predict(self, rows: List[Dict]) -> List[Dict]:
+        """One prediction per row, computed in a single batched model call"""
+        if not rows:
+            return []
+        if not self.started:
+            await self.start()
+        start = time.perf_counter()
+        try:
+            with tracer.span("model.predict", root=False, rows=len(rows), backend=self.path):
+                if self._pool is not None:
+                    predictions = await asyncio.get_running_loop().run_in_executor(self._pool, _predict, rows)
+                else:
+                    predictions = await asyncio.to_thread(self._model.predict, rows)
+        except BrokenProcessPool:
+            self.stats["errors"] += 1
+            logger.error("Model worker pool died, it will be restarted on the next batch")
+            self._pool = None
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        self.latency.record(time.perf_counter() - start)
+        if len(predictions) != len(rows):
+            raise ValueError(f"Model returned {len(predictions)} predictions for {len(rows)} rows")
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(rows)
+        return predictions
+
+    async def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._model = None
+
+    def get_stats(self) -> Dict:
+        return {"backend": self.path, "workers": self.workers, **self.stats, "latency": self.latency.snapshot()}
+
+
+model_runner = ModelRunner()
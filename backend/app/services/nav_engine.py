@@ -0,0 +1,209 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..core.db_writer import db_writer
+from ..models.vault import Investment, Vault
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+PERSIST_CHUNK_SIZE = 10000
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class VaultBook:
+    """Columnar in-memory state of one vault's confirmed investments"""
+
+    def __init__(self, vault_id: int, ids: np.ndarray, principal: np.ndarray, units: np.ndarray,
+                 high_water_mark: np.ndarray, fees: np.ndarray, nav_per_share: float,
+                 last_accrual_at: Optional[datetime], fingerprint: Tuple = ()):
+        self.vault_id = vault_id
+        self.ids = ids
+        self.principal = principal
+        self.units = units
+        self.high_water_mark = high_water_mark
+        self.fees = fees
+        self.value = units * nav_per_share - fees
+        self.nav_per_share = nav_per_share
+        self.last_accrual_at = last_accrual_at
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.ids)
+
+    def accrue(self, nav_per_share: float, as_of: datetime,
+               management_fee: float, performance_fee: float) -> Dict[str, float]:
+        """
+        Mark the book to a new NAV per share and accrue fees since the last accrual.
+
+        Only the elapsed interval is charged: the management fee is pro-rated
+        on the post-mark value, and the performance fee is taken on value above
+        each investment's high-water mark, which then moves up. Cumulative fees
+        and high-water marks carry the history, so nothing is recomputed from
+        inception.
+        """
+        elapsed = 0.0
+        if self.last_accrual_at is not None:
+            elapsed = max(0.0, (as_of - self.last_accrual_at).total_seconds())
+
+        value = self.units * nav_per_share - self.fees
+        management = value * (management_fee * elapsed / SECONDS_PER_YEAR)
+        np.maximum(management, 0.0, out=management)
+        value -= management
+
+        performance = np.maximum(value - self.high_water_mark, 0.0)
+        performance *= performance_fee
+        value -= performance
+
+        self.fees += management
+        self.fees += performance
+        np.maximum(self.high_water_mark, value, out=self.high_water_mark)
+        self.value = value
+        self.nav_per_share = nav_per_share
+        self.last_accrual_at = as_of
+
+        return {
+            "management_fee": float(management.sum()),
+            "performance_fee": float(performance.sum()),
+            "elapsed_seconds": elapsed,
+        }
+
+    def summary(self) -> Dict:
+        total_value = float(self.value.sum())
+        total_principal = float(self.principal.sum())
+        return {
+            "vault_id": self.vault_id,
+            "investments": len(self),
+            "nav_per_share": self.nav_per_share,
+            "total_value": total_value,
+            "total_invested": total_principal,
+            "profit_loss": total_value - total_principal,
+            "accrued_fees": float(self.fees.sum()),
+            "last_accrual_at": self.last_accrual_at.isoformat() if self.last_accrual_at else None,
+        }
+
+
+class NAVEngine:
+    def __init__(self):
+        self.books: Dict[int, VaultBook] = {}
+        self.locks: Dict[int, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, vault_id: int) -> threading.Lock:
+        with self._locks_guard:
+            return self.locks.setdefault(vault_id, threading.Lock())
+
+    def invalidate(self, vault_id: int):
+        self.books.pop(vault_id, None)
+
+    def _fingerprint(self, db: Session, vault: Vault) -> Tuple:
+        """Cheap aggregate that changes when the confirmed investment set or accrual state changes"""
+        count, max_id, total = db.execute(
+            select(func.count(Investment.id), func.max(Investment.id), func.sum(Investment.amount))
+            .where(Investment.vault_id == vault.id, Investment.status == "confirmed")
+        ).one()
+        return (count, max_id, total, _naive_utc(vault.last_accrual_at))
+
+    def load(self, db: Session, vault: Vault, fingerprint: Tuple = ()) -> VaultBook:
+        """Load the vault's confirmed investments into column arrays with one query"""
+        rows = db.execute(
+            select(Investment.id, Investment.amount, Investment.entry_price,
+                   Investment.high_water_mark, Investment.accrued_fees)
+            .where(Investment.vault_id == vault.id, Investment.status == "confirmed")
+            .order_by(Investment.id)
+        ).all()
+
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        principal = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        entry = np.fromiter((r[2] or 1.0 for r in rows), dtype=np.float64, count=len(rows))
+        hwm = np.fromiter((r[3] if r[3] is not None else r[1] for r in rows),
+                          dtype=np.float64, count=len(rows))
+        fees = np.fromiter((r[4] or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+
+        return VaultBook(
+            vault_id=vault.id,
+            ids=ids,
+            principal=principal,
+            units=principal / entry,
+            high_water_mark=hwm,
+            fees=fees,
+            nav_per_share=vault.nav_per_share or 1.0,
+            last_accrual_at=_naive_utc(vault.last_accrual_at),
+            fingerprint=fingerprint,
+        )
+
+    def get_book(self, db: Session, vault: Vault) -> VaultBook:
+        fingerprint = self._fingerprint(db, vault)
+        book = self.books.get(vault.id)
+        if book is None or book.fingerprint != fingerprint:
+            book = self.load(db, vault, fingerprint)
+            self.books[vault.id] = book
+        return book
+
+    def vault_totals(self, vault: Vault, book: VaultBook, accrued: Dict[str, float]) -> Dict:
+        """Vault columns after a mark: totals from the book, accrued fees added to the stored ones"""
+        return {
+            "total_value": float(book.value.sum()),
+            "nav_per_share": book.nav_per_share,
+            "accrued_management_fee": (vault.accrued_management_fee or 0.0) + accrued["management_fee"],
+            "accrued_performance_fee": (vault.accrued_performance_fee or 0.0) + accrued["performance_fee"],
+            "last_accrual_at": book.last_accrual_at,
+        }
+
+    def persist(self, db: Session, vault_id: int, book: VaultBook, totals: Dict):
+        """Write per-investment values and vault totals with chunked bulk updates"""
+        ids = book.ids.tolist()
+        values = book.value.tolist()
+        pnl = (book.value - book.principal).tolist()
+        hwm = book.high_water_mark.tolist()
+        fees = book.fees.tolist()
+
+        for start in range(0, len(ids), PERSIST_CHUNK_SIZE):
+            end = start + PERSIST_CHUNK_SIZE
+            db.execute(update(Investment), [
+                {"id": i, "current_value": v, "profit_loss": p, "high_water_mark": h, "accrued_fees": f}
+                for i, v, p, h, f in zip(ids[start:end], values[start:end], pnl[start:end],
+                                         hwm[start:end], fees[start:end])
+            ])
+        db.execute(update(Vault).where(Vault.id == vault_id).values(**totals))
+
+    def mark(self, db: Session, vault: Vault, nav_per_share: Optional[float] = None,
+             as_of: Optional[datetime] = None) -> Dict:
+        """
+        Mark a vault to a new NAV per share (or the current one, accruing fees
+        only) and persist the results through the database writer; `vault` is
+        updated in place to the committed values.
+        """
+        as_of = as_of or datetime.utcnow()
+        vault_id = vault.id
+        with self._lock(vault_id):
+            book = self.get_book(db, vault)
+            nav = nav_per_share if nav_per_share is not None else book.nav_per_share
+            try:
+                accrued = book.accrue(nav, as_of, vault.management_fee or 0.0, vault.performance_fee or 0.0)
+                totals = self.vault_totals(vault, book, accrued)
+                db_writer.run_sync(lambda session: self.persist(session, vault_id, book, totals), db=db)
+            except Exception:
+                self.invalidate(vault_id)
+                raise
+            for column, value in totals.items():
+                set_committed_value(vault, column, value)
+            book.fingerprint = self._fingerprint(db, vault)
+
+        logger.info(f"Vault {vault.id} marked at {nav} across {len(book)} investments")
+        return {**book.summary(), "accrued": accrued}
+
+
+nav_engine = NAVEngine()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .shared_orders import TERMINAL_STATUSES
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.db_writer import db_writer
+from ..models.order import Order
+
+logger = logging.getLogger(__name__)
+
+orders = Order.__table__
+
+# Spelled out rather than IN (...): expanding parameters cannot be used in an executemany
+FINISHED = or_(*(orders.c.status == status for status in TERMINAL_STATUSES))
+
+COLUMNS = ("user_id", "strategy_id", "exchange", "symbol", "side", "type", "amount", "price", "filled", "cost", "status")
+
+
+def _row(order: Dict) -> Dict:
+    row = {"id": order["id"], **{column: order.get(column) for column in COLUMNS}}
+    if row["price"] is None:
+        row["price"] = order.get("reference_price")
+    row["filled"] = row["filled"] or 0.0
+    row["cost"] = row["cost"] or 0.0
+    row["updated_at"] = datetime.utcnow()
+    try:
+        row["created_at"] = datetime.fromisoformat(order["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        row["created_at"] = row["updated_at"]
+    return row
+
+
+class OrderStore:
+    """
+    Write-behind persistence for TradeService orders.
+
+    Order transitions are recorded in memory (latest state per order wins)
+    and upserted in one statement every `order_flush_interval` seconds, so
+    placing an order never waits on the database. Only the latest state is
+    durable; a crash can lose at most one interval of transitions.
+
+    Every worker flushes its own buffer, so flushes of one order can arrive
+    out of order: a row is only overwritten by a state stamped no earlier
+    than the stored one, and a finished order is never moved back out of its
+    terminal status.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.pending: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"saved": 0, "flushes": 0, "errors": 0}
+
+    def save(self, order: Dict):
+        self.pending[order["id"]] = _row(order)
+
+    def _upsert(self, db, rows: List[Dict]):
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            statement = (postgresql if dialect == "postgresql" else sqlite).insert(orders)
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=["id"],
+                set_={column: excluded[column] for column in COLUMNS + ("updated_at",)},
+                where=(excluded.updated_at >= orders.c.updated_at)
+                & or_(~FINISHED, orders.c.status == excluded.status)
+            )
+            db.execute(statement, rows)
+            return
+        existing = set(db.execute(select(orders.c.id).where(orders.c.id.in_([r["id"] for r in rows]))).scalars())
+        new = [row for row in rows if row["id"] not in existing]
+        if new:
+            db.execute(insert(orders), new)
+        for row in rows:
+            if row["id"] in existing:
+                db.execute(orders.update().where(
+                    orders.c.id == row["id"],
+                    orders.c.updated_at <= row["updated_at"],
+                    or_(~FINISHED, orders.c.status == row["status"])
+                ).values(**{column: row[column] for column in COLUMNS + ("updated_at",)}))
+
+    async def write(self, rows: List[Dict]):
+        await db_writer.run(lambda db: self._upsert(db, rows), session_factory=self.session_factory)
+
+    async def flush(self) -> int:
+        """Persist everything recorded so far; failed rows are retried on the next flush"""
+        if not self.pending:
+            return 0
+        rows, self.pending = self.pending, {}
+        try:
+            await self.write(list(rows.values()))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to persist {len(rows)} orders, will retry: {e}")
+            # Transitions recorded meanwhile are newer than the failed ones
+            for order_id, row in rows.items():
+                self.pending.setdefault(order_id, row)
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["saved"] += len(rows)
+        return len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.order_flush_interval)
+            await self.flush()
+
+    def load_open_orders(self) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            rows = db.execute(select(orders).where(orders.c.status == "pending")).mappings().all()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
+    def load_positions(self) -> List[Dict]:
+        """Net filled quantity per user and symbol, aggregated in the database"""
+        signed = case((orders.c.side == "buy", orders.c.filled), else_=-orders.c.filled)
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(orders.c.user_id, orders.c.symbol, func.sum(signed).label("quantity"))
+                .where(orders.c.filled > 0)
+                .group_by(orders.c.user_id, orders.c.symbol)
+            ).mappings().all()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
+    def last_sequence(self, prefix: str) -> int:
+        """Highest N among ids of the form prefix + N, so new ids never collide after a restart"""
+        db = self.session_factory()
+        try:
+            last = db.execute(
+                select(orders.c.id)
+                .where(orders.c.id.like(prefix + "%"))
+                .order_by(func.length(orders.c.id).desc(), orders.c.id.desc())
+                .limit(1)
+            ).scalar()
+        finally:
+            db.close()
+        try:
+            return int(last[len(prefix):]) if last else 0
+        except ValueError:
+            return 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict:
+        return {"pending": len(self.pending), **self.stats}
+
+
+order_store = OrderStore()
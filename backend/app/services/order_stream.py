@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from .redis_service import redis_service
+from .trade_service import trade_service
+from ..core.config import settings
+from ..core.tracing import TRACEPARENT, tracer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "order_updates"
+RECENT_KEYS_MAX = 10000
+
+
+class Subscriber:
+    __slots__ = ("queue", "user_id", "exchange", "overflowed")
+
+    def __init__(self, user_id: Optional[int], exchange: Optional[str], size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.user_id = user_id
+        self.exchange = exchange
+        self.overflowed = False
+
+    def wants(self, update: Dict) -> bool:
+        if self.user_id is not None and update.get("user_id") != self.user_id:
+            return False
+        if self.exchange is not None and update.get("exchange") != self.exchange:
+            return False
+        return True
+
+
+class OrderStreamHub:
+    """
+    Fans order updates out to SSE clients from one shared subscription.
+
+    Updates arrive from the order_updates Redis channel (so every worker sees
+    every order) and directly from this process's TradeService (so streams
+    keep working while Redis is down); the same (order id, status, filled)
+    seen twice is relayed once. Each relayed update gets a sequential event id and is
+    kept in a bounded replay buffer, so a client reconnecting with
+    Last-Event-ID receives what it missed. Event ids carry a per-process
+    epoch: an id from another process or one that fell out of the buffer
+    cannot be resumed and the client is told to reset instead.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.buffer: Deque[Tuple[int, Dict]] = deque(maxlen=buffer_size or settings.order_stream_buffer_size)
+        self.subscribers: Set[Subscriber] = set()
+        self.recent: "OrderedDict[Tuple, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"relayed": 0, "duplicates": 0, "overflows": 0, "resumed": 0, "resets": 0}
+
+    def event_id(self, sequence: int) -> str:
+        return f"{self.epoch}-{sequence}"
+
+    def publish(self, update: Dict):
+        """Record one update and deliver it to every matching subscriber"""
+        # Partial fills keep the status pending, so the filled quantity is part of the key
+        key = (update.get("order_id"), update.get("status"), update.get("filled"))
+        if key in self.recent:
+            self.stats["duplicates"] += 1
+            return
+        self.recent[key] = None
+        if len(self.recent) > RECENT_KEYS_MAX:
+            self.recent.popitem(last=False)
+
+        update = {k: v for k, v in update.items() if k not in ("replayed", TRACEPARENT)}
+        self.sequence += 1
+        self.buffer.append((self.sequence, update))
+        self.stats["relayed"] += 1
+
+        for subscriber in list(self.subscribers):
+            if subscriber.overflowed or not subscriber.wants(update):
+                continue
+            try:
+                subscriber.queue.put_nowait((self.sequence, update))
+            except asyncio.QueueFull:
+                # A client this far behind is cut off and resumes from the buffer on reconnect
+                subscriber.overflowed = True
+                self.stats["overflows"] += 1
+
+    def subscribe(self, user_id: Optional[int] = None, exchange: Optional[str] = None,
+                  last_event_id: Optional[str] = None) -> Tuple[Subscriber, bool]:
+        """
+        Register a subscriber, pre-filled with buffered updates after last_event_id.
+
+        Returns (subscriber, resumed); resumed is False when last_event_id was
+        given but cannot be honoured and the client should re-poll.
+        """
+        subscriber = Subscriber(user_id, exchange, settings.order_stream_queue_size)
+        resumed = True
+        if last_event_id:
+            epoch, _, sequence = last_event_id.partition("-")
+            oldest = self.buffer[0][0] if self.buffer else self.sequence + 1
+            if epoch != self.epoch or not sequence.isdigit() or int(sequence) < oldest - 1:
+                resumed = False
+                self.stats["resets"] += 1
+            else:
+                self.stats["resumed"] += 1
+                for buffered_sequence, update in self.buffer:
+                    if buffered_sequence > int(sequence) and subscriber.wants(update):
+                        if subscriber.queue.full():
+                            subscriber.overflowed = True
+                            break
+                        subscriber.queue.put_nowait((buffered_sequence, update))
+        self.subscribers.add(subscriber)
+        return subscriber, resumed
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def _consume(self):
+        while True:
+            pubsub = await redis_service.subscribe_to_signals(CHANNEL)
+            if pubsub is None:
+                await asyncio.sleep(settings.redis_reconnect_min_delay)
+                continue
+            try:
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        update = json.loads(message["data"])
+                        with tracer.span("order_stream.relay", parent=tracer.extract(update), root=False,
+                                         order_id=update.get("order_id"), status=update.get("status")):
+                            self.publish(update)
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Skipping malformed order update: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order update subscription failed, resubscribing: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def start(self):
+        trade_service.add_order_listener(self.publish)
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self.publish in trade_service.order_listeners:
+            trade_service.order_listeners.remove(self.publish)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "buffered": len(self.buffer),
+            "last_event_id": self.event_id(self.sequence),
+            **self.stats,
+        }
+
+
+def format_event(event_id: Optional[str], data: Dict, event: Optional[str] = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+order_stream_hub = OrderStreamHub()
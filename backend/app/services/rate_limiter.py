@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from .redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Checks every bucket in KEYS and only consumes from all of them if all have
+# enough tokens, so a request rejected by one limit does not drain the others.
+# ARGV: cost, then (rate, burst) per key. Time comes from the Redis server so
+# that every API worker refills buckets against the same clock.
+TOKEN_BUCKET_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local allowed = 1
+local retry_after = 0
+local tokens = {}
+
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local level = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    level = math.min(burst, level + math.max(0, now - ts) * rate)
+    tokens[i] = level
+    if level < cost then
+        allowed = 0
+        retry_after = math.max(retry_after, (cost - level) / rate)
+    end
+end
+
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local level = tokens[i]
+    if allowed == 1 then
+        level = level - cost
+    end
+    redis.call('HSET', KEYS[i], 'tokens', tostring(level), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate * 1000) + 1000)
+end
+
+return {allowed, tostring(retry_after)}
+"""
+
+
+class TokenBucket:
+    """In-process token bucket, used when Redis is unavailable"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    def __init__(self, redis_timeout: float = 0.05, max_local_buckets: int = 100000):
+        self.redis_timeout = redis_timeout
+        self.max_local_buckets = max_local_buckets
+        self.local_buckets: Dict[str, TokenBucket] = {}
+        self._script = None
+        self._script_client = None
+
+    def _get_script(self):
+        client = redis_service.redis_client
+        if client is None:
+            return None
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    def _check_local(self, limits: List[Tuple[str, float, float]], cost: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        if len(self.local_buckets) > self.max_local_buckets:
+            self.local_buckets.clear()
+
+        buckets = []
+        retry_after = 0.0
+        for key, rate, burst in limits:
+            bucket = self.local_buckets.get(key)
+            if bucket is None or bucket.rate != rate or bucket.burst != burst:
+                bucket = self.local_buckets[key] = TokenBucket(rate, burst)
+            bucket.refill(now)
+            buckets.append(bucket)
+            if bucket.tokens < cost:
+                retry_after = max(retry_after, (cost - bucket.tokens) / rate)
+
+        if retry_after > 0:
+            return False, retry_after
+        for bucket in buckets:
+            bucket.tokens -= cost
+        return True, 0.0
+
+    async def check(self, limits: List[Tuple[str, float, float]], cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Atomically take `cost` tokens from every (key, rate, burst) bucket.
+
+        Returns (allowed, retry_after_seconds). Evaluated in Redis so limits hold
+        across workers; falls back to per-process buckets if Redis is down or slow.
+        """
+        script = self._get_script()
+        if script is not None:
+            args = [cost]
+            for _, rate, burst in limits:
+                args.extend((rate, burst))
+            try:
+                allowed, retry_after = await asyncio.wait_for(
+                    script(keys=[key for key, _, _ in limits], args=args),
+                    timeout=self.redis_timeout
+                )
+                return bool(int(allowed)), float(retry_after)
+            except Exception as e:
+                logger.warning(f"Redis rate limit check failed, using local buckets: {e}")
+
+        return self._check_local(limits, cost)
+
+
+rate_limiter = RateLimiter()
@@ -1,65 +1,261 @@
 import redis.asyncio as redis
-from typing import Optional
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
 from ..core.config import settings
+from ..core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, ConnectionError, OSError, asyncio.TimeoutError)
 
 
 class RedisService:
+    """
+    Pooled Redis client that survives outages.
+
+    A background task health-checks the connection and reconnects with
+    exponential backoff. While Redis is unreachable, `redis_client` is None so
+    callers fall back immediately, and publishes are kept in a bounded spill
+    queue (oldest dropped first) that is replayed in order once the
+    connection is back.
+    """
+
     def __init__(self):
-        self.redis_client: Optional[redis.Redis] = None
-    
+        self._client: Optional[redis.Redis] = None
+        self._pool: Optional[redis.BlockingConnectionPool] = None
+        self.connected = False
+        self.spill: Deque[Tuple[str, str]] = deque()
+        self._replaying = False
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.stats = {
+            "reconnects": 0,
+            "connect_failures": 0,
+            "disconnects": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dropped": 0,
+        }
+
+    @property
+    def redis_client(self) -> Optional[redis.Redis]:
+        return self._client if self.connected else None
+
+    @redis_client.setter
+    def redis_client(self, client: Optional[redis.Redis]):
+        self._client = client
+        self.connected = client is not None
+
     async def connect(self):
+        self._pool = redis.BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            health_check_interval=settings.redis_health_check_interval,
+        )
+        self._client = redis.Redis(connection_pool=self._pool)
         try:
-            self.redis_client = redis.from_url(settings.redis_url)
-            await self.redis_client.ping()
-            print("Connected to Redis successfully")
+            await self._client.ping()
+            self.connected = True
+            logger.info("Connected to Redis successfully")
         except Exception as e:
-            print(f"Failed to connect to Redis: {e}")
-            self.redis_client = None
-    
+            self.stats["connect_failures"] += 1
+            logger.error(f"Failed to connect to Redis, will keep retrying: {e}")
+
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self._monitor())
+
     async def disconnect(self):
-        if self.redis_client:
-            await self.redis_client.close()
-    
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        if self._client:
+            await self._client.aclose()
+        if self._pool:
+            await self._pool.disconnect()
+        self.connected = False
+
+    def mark_down(self, error: Exception):
+        """Report a connection error seen by a caller using `redis_client` directly"""
+        self._mark_down(error)
+
+    def _mark_down(self, error: Exception):
+        if self.connected:
+            self.connected = False
+            self.stats["disconnects"] += 1
+            logger.error(f"Lost connection to Redis: {error}")
+        self._wake.set()
+
+    async def _monitor(self):
+        """Health-check while connected; reconnect with exponential backoff while not"""
+        backoff = settings.redis_reconnect_min_delay
+        while True:
+            try:
+                if self.connected:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=settings.redis_health_check_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                    if self.connected:
+                        try:
+                            await self._client.ping()
+                        except Exception as e:
+                            self._mark_down(e)
+                    continue
+
+                try:
+                    await self._client.ping()
+                except Exception:
+                    self.stats["connect_failures"] += 1
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, settings.redis_reconnect_max_delay)
+                    continue
+
+                backoff = settings.redis_reconnect_min_delay
+                self.connected = True
+                self.stats["reconnects"] += 1
+                logger.info(f"Reconnected to Redis, replaying {len(self.spill)} spilled messages")
+                await self._replay()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis monitor error: {e}")
+                await asyncio.sleep(backoff)
+
+    def _spill(self, channel: str, payload: str):
+        if len(self.spill) >= settings.redis_spill_max_size:
+            self.spill.popleft()
+            self.stats["dropped"] += 1
+        self.spill.append((channel, payload))
+        self.stats["spilled"] += 1
+
+    async def _replay(self):
+        """Publish spilled messages in their original order, in pipelined chunks"""
+        self._replaying = True
+        try:
+            while self.spill and self.connected:
+                chunk = [self.spill.popleft() for _ in range(min(len(self.spill), settings.redis_replay_chunk_size))]
+                try:
+                    async with self._client.pipeline(transaction=False) as pipe:
+                        for channel, payload in chunk:
+                            pipe.publish(channel, payload)
+                        await pipe.execute()
+                    self.stats["replayed"] += len(chunk)
+                except Exception as e:
+                    self.spill.extendleft(reversed(chunk))
+                    self._mark_down(e)
+        finally:
+            self._replaying = False
+
     async def publish_signal(self, channel: str, message: dict):
-        if self.redis_client:
+        """Publish a JSON message; returns False if it was spilled for later delivery instead"""
+        with tracer.span("redis.publish", root=False, channel=channel):
+            payload = json.dumps(tracer.inject(message), default=str)
+            # While spilled messages are pending, new ones queue behind them to keep order
+            if not self.connected or self._replaying or self.spill:
+                if self._client is not None:
+                    self._spill(channel, payload)
+                return False
             try:
-                await self.redis_client.publish(channel, str(message))
+                await self._client.publish(channel, payload)
                 return True
+            except CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                self._spill(channel, payload)
+                return False
             except Exception as e:
-                print(f"Failed to publish signal: {e}")
+                logger.error(f"Failed to publish signal: {e}")
                 return False
-        return False
-    
+
+    async def publish_batch(self, channel: str, messages: List[dict]) -> bool:
+        """Publish many JSON messages to one channel in a single pipelined round trip"""
+        if not messages:
+            return True
+        with tracer.span("redis.publish", root=False, channel=channel, messages=len(messages)):
+            if self._client is None:
+                return False
+            payloads = [json.dumps(tracer.inject(message), default=str) for message in messages]
+            if not self.connected or self._replaying or self.spill:
+                for payload in payloads:
+                    self._spill(channel, payload)
+                return False
+            try:
+                async with self._client.pipeline(transaction=False) as pipe:
+                    for payload in payloads:
+                        pipe.publish(channel, payload)
+                    await pipe.execute()
+                return True
+            except CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                for payload in payloads:
+                    self._spill(channel, payload)
+                return False
+            except Exception as e:
+                logger.error(f"Failed to publish batch: {e}")
+                return False
+
     async def subscribe_to_signals(self, channel: str):
-        if self.redis_client:
+        if self.connected:
             try:
-                pubsub = self.redis_client.pubsub()
+                pubsub = self._client.pubsub()
                 await pubsub.subscribe(channel)
                 return pubsub
+            except CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                return None
             except Exception as e:
-                print(f"Failed to subscribe to signals: {e}")
+                logger.error(f"Failed to subscribe to signals: {e}")
                 return None
         return None
-    
+
     async def cache_set(self, key: str, value: str, expire: int = 3600):
-        if self.redis_client:
+        if self.connected:
             try:
-                await self.redis_client.setex(key, expire, value)
+                await self._client.setex(key, expire, value)
                 return True
+            except CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                return False
             except Exception as e:
-                print(f"Failed to set cache: {e}")
+                logger.error(f"Failed to set cache: {e}")
                 return False
         return False
-    
+
     async def cache_get(self, key: str):
-        if self.redis_client:
+        if self.connected:
             try:
-                value = await self.redis_client.get(key)
+                value = await self._client.get(key)
                 return value.decode() if value else None
+            except CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                return None
             except Exception as e:
-                print(f"Failed to get cache: {e}")
+                logger.error(f"Failed to get cache: {e}")
                 return None
         return None
 
+    def get_stats(self) -> Dict:
+        pool = {}
+        if self._pool is not None:
+            pool = {
+                "max_connections": self._pool.max_connections,
+                "in_use": len(self._pool._in_use_connections),
+                "idle": len(self._pool._available_connections),
+            }
+        return {
+            "connected": self.connected,
+            "spill_size": len(self.spill),
+            "spill_capacity": settings.redis_spill_max_size,
+            "pool": pool,
+            **self.stats,
+        }
+
 
 redis_service = RedisService()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from .redis_service import redis_service
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = "cache:tag:"
+EPOCH_KEY = "cache:epoch"
+
+
+class ResponseCache:
+    """
+    Two-tier (in-process LRU + Redis) read-through cache invalidated by tag.
+
+    Every tag has a version counter in Redis, and the versions of an entry's
+    tags are part of its key. Invalidating a tag increments its counter, so
+    all entries that carry it stop matching immediately, in every worker,
+    without deleting anything; orphaned entries age out by TTL and LRU.
+    Versions are read before the loader runs, so a write that commits while a
+    read is in flight can only leave data behind under the old versions.
+
+    Without Redis the cache is bypassed (or, in single-process mode, uses
+    local version counters), because other workers' invalidations would be
+    invisible. Invalidations that fail during an outage bump a global epoch
+    once Redis is back, discarding everything cached before it.
+    """
+
+    def __init__(self, single_process: Optional[bool] = None):
+        self._single_process = single_process
+        self.local: "OrderedDict[str, tuple]" = OrderedDict()
+        self.local_versions: Dict[str, int] = {}
+        self.epoch_bump_pending = False
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "bypassed": 0, "invalidations": 0}
+
+    @property
+    def single_process(self) -> bool:
+        if self._single_process is not None:
+            return self._single_process
+        return settings.cache_single_process
+
+    async def _versions(self, tags: List[str]) -> Optional[List[int]]:
+        """Current version of each tag plus the global epoch, or None if the cache must be bypassed"""
+        client = redis_service.redis_client
+        if client is not None:
+            try:
+                if self.epoch_bump_pending:
+                    await client.incr(EPOCH_KEY)
+                    self.epoch_bump_pending = False
+                values = await client.mget([EPOCH_KEY] + [TAG_PREFIX + tag for tag in tags])
+                return [int(value) if value else 0 for value in values]
+            except Exception as e:
+                logger.warning(f"Cache version lookup failed, bypassing cache: {e}")
+                return None
+        if self.single_process:
+            # Epoch -1 keeps these keys disjoint from any Redis-versioned key
+            return [-1] + [self.local_versions.get(tag, 0) for tag in tags]
+        return None
+
+    async def tag_versions(self, *tags: str) -> Optional[List[int]]:
+        """Versions of the tags (epoch first), usable as an HTTP validator; None when unknown"""
+        return await self._versions(list(tags))
+
+    @staticmethod
+    def _key(route: str, params: Dict, tags: List[str], versions: List[int]) -> str:
+        raw = json.dumps([route, params, tags, versions], sort_keys=True, default=str)
+        return "cache:entry:" + hashlib.sha1(raw.encode()).hexdigest()
+
+    def _local_get(self, key: str):
+        entry = self.local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.local[key]
+            return None
+        self.local.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: Any):
+        self.local[key] = (time.monotonic() + settings.cache_ttl_seconds, value)
+        self.local.move_to_end(key)
+        while len(self.local) > settings.cache_local_max_entries:
+            self.local.popitem(last=False)
+
+    async def get_or_load(self, route: str, params: Dict, tags: List[str], loader: Callable[[], Any]):
+        """Return the cached response for route+params, or call loader and cache its result"""
+        versions = await self._versions(tags)
+        if versions is None:
+            self.stats["bypassed"] += 1
+            return loader()
+
+        key = self._key(route, params, tags, versions)
+        value = self._local_get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+
+        client = redis_service.redis_client
+        if client is not None:
+            try:
+                cached = await client.get(key)
+                if cached is not None:
+                    value = json.loads(cached)
+                    self._local_set(key, value)
+                    self.stats["redis_hits"] += 1
+                    return value
+            except Exception as e:
+                logger.warning(f"Cache read failed: {e}")
+
+        self.stats["misses"] += 1
+        value = jsonable_encoder(loader())
+        self._local_set(key, value)
+        if client is not None:
+            try:
+                await client.set(key, json.dumps(value), ex=settings.cache_ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Cache write failed: {e}")
+        return value
+
+    async def invalidate(self, *tags: str):
+        """Invalidate every entry carrying any of the tags; call after the write has committed"""
+        tags = [tag for tag in tags if tag]
+        self.stats["invalidations"] += len(tags)
+        for tag in tags:
+            self.local_versions[tag] = self.local_versions.get(tag, 0) + 1
+
+        client = redis_service.redis_client
+        if client is None:
+            self.epoch_bump_pending = True
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(TAG_PREFIX + tag)
+                if self.epoch_bump_pending:
+                    pipe.incr(EPOCH_KEY)
+                await pipe.execute()
+            self.epoch_bump_pending = False
+        except Exception as e:
+            logger.error(f"Cache invalidation failed, will reset cache epoch: {e}")
+            self.epoch_bump_pending = True
+
+    def get_stats(self) -> Dict:
+        return {"local_entries": len(self.local), "single_process": self.single_process, **self.stats}
+
+
+def strategy_tags(strategy_id: Optional[int] = None, user_id: Optional[int] = None) -> Iterable[str]:
+    return [
+        "strategies",
+        f"strategies:user:{user_id}" if user_id is not None else None,
+        f"strategy:{strategy_id}" if strategy_id is not None else None,
+    ]
+
+
+response_cache = ResponseCache()
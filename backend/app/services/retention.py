@@ -0,0 +1,312 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import Table, delete, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from .response_cache import response_cache
+from ..core.config import settings
+from ..core.database import engine as default_engine
+from ..models.feature import FeatureValue
+from ..models.log import Log
+from ..models.profile import RequestProfile
+from ..models.signal import Signal
+from ..models.summary import LogDailySummary, SignalDailySummary
+from ..models.wallet import WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+# Pages released per incremental_vacuum call; each call is its own short write transaction
+VACUUM_STEP_PAGES = 2000
+
+
+def _add_to_summary(conn: Connection, summary: Table, keys: List[str], rows: List[Dict]):
+    """Upsert rows into a summary table, adding their counters to any existing row for the same key"""
+    if not rows:
+        return
+    counters = [column for column in rows[0] if column not in keys]
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql if dialect == "postgresql" else sqlite).insert(summary)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: summary.c[column] + statement.excluded[column] for column in counters}
+        )
+        conn.execute(statement, rows)
+        return
+    for row in rows:
+        match = [summary.c[key] == row[key] for key in keys]
+        if conn.execute(select(summary.c.id).where(*match)).first():
+            conn.execute(summary.update().where(*match).values(
+                **{column: summary.c[column] + row[column] for column in counters}
+            ))
+        else:
+            conn.execute(insert(summary), [row])
+
+
+def summarize_signals(conn: Connection, rows: List[Dict]):
+    totals = defaultdict(lambda: {"count": 0, "confidence_sum": 0.0, "price_sum": 0.0, "volume_sum": 0.0})
+    for row in rows:
+        # NULLs never conflict in a unique index, so they are stored as empty strings
+        key = (row["timestamp"].date(), row["exchange"] or "", row["symbol"] or "", row["signal_type"] or "")
+        total = totals[key]
+        total["count"] += 1
+        total["confidence_sum"] += row["confidence"] or 0.0
+        total["price_sum"] += row["price"] or 0.0
+        total["volume_sum"] += row["volume"] or 0.0
+    _add_to_summary(conn, SignalDailySummary.__table__, ["day", "exchange", "symbol", "signal_type"], [
+        {"day": day, "exchange": exchange, "symbol": symbol, "signal_type": signal_type, **total}
+        for (day, exchange, symbol, signal_type), total in totals.items()
+    ])
+
+
+def summarize_logs(conn: Connection, rows: List[Dict]):
+    counts = defaultdict(int)
+    for row in rows:
+        counts[(row["timestamp"].date(), row["bot_id"] or "", row["exchange"] or "",
+                row["action"] or "", row["status"] or "")] += 1
+    _add_to_summary(conn, LogDailySummary.__table__, ["day", "bot_id", "exchange", "action", "status"], [
+        {"day": day, "bot_id": bot_id, "exchange": exchange, "action": action, "status": status, "count": count}
+        for (day, bot_id, exchange, action, status), count in counts.items()
+    ])
+
+
+class RetentionPolicy:
+    """
+    What happens to rows of one table once they are older than the configured number of days.
+
+    `summarize` rolls a chunk into a summary table in the same transaction
+    that deletes it; `archive` appends the chunk to a gzipped JSON-lines file
+    first; `condition` restricts which expired rows may go at all.
+    """
+
+    def __init__(self, table: Table, timestamp_column: str,
+                 summarize: Optional[Callable[[Connection, List[Dict]], None]] = None,
+                 archive: bool = False, condition=None, cache_tags: tuple = ()):
+        self.table = table
+        self.name = table.name
+        self.timestamp = table.c[timestamp_column]
+        self.summarize = summarize
+        self.archive = archive
+        self.condition = condition
+        self.cache_tags = cache_tags
+
+
+POLICIES = [
+    RetentionPolicy(Signal.__table__, "timestamp", summarize=summarize_signals, cache_tags=("signals",)),
+    RetentionPolicy(Log.__table__, "timestamp", summarize=summarize_logs),
+    RetentionPolicy(
+        WalletTransaction.__table__, "created_at", archive=True,
+        # Pending transfers are still being reconciled, whatever their age
+        condition=WalletTransaction.__table__.c.status != "pending"
+    ),
+    RetentionPolicy(FeatureValue.__table__, "timestamp"),
+    RetentionPolicy(RequestProfile.__table__, "timestamp"),
+]
+
+
+class RetentionJob:
+    """
+    Deletes expired rows in small chunks and gives the freed space back to the filesystem.
+
+    Each chunk of `retention_chunk_size` rows is selected by id, deleted, and
+    summarized or archived in its own transaction, with a short pause between
+    chunks, so the SQLite write lock is never held for long and API writes
+    interleave with the job. Every worker runs the job; the delete uses
+    RETURNING, so rows two workers both selected are summarized once, by the
+    one whose delete removed them. Once deletions leave more than
+    `retention_vacuum_free_ratio` of the file unused, SQLite pages are
+    released with incremental vacuum.
+
+    Switching a database to incremental mode takes one full VACUUM, which
+    rewrites the file and locks the whole database until it finishes, so
+    scheduled runs never do it: they skip reclamation until an operator runs
+    `reclaim(force=True)` (POST /api/admin/retention/reclaim) during
+    maintenance.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, policies: Optional[List[RetentionPolicy]] = None):
+        self.engine = engine or default_engine
+        self.policies = policies if policies is not None else POLICIES
+        self.scheduler = None
+        self.last_report: Optional[Dict] = None
+        self.stats = {"runs": 0, "rows_deleted": 0, "bytes_reclaimed": 0, "errors": 0}
+
+    def purge(self, policy: RetentionPolicy, days: int, now: Optional[datetime] = None) -> Dict:
+        cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+        id_column = policy.table.c.id
+        conditions = [policy.timestamp < cutoff]
+        if policy.condition is not None:
+            conditions.append(policy.condition)
+
+        deleted = chunks = 0
+        while True:
+            # The write lock is taken at BEGIN: upgrading a read transaction fails at once,
+            # without waiting out busy_timeout, if another connection committed meanwhile
+            with self.engine.connect().execution_options(sqlite_begin="IMMEDIATE") as conn, conn.begin():
+                ids = list(conn.execute(
+                    select(id_column).where(*conditions).order_by(id_column).limit(settings.retention_chunk_size)
+                ).scalars())
+                if not ids:
+                    break
+                statement = delete(policy.table).where(id_column.in_(ids))
+                if policy.summarize or policy.archive:
+                    # Another worker may have purged some of these ids since the select;
+                    # only the rows this delete removed are summarized and archived
+                    rows = self._delete_returning(conn, policy, statement)
+                    if policy.summarize:
+                        policy.summarize(conn, rows)
+                    if policy.archive:
+                        # Written before the delete commits: a failed chunk is archived twice, never lost
+                        self._archive(policy.name, rows)
+                    removed = len(rows)
+                else:
+                    removed = conn.execute(statement).rowcount
+            deleted += removed
+            chunks += 1
+            if len(ids) < settings.retention_chunk_size:
+                break
+            time.sleep(settings.retention_chunk_pause)
+        return {"table": policy.name, "cutoff": cutoff.isoformat(), "rows_deleted": deleted, "chunks": chunks}
+
+    def _delete_returning(self, conn: Connection, policy: RetentionPolicy, statement) -> List[Dict]:
+        """Run the delete and return the rows it removed"""
+        if conn.dialect.delete_returning:
+            return [dict(row) for row in conn.execute(statement.returning(*policy.table.c)).mappings()]
+        # Without RETURNING, read the rows inside the same transaction, then delete them
+        rows = [dict(row) for row in conn.execute(select(policy.table).where(statement.whereclause)).mappings()]
+        conn.execute(statement)
+        return rows
+
+    def _archive(self, table_name: str, rows: List[Dict]):
+        os.makedirs(settings.retention_archive_dir, exist_ok=True)
+        path = os.path.join(settings.retention_archive_dir, f"{table_name}-{datetime.utcnow():%Y%m%d}.jsonl.gz")
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+
+    def _pragma(self, conn: Connection, name: str) -> int:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+    def database_bytes(self) -> Optional[int]:
+        if self.engine.dialect.name != "sqlite":
+            return None
+        with self.engine.connect() as conn:
+            return self._pragma(conn, "page_count") * self._pragma(conn, "page_size")
+
+    def reclaim(self, force: bool = False) -> Dict:
+        """
+        Return free SQLite pages to the filesystem if enough of the file is unused.
+
+        `force` reclaims whatever is free and, if the database is not yet in
+        incremental mode, switches it with a full VACUUM.
+        """
+        if self.engine.dialect.name != "sqlite":
+            return {"vacuumed": False, "bytes_reclaimed": 0}  # PostgreSQL's autovacuum handles this
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            page_size = self._pragma(conn, "page_size")
+            before = self._pragma(conn, "page_count")
+            free = self._pragma(conn, "freelist_count")
+            if not before or (not force and free / before < settings.retention_vacuum_free_ratio):
+                return {"vacuumed": False, "bytes_reclaimed": 0, "free_bytes": free * page_size}
+
+            if self._pragma(conn, "auto_vacuum") != 2:
+                if not force:
+                    logger.warning("Database is not in incremental vacuum mode; run a forced reclaim during maintenance")
+                    return {"vacuumed": False, "bytes_reclaimed": 0, "free_bytes": free * page_size,
+                            "incremental": False}
+                # Switching to incremental mode takes one full VACUUM; later passes release pages in steps
+                conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+                conn.execute(text("VACUUM"))
+                logger.info("Enabled incremental vacuum on the database")
+            else:
+                while self._pragma(conn, "freelist_count") > 0:
+                    conn.execute(text(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})"))
+            after = self._pragma(conn, "page_count")
+        return {"vacuumed": True, "bytes_reclaimed": (before - after) * page_size}
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        """One full pass over every policy, then space reclamation"""
+        started = time.perf_counter()
+        bytes_before = self.database_bytes()
+        tables = []
+        for policy in self.policies:
+            days = settings.retention_days.get(policy.name)
+            if not days:
+                continue
+            try:
+                tables.append(self.purge(policy, days, now))
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Retention failed for {policy.name}: {e}")
+                tables.append({"table": policy.name, "error": str(e)})
+
+        try:
+            vacuum = self.reclaim()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to reclaim database space: {e}")
+            vacuum = {"vacuumed": False, "bytes_reclaimed": 0, "error": str(e)}
+
+        rows_deleted = sum(table.get("rows_deleted", 0) for table in tables)
+        report = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "tables": tables,
+            "rows_deleted": rows_deleted,
+            "vacuum": vacuum,
+            "bytes_before": bytes_before,
+            "bytes_after": self.database_bytes(),
+            "bytes_reclaimed": vacuum["bytes_reclaimed"],
+            "seconds": time.perf_counter() - started,
+        }
+        self.stats["runs"] += 1
+        self.stats["rows_deleted"] += rows_deleted
+        self.stats["bytes_reclaimed"] += vacuum["bytes_reclaimed"]
+        self.last_report = report
+        logger.info(f"Retention removed {rows_deleted} rows and reclaimed {vacuum['bytes_reclaimed']} bytes")
+        return report
+
+    async def run_once(self) -> Dict:
+        report = await asyncio.to_thread(self.run)
+        tags = [
+            tag for policy in self.policies for tag in policy.cache_tags
+            if any(t["table"] == policy.name and t.get("rows_deleted") for t in report["tables"])
+        ]
+        if tags:
+            await response_cache.invalidate(*tags)
+        return report
+
+    async def start(self):
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.run_once,
+            'interval',
+            hours=settings.retention_interval_hours,
+            id='retention',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+        logger.info("Retention job started")
+
+    async def stop(self):
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+
+    def get_stats(self) -> Dict:
+        return {"policies": {p.name: settings.retention_days.get(p.name) for p in self.policies},
+                **self.stats, "last_run": self.last_report}
+
+
+retention_job = RetentionJob()
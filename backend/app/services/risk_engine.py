@@ -0,0 +1,265 @@
+import json
+import logging
+import math
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from .redis_service import CONNECTION_ERRORS, redis_service
+from ..core.config import settings
+from ..core.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+LIMIT_FIELDS = ("max_order_notional", "max_position_notional", "max_open_orders", "max_open_notional")
+# Hash of user id -> JSON limit overrides, shared by every worker
+LIMITS_KEY = "risk:limits"
+
+
+class Account:
+    """Risk state of one user; orders without a user share the None account"""
+
+    __slots__ = ("open_orders", "open_notional", "positions", "pending_buy", "pending_sell", "limits", "rebuilt")
+
+    def __init__(self):
+        self.open_orders = 0
+        self.open_notional = 0.0
+        self.positions: Dict[str, float] = {}  # symbol -> net base quantity
+        self.pending_buy: Dict[str, float] = {}  # symbol -> unfilled buy quantity
+        self.pending_sell: Dict[str, float] = {}
+        self.limits: Optional[Dict[str, float]] = None  # None means the settings defaults
+        self.rebuilt: Dict[str, float] = {}  # symbol -> position when state was last rebuilt
+
+
+class OpenOrder:
+    __slots__ = ("account", "symbol", "side", "remaining", "price")
+
+    def __init__(self, account: Account, symbol: str, side: str, remaining: float, price: float):
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.remaining = remaining
+        self.price = price
+
+
+def default_limits() -> Dict[str, float]:
+    return {field: getattr(settings, f"risk_{field}") for field in LIMIT_FIELDS}
+
+
+class RiskEngine:
+    """
+    Pre-trade checks against positions, open-order exposure and per-user limits held in memory.
+
+    Every check is a handful of dict lookups and float comparisons, so its
+    cost does not depend on how many orders or positions exist. Accepted
+    orders reserve their exposure immediately; fills move quantity from
+    pending into the position and cancels release it. The check and the
+    reservation run without an await in between, so concurrent orders on the
+    event loop cannot both pass against the same headroom.
+
+    Limit overrides are kept in Redis and re-read by every worker at most
+    `risk_limits_refresh_seconds` apart, so a change reaches all of them
+    within that interval. Positions and open-order exposure are per worker:
+    each starts from the persisted orders and then only sees the orders it
+    placed itself. So that the limits hold across `risk_workers` workers,
+    each one allows 1/risk_workers of the open-order limits, and counts what
+    it moved a position since the rebuild risk_workers times over. Orders
+    restored at start-up count in every worker, which errs on the strict side.
+    """
+
+    def __init__(self):
+        self.accounts: Dict[Optional[int], Account] = {}
+        self.orders: Dict[str, OpenOrder] = {}
+        self.latency = histogram("risk_check")
+        self.limits_synced = 0.0
+        self.stats = {"checked": 0, "rejected": 0, "limit_syncs": 0, "redis_errors": 0}
+
+    def account(self, user_id: Optional[int]) -> Account:
+        account = self.accounts.get(user_id)
+        if account is None:
+            account = self.accounts[user_id] = Account()
+        return account
+
+    def limits(self, user_id: Optional[int]) -> Dict[str, float]:
+        account = self.accounts.get(user_id)
+        return (account.limits if account and account.limits else None) or default_limits()
+
+    def set_limits(self, user_id: Optional[int], **limits: float) -> Dict[str, float]:
+        """Override limits for one user; unspecified fields keep their current value"""
+        account = self.account(user_id)
+        merged = dict(account.limits or default_limits())
+        merged.update({field: float(value) for field, value in limits.items() if field in LIMIT_FIELDS and value is not None})
+        account.limits = merged
+        return merged
+
+    def _failed(self, error: Exception):
+        self.stats["redis_errors"] += 1
+        if isinstance(error, CONNECTION_ERRORS):
+            redis_service.mark_down(error)
+        else:
+            logger.error(f"Shared risk limits error: {error}")
+
+    async def save_limits(self, user_id: int, **limits: float) -> Dict[str, float]:
+        """Override limits for one user in this worker and in Redis, where the other workers pick them up"""
+        merged = self.set_limits(user_id, **limits)
+        client = redis_service.redis_client
+        if client is None:
+            logger.warning(f"Redis is unavailable, risk limits for user {user_id} only apply to this worker")
+            return merged
+        try:
+            await client.hset(LIMITS_KEY, str(user_id), json.dumps(merged))
+        except Exception as e:
+            self._failed(e)
+        return merged
+
+    async def sync_limits(self, force: bool = False):
+        """Load the limit overrides saved by any worker, unless they were loaded recently"""
+        now = time.monotonic()
+        if not force and now - self.limits_synced < settings.risk_limits_refresh_seconds:
+            return
+        client = redis_service.redis_client
+        if client is None:
+            return
+        self.limits_synced = now
+        try:
+            saved = await client.hgetall(LIMITS_KEY)
+        except Exception as e:
+            self._failed(e)
+            return
+        for user_id, limits in saved.items():
+            self.account(int(user_id)).limits = json.loads(limits)
+        self.stats["limit_syncs"] += 1
+
+    def check(self, user_id: Optional[int], symbol: str, side: str, amount: float, price: Optional[float]) -> Tuple[bool, str]:
+        """Validate one order against the user's limits; returns (allowed, reason)"""
+        start = time.perf_counter()
+        try:
+            allowed, reason = self._check(user_id, symbol, side, amount, price)
+        finally:
+            self.latency.record(time.perf_counter() - start)
+        self.stats["checked"] += 1
+        if not allowed:
+            self.stats["rejected"] += 1
+        return allowed, reason
+
+    def _check(self, user_id, symbol, side, amount, price) -> Tuple[bool, str]:
+        if side not in ("buy", "sell"):
+            return False, f"Invalid side {side!r}"
+        if not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount <= 0:
+            return False, "Amount must be a positive number"
+        if not symbol or "/" not in symbol:
+            return False, f"Invalid symbol {symbol!r}"
+        if price is None or not math.isfinite(price) or price <= 0:
+            return False, f"No reference price for {symbol}"
+
+        account = self.accounts.get(user_id) or Account()
+        limits = account.limits or default_limits()
+        workers = max(settings.risk_workers, 1)
+        notional = amount * price
+
+        if notional > limits["max_order_notional"]:
+            return False, f"Order notional {notional:.2f} exceeds limit {limits['max_order_notional']:.2f}"
+        max_open_orders = limits["max_open_orders"] / workers
+        if account.open_orders + 1 > max_open_orders:
+            return False, f"Open order limit {max_open_orders:g} reached"
+        max_open_notional = limits["max_open_notional"] / workers
+        if account.open_notional + notional > max_open_notional:
+            return False, f"Open order exposure would exceed {max_open_notional:.2f}"
+
+        # Worst case: every open order on this side fills along with this one
+        position = account.positions.get(symbol, 0.0)
+        if side == "buy":
+            worst = position + account.pending_buy.get(symbol, 0.0) + amount
+        else:
+            worst = position - account.pending_sell.get(symbol, 0.0) - amount
+        # Other workers may move the position as far as this one
+        rebuilt = account.rebuilt.get(symbol, 0.0)
+        worst = rebuilt + (worst - rebuilt) * workers
+        if abs(worst) * price > limits["max_position_notional"]:
+            return False, f"Position in {symbol} would exceed {limits['max_position_notional']:.2f}"
+        return True, "ok"
+
+    def reserve(self, order_id: str, user_id: Optional[int], symbol: str, side: str, amount: float, price: float):
+        """Count an accepted (or restored) open order against its user's exposure"""
+        account = self.account(user_id)
+        account.open_orders += 1
+        account.open_notional += amount * price
+        pending = account.pending_buy if side == "buy" else account.pending_sell
+        pending[symbol] = pending.get(symbol, 0.0) + amount
+        self.orders[order_id] = OpenOrder(account, symbol, side, amount, price)
+
+    def on_fill(self, order_id: str, quantity: float):
+        order = self.orders.get(order_id)
+        if order is None:
+            return
+        quantity = min(quantity, order.remaining)
+        account = order.account
+        pending = account.pending_buy if order.side == "buy" else account.pending_sell
+        pending[order.symbol] = pending.get(order.symbol, 0.0) - quantity
+        signed = quantity if order.side == "buy" else -quantity
+        account.positions[order.symbol] = account.positions.get(order.symbol, 0.0) + signed
+        account.open_notional -= quantity * order.price
+        order.remaining -= quantity
+        if order.remaining <= 1e-12:
+            self._close(order_id)
+
+    def on_cancel(self, order_id: str):
+        order = self.orders.get(order_id)
+        if order is None:
+            return
+        account = order.account
+        pending = account.pending_buy if order.side == "buy" else account.pending_sell
+        pending[order.symbol] = pending.get(order.symbol, 0.0) - order.remaining
+        account.open_notional -= order.remaining * order.price
+        self._close(order_id)
+
+    def _close(self, order_id: str):
+        order = self.orders.pop(order_id)
+        order.account.open_orders -= 1
+        if order.account.open_orders == 0:
+            # Clear float drift once nothing is open
+            order.account.open_notional = 0.0
+
+    def rebuild(self, positions: Iterable[Dict], open_orders: Iterable[Dict]):
+        """Reset state from persisted positions and open orders, keeping limit overrides"""
+        overrides = {user_id: account.limits for user_id, account in self.accounts.items() if account.limits}
+        self.accounts = {}
+        self.orders = {}
+        for user_id, limits in overrides.items():
+            self.account(user_id).limits = limits
+
+        for row in positions:
+            if row["quantity"]:
+                account = self.account(row["user_id"])
+                account.positions[row["symbol"]] = account.positions.get(row["symbol"], 0.0) + row["quantity"]
+        for account in self.accounts.values():
+            account.rebuilt = dict(account.positions)
+        restored = 0
+        for row in open_orders:
+            remaining = row["amount"] - (row.get("filled") or 0.0)
+            if remaining > 0 and row.get("price"):
+                self.reserve(row["id"], row["user_id"], row["symbol"], row["side"], remaining, row["price"])
+                restored += 1
+        logger.info(f"Risk engine rebuilt: {len(self.accounts)} accounts, {restored} open orders")
+
+    def exposure(self, user_id: Optional[int]) -> Dict:
+        account = self.accounts.get(user_id) or Account()
+        return {
+            "user_id": user_id,
+            "open_orders": account.open_orders,
+            "open_notional": account.open_notional,
+            "positions": {symbol: qty for symbol, qty in account.positions.items() if qty},
+            "pending_buy": {symbol: qty for symbol, qty in account.pending_buy.items() if qty > 1e-12},
+            "pending_sell": {symbol: qty for symbol, qty in account.pending_sell.items() if qty > 1e-12},
+            "limits": account.limits or default_limits(),
+        }
+
+    def get_stats(self) -> Dict:
+        return {
+            "accounts": len(self.accounts),
+            "open_orders": len(self.orders),
+            **self.stats,
+            "latency": self.latency.snapshot(),
+        }
+
+
+risk_engine = RiskEngine()
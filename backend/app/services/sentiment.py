@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+
+from .redis_service import redis_service
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.signal import Signal
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "new_signals"
+
+# window -> (window seconds, bucket seconds)
+WINDOWS = {"5m": (300, 10), "1h": (3600, 60), "24h": (86400, 900)}
+SIGNAL_TYPES = {"BUY": 0, "SELL": 1, "HOLD": 2}
+COUNT = 3  # slot of the signal count in a bucket or in the totals
+
+
+class WindowCounter:
+    """
+    Confidence-weighted BUY, SELL and HOLD totals over a sliding window of fixed buckets.
+
+    Running totals are kept alongside the ring, so adding a signal or reading
+    the totals touches only the buckets that expired since the last call,
+    never the signals themselves.
+    """
+
+    __slots__ = ("width", "size", "buckets", "head", "totals")
+
+    def __init__(self, window: int, width: int):
+        self.width = width
+        self.size = window // width
+        self.buckets = [[0.0] * 4 for _ in range(self.size)]
+        self.head: Optional[int] = None  # newest bucket number
+        self.totals = [0.0] * 4
+
+    def _advance(self, bucket: int):
+        if self.head is not None and bucket <= self.head:
+            return
+        if self.head is None or bucket - self.head >= self.size:
+            for values in self.buckets:
+                values[:] = (0.0, 0.0, 0.0, 0.0)
+            self.totals = [0.0] * 4
+        else:
+            for number in range(self.head + 1, bucket + 1):
+                values = self.buckets[number % self.size]
+                for i in range(4):
+                    self.totals[i] -= values[i]
+                values[:] = (0.0, 0.0, 0.0, 0.0)
+            if self.totals[COUNT] < 0.5:
+                self.totals = [0.0] * 4  # nothing left in the window; drop float drift
+        self.head = bucket
+
+    def add(self, timestamp: float, index: int, weight: float) -> bool:
+        """Count one signal; False if it is older than the window"""
+        bucket = int(timestamp // self.width)
+        self._advance(bucket)
+        if bucket <= self.head - self.size:
+            return False
+        values = self.buckets[bucket % self.size]
+        values[index] += weight
+        values[COUNT] += 1
+        self.totals[index] += weight
+        self.totals[COUNT] += 1
+        return True
+
+    def read(self, now: float) -> List[float]:
+        self._advance(int(now // self.width))
+        return self.totals
+
+
+def summarize(totals: List[float]) -> Dict:
+    buy, sell, hold, count = totals
+    weight = buy + sell + hold
+    score = (buy - sell) / weight if weight > 0 else 0.0
+    band = settings.sentiment_neutral_band
+    return {
+        "overall_sentiment": "bullish" if score > band else "bearish" if score < -band else "neutral",
+        "score": score,
+        "confidence": weight / count if count else 0.0,  # mean confidence of the signals counted
+        "fear_greed_index": round(50 + 50 * score),
+        "signals": int(count),
+        "buy": buy,
+        "sell": sell,
+        "hold": hold,
+    }
+
+
+def _epoch(value) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # signal timestamps are stored as naive UTC
+    return value.timestamp()
+
+
+class SentimentTracker:
+    """
+    Market sentiment from the signal stream, per symbol and overall, for each window in WINDOWS.
+
+    Counters are warmed once from the last 24h of stored signals and then
+    maintained from the new_signals channel, so a query never scans the
+    signals table.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.symbols: Dict[str, Dict[str, WindowCounter]] = {}
+        self.overall = self._counters()
+        self.warm_id = 0  # signals up to this id were loaded from the database
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "skipped": 0}
+
+    @staticmethod
+    def _counters() -> Dict[str, WindowCounter]:
+        return {name: WindowCounter(window, width) for name, (window, width) in WINDOWS.items()}
+
+    def record(self, symbol: str, signal_type: str, confidence: float, timestamp: float):
+        index = SIGNAL_TYPES.get(str(signal_type).upper())
+        if index is None:
+            self.stats["skipped"] += 1
+            return
+        counters = self.symbols.get(symbol)
+        if counters is None:
+            counters = self.symbols[symbol] = self._counters()
+        weight = float(confidence or 0.0)
+        for name, counter in counters.items():
+            counter.add(timestamp, index, weight)
+            self.overall[name].add(timestamp, index, weight)
+        self.stats["recorded"] += 1
+
+    def on_message(self, message: Dict):
+        if message.get("id") is not None and message["id"] <= self.warm_id:
+            return  # already counted by the warm-up
+        timestamp = _epoch(message["timestamp"]) if message.get("timestamp") else time.time()
+        self.record(message["symbol"], message["signal_type"], message.get("confidence"), timestamp)
+
+    def analyze(self, symbols: Optional[Iterable[str]] = None, window: str = "1h", now: Optional[float] = None) -> Dict:
+        """Sentiment over `window` across `symbols` (every symbol if empty), with a breakdown per symbol"""
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window {window}, expected one of {', '.join(WINDOWS)}")
+        now = now if now is not None else time.time()
+        symbols = list(dict.fromkeys(symbols or []))
+        if not symbols:
+            result = summarize(self.overall[window].read(now))
+        else:
+            per_symbol = {}
+            combined = [0.0] * 4
+            for symbol in symbols:
+                counters = self.symbols.get(symbol)
+                totals = counters[window].read(now) if counters else [0.0] * 4
+                per_symbol[symbol] = summarize(totals)
+                combined = [a + b for a, b in zip(combined, totals)]
+            result = {**summarize(combined), "symbols": per_symbol}
+        return {**result, "window": window, "timestamp": datetime.utcnow().isoformat()}
+
+    def warm(self):
+        """Load the longest window from the signals table once, at startup"""
+        longest = max(window for window, _ in WINDOWS.values())
+        since = datetime.utcnow() - timedelta(seconds=longest)
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(Signal.id, Signal.symbol, Signal.signal_type, Signal.confidence, Signal.timestamp)
+                .where(Signal.timestamp >= since)
+                .order_by(Signal.timestamp)
+            ).all()
+        finally:
+            db.close()
+        for row in rows:
+            self.record(row.symbol, row.signal_type, row.confidence, _epoch(row.timestamp))
+            self.warm_id = max(self.warm_id, row.id)
+        logger.info(f"Sentiment counters warmed with {len(rows)} signals")
+
+    async def _consume(self, pubsub=None):
+        while True:
+            if pubsub is None:
+                pubsub = await redis_service.subscribe_to_signals(CHANNEL)
+            if pubsub is None:
+                await asyncio.sleep(settings.redis_reconnect_min_delay)
+                continue
+            try:
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        self.on_message(json.loads(message["data"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"Skipping malformed signal message: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Signal subscription failed, resubscribing: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+                pubsub = None
+
+    async def start(self):
+        if self._task is not None:
+            return
+        # Subscribe before the warm-up query so nothing published in between is missed;
+        # messages wait in the subscription until warm_id is known and then skip it
+        pubsub = await redis_service.subscribe_to_signals(CHANNEL)
+        try:
+            await asyncio.to_thread(self.warm)
+        except Exception as e:
+            logger.error(f"Failed to warm sentiment counters: {e}")
+        self._task = asyncio.create_task(self._consume(pubsub))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {"symbols": len(self.symbols), "warm_id": self.warm_id, **self.stats}
+
+
+sentiment_tracker = SentimentTracker()
@@ -0,0 +1,227 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .redis_service import CONNECTION_ERRORS, redis_service
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ORDER_KEY = "orders:{}"
+SEQUENCE_KEY = "orders:sequence"
+TERMINAL_STATUSES = ("filled", "cancelled", "rejected")
+
+# Apply ARGV[3:] as field/value pairs only if the order's status is still ARGV[1];
+# returns nil for an unknown order, else {applied, status before}
+TRANSITION_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then return nil end
+if status ~= ARGV[1] then return {0, status} end
+for i = 3, #ARGV, 2 do redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1]) end
+if tonumber(ARGV[2]) > 0 then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+return {1, status}
+"""
+
+# Create the order hash from ARGV field/value pairs unless it already exists
+RESTORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+for i = 1, #ARGV, 2 do redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1]) end
+return 1
+"""
+
+# Raise the id counter to at least ARGV[1]; it never goes down
+ADVANCE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return tonumber(ARGV[1])
+end
+return current
+"""
+
+
+def _encode(order: Dict) -> Dict[str, str]:
+    return {field: json.dumps(value, default=str) for field, value in order.items()}
+
+
+def _decode(fields: Dict) -> Dict:
+    return {
+        (field.decode() if isinstance(field, bytes) else field): json.loads(value)
+        for field, value in fields.items()
+    }
+
+
+class SharedOrders:
+    """
+    Order state shared by every worker process, in Redis hashes.
+
+    Each order is a hash at orders:<id> with JSON-encoded fields, and ids come
+    from INCRBY on one counter, so workers never hand out the same id. Status
+    changes go through a Lua compare-and-set on the status field: a fill and
+    a cancel racing on two workers cannot both win. Writes go to Redis and to
+    a local cache; finished orders never change again, so they are served
+    from the cache, while pending ones are re-read so a cancel or fill made
+    by another worker is seen. Finished orders expire from Redis after
+    `order_state_ttl` seconds, the database keeps them.
+
+    While Redis is unreachable the local cache is the only copy and ids come
+    from a local counter, which is only collision-free with a single worker.
+    """
+
+    def __init__(self):
+        self.local: Dict[str, Dict] = {}
+        self.sequence = 0
+        self.stats = {
+            "ids": 0,
+            "local_ids": 0,
+            "reads": 0,
+            "cache_hits": 0,
+            "writes": 0,
+            "transitions": 0,
+            "conflicts": 0,
+            "redis_errors": 0,
+        }
+
+    def _client(self):
+        return redis_service.redis_client
+
+    def _failed(self, error: Exception):
+        self.stats["redis_errors"] += 1
+        if isinstance(error, CONNECTION_ERRORS):
+            redis_service.mark_down(error)
+        else:
+            logger.error(f"Shared order state error: {error}")
+
+    async def next_ids(self, prefix: str, count: int) -> List[str]:
+        """`count` new order ids from one INCRBY; unique across workers while Redis is up"""
+        if count <= 0:
+            return []
+        self.stats["ids"] += count
+        client = self._client()
+        last = None
+        if client is not None:
+            try:
+                last = await client.incrby(SEQUENCE_KEY, count)
+                self.sequence = max(self.sequence, last)
+            except Exception as e:
+                self._failed(e)
+        if last is None:
+            self.stats["local_ids"] += count
+            self.sequence += count
+            last = self.sequence
+        return [f"{prefix}{sequence}" for sequence in range(last - count + 1, last + 1)]
+
+    async def next_id(self, prefix: str) -> str:
+        return (await self.next_ids(prefix, 1))[0]
+
+    async def advance(self, sequence: int):
+        """Make sure ids handed out from now on are above `sequence`"""
+        self.sequence = max(self.sequence, sequence)
+        client = self._client()
+        if client is not None:
+            try:
+                self.sequence = max(self.sequence, int(await client.eval(ADVANCE_SCRIPT, 1, SEQUENCE_KEY, sequence)))
+            except Exception as e:
+                self._failed(e)
+
+    async def restore(self, orders: List[Dict]):
+        """Cache orders reloaded from the database, and share those Redis no longer has"""
+        for order in orders:
+            self.local.setdefault(order["id"], order)
+        client = self._client()
+        if client is None or not orders:
+            return
+        try:
+            # Newer state another worker wrote is kept
+            async with client.pipeline(transaction=False) as pipe:
+                for order in orders:
+                    arguments = [item for pair in _encode(order).items() for item in pair]
+                    pipe.eval(RESTORE_SCRIPT, 1, ORDER_KEY.format(order["id"]), *arguments)
+                await pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    async def save(self, order: Dict):
+        """Write a whole order through to Redis and the local cache"""
+        self.stats["writes"] += 1
+        self.local[order["id"]] = order
+        client = self._client()
+        if client is None:
+            return
+        key = ORDER_KEY.format(order["id"])
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=_encode(order))
+                if order["status"] in TERMINAL_STATUSES:
+                    pipe.expire(key, settings.order_state_ttl)
+                await pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    async def get(self, order_id: str) -> Optional[Dict]:
+        """Current state of an order placed by any worker, or None"""
+        self.stats["reads"] += 1
+        order = self.local.get(order_id)
+        if order is not None and order["status"] in TERMINAL_STATUSES:
+            self.stats["cache_hits"] += 1
+            return order
+        client = self._client()
+        if client is None:
+            return order
+        try:
+            fields = await client.hgetall(ORDER_KEY.format(order_id))
+        except Exception as e:
+            self._failed(e)
+            return order
+        if not fields:
+            return order
+        remote = _decode(fields)
+        # Update in place, so code holding the order sees the new state too
+        if order is None:
+            order = self.local[order_id] = remote
+        else:
+            order.update(remote)
+        return order
+
+    async def transition(self, order_id: str, expected: str, changes: Dict) -> Tuple[bool, Optional[Dict]]:
+        """
+        Apply changes to an order only if its status is still `expected`.
+
+        Returns whether they were applied, and the order's current state.
+        """
+        self.stats["transitions"] += 1
+        client = self._client()
+        if client is not None:
+            ttl = settings.order_state_ttl if changes.get("status") in TERMINAL_STATUSES else 0
+            arguments = [json.dumps(expected), ttl, *[item for pair in _encode(changes).items() for item in pair]]
+            try:
+                result = await client.eval(TRANSITION_SCRIPT, 1, ORDER_KEY.format(order_id), *arguments)
+            except Exception as e:
+                self._failed(e)
+            else:
+                if result is not None:
+                    if not result[0]:
+                        self.stats["conflicts"] += 1
+                        return False, await self.get(order_id)
+                    order = self.local.get(order_id)
+                    if order is None:
+                        order = await self.get(order_id)
+                    else:
+                        order.update(changes)
+                    return True, order
+
+        # Redis is down, or the order was only ever cached locally
+        order = self.local.get(order_id)
+        if order is None:
+            return False, None
+        if order["status"] != expected:
+            self.stats["conflicts"] += 1
+            return False, order
+        order.update(changes)
+        return True, order
+
+    def get_stats(self) -> Dict:
+        return {"shared": self._client() is not None, "cached": len(self.local), "sequence": self.sequence, **self.stats}
+
+
+shared_orders = SharedOrders()
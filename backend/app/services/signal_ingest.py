@@ -0,0 +1,211 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .redis_service import redis_service
+from .signal_metadata import parse_metadata, promoted_columns
+from ..core.db_writer import db_writer
+from ..models.signal import Signal
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_TYPES = {"BUY", "SELL", "HOLD"}
+MAX_REPORTED_ERRORS = 100
+
+signals = Signal.__table__
+
+_decoder = json.JSONDecoder()
+
+
+class IngestError(ValueError):
+    pass
+
+
+def parse_signal(line: str) -> Dict:
+    """Parse and validate one NDJSON line into a row for the signals table"""
+    try:
+        item = _decoder.decode(line)
+    except ValueError as e:
+        raise IngestError(f"Invalid JSON: {e}")
+    if not isinstance(item, dict):
+        raise IngestError("Expected a JSON object")
+
+    try:
+        signal_type = str(item["signal_type"]).upper()
+        confidence = float(item["confidence"])
+        row = {
+            "idempotency_key": item.get("idempotency_key"),
+            "exchange": str(item["exchange"]),
+            "symbol": str(item["symbol"]),
+            "signal_type": signal_type,
+            "confidence": confidence,
+            "price": float(item["price"]),
+            "volume": float(item.get("volume", 0.0)),
+            "signal_metadata": item.get("metadata"),
+        }
+    except KeyError as e:
+        raise IngestError(f"Missing field {e}")
+    except (TypeError, ValueError) as e:
+        raise IngestError(f"Invalid field value: {e}")
+
+    if signal_type not in SIGNAL_TYPES:
+        raise IngestError(f"Unknown signal_type {signal_type}")
+    if not 0.0 <= confidence <= 1.0:
+        raise IngestError("confidence must be between 0 and 1")
+    if row["idempotency_key"] is not None:
+        row["idempotency_key"] = str(row["idempotency_key"])
+    try:
+        row["signal_metadata"] = parse_metadata(row["signal_metadata"])
+    except ValueError as e:
+        raise IngestError(f"Invalid metadata: {e}")
+    row.update(promoted_columns(row["signal_metadata"]))
+
+    timestamp = item.get("timestamp")
+    try:
+        row["timestamp"] = datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow()
+    except (TypeError, ValueError):
+        raise IngestError(f"Invalid timestamp {timestamp}")
+    return row
+
+
+class SignalIngestor:
+    """
+    Bulk signal ingestion with deduplication on a producer-supplied idempotency key.
+
+    Rows are inserted chunk by chunk with one multi-row INSERT ... ON CONFLICT
+    DO NOTHING (rows without a key need no conflict handling and get a plain
+    INSERT), so replaying a request (or racing another worker) never creates
+    duplicates, and every accepted chunk is published in one pipelined call.
+    """
+
+    def __init__(self, chunk_size: int = 2000):
+        self.chunk_size = chunk_size
+
+    def _insert_statement(self, dialect: str):
+        if dialect == "postgresql":
+            statement = postgresql.insert(signals)
+        elif dialect == "sqlite":
+            statement = sqlite.insert(signals)
+        else:
+            return None
+        return statement.on_conflict_do_nothing(index_elements=["idempotency_key"]).returning(
+            signals.c.id, signals.c.idempotency_key
+        )
+
+    def insert_chunk(self, db: Session, rows: List[Dict]) -> List[Tuple[int, Dict]]:
+        """Insert one chunk, returning (id, row) for the rows that were not duplicates, in input order"""
+        keyed = [row for row in rows if row["idempotency_key"] is not None]
+        keyless = [row for row in rows if row["idempotency_key"] is None]
+        ids: Dict[int, int] = {}
+
+        if keyed:
+            statement = self._insert_statement(db.get_bind().dialect.name)
+            if statement is None:
+                existing = set(db.execute(
+                    select(signals.c.idempotency_key)
+                    .where(signals.c.idempotency_key.in_([row["idempotency_key"] for row in keyed]))
+                ).scalars())
+                keyed = [row for row in keyed if row["idempotency_key"] not in existing]
+                statement = insert(signals).returning(signals.c.id, signals.c.idempotency_key)
+            if keyed:
+                # Conflicting rows return nothing, so match the returned rows on their key;
+                # of a key repeated within the chunk, the first occurrence is the one inserted
+                by_key: Dict[str, Dict] = {}
+                for row in keyed:
+                    by_key.setdefault(row["idempotency_key"], row)
+                for signal_id, key in db.execute(statement, keyed).all():
+                    ids[id(by_key[key])] = signal_id
+
+        if keyless:
+            # Keyless rows never conflict; RETURNING only follows their order when asked to
+            statement = insert(signals).returning(signals.c.id, sort_by_parameter_order=True)
+            for row, signal_id in zip(keyless, db.execute(statement, keyless).scalars().all()):
+                ids[id(row)] = signal_id
+
+        return [(ids[id(row)], row) for row in rows if id(row) in ids]
+
+    async def flush(self, db: Session, rows: List[Dict], result: Dict):
+        if not rows:
+            return
+        accepted = await db_writer.run(lambda session: self.insert_chunk(session, rows), db=db)
+
+        result["accepted"] += len(accepted)
+        result["duplicates"] += len(rows) - len(accepted)
+        if accepted:
+            await redis_service.publish_batch("new_signals", [
+                {
+                    "id": signal_id,
+                    "exchange": row["exchange"],
+                    "symbol": row["symbol"],
+                    "signal_type": row["signal_type"],
+                    "confidence": row["confidence"],
+                    "price": row["price"],
+                    "timestamp": row["timestamp"].isoformat()
+                }
+                for signal_id, row in accepted
+            ])
+
+    async def ingest(self, db: Session, lines) -> Dict:
+        """
+        Ingest an async iterable of NDJSON byte chunks.
+
+        Each chunk of up to `chunk_size` signals is committed on its own; a retry
+        of a partially ingested request is safe because keyed signals dedupe.
+        """
+        result = {"accepted": 0, "duplicates": 0, "rejected": 0, "errors": []}
+        pending: List[Dict] = []
+        seen_keys = set()
+        line_number = 0
+        buffer = b""
+
+        async def handle(line: str):
+            nonlocal pending
+            line = line.strip()
+            if not line:
+                return
+            try:
+                row = parse_signal(line)
+            except IngestError as e:
+                result["rejected"] += 1
+                if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                    result["errors"].append({"line": line_number, "error": str(e)})
+                return
+
+            key = row["idempotency_key"]
+            if key is not None:
+                if key in seen_keys:
+                    result["duplicates"] += 1
+                    return
+                seen_keys.add(key)
+
+            pending.append(row)
+            if len(pending) >= self.chunk_size:
+                rows, pending = pending, []
+                await self.flush(db, rows, result)
+
+        async for chunk in lines:
+            buffer += chunk
+            end = buffer.rfind(b"\n")
+            if end < 0:
+                continue
+            # Newlines never occur inside a multi-byte UTF-8 sequence, so the
+            # complete lines can be decoded in one go
+            complete, buffer = buffer[:end].decode(), buffer[end + 1:]
+            for line in complete.split("\n"):
+                line_number += 1
+                await handle(line)
+        if buffer:
+            line_number += 1
+            await handle(buffer.decode())
+
+        await self.flush(db, pending, result)
+        result["lines"] = line_number
+        return result
+
+
+signal_ingestor = SignalIngestor()
@@ -0,0 +1,140 @@
+import ast
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Text, and_, bindparam, select, type_coerce, update
+from sqlalchemy.engine import Engine
+
+from ..models.signal import Signal
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys copied into indexed columns so they can be filtered in SQL
+PROMOTED_FIELDS = {
+    "model_version": str,
+    "market_sentiment": str,
+    "volatility": float,
+}
+
+signals = Signal.__table__
+
+
+def parse_metadata(value: Any) -> Optional[Dict]:
+    """
+    Normalize signal metadata to a dict.
+
+    Accepts a dict, JSON text, or the Python repr text older rows were
+    written with; raises ValueError for anything else.
+    """
+    if value is None or isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        raise ValueError("metadata must be an object")
+    if not value.strip():
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            raise ValueError("metadata is neither JSON nor a Python literal")
+    if not isinstance(parsed, dict):
+        raise ValueError("metadata must be an object")
+    return parsed
+
+
+def promoted_columns(metadata: Optional[Dict]) -> Dict:
+    """Values for the promoted columns; missing or mistyped keys become NULL"""
+    columns = {}
+    for field, cast in PROMOTED_FIELDS.items():
+        value = metadata.get(field) if metadata else None
+        try:
+            columns[field] = cast(value) if value is not None else None
+        except (TypeError, ValueError):
+            columns[field] = None
+    return columns
+
+
+def migrate_signal_metadata(engine: Engine, chunk_size: int = 5000) -> int:
+    """
+    Rewrite repr-text metadata as JSON and backfill the promoted columns.
+
+    Only rows whose promoted columns are all NULL are visited, and the scan
+    is keyset-paginated by id, so a rerun after the backfill touches nothing
+    but rows that genuinely carry none of the promoted keys.
+    """
+    raw = type_coerce(signals.c.signal_metadata, Text)
+    pending = and_(
+        signals.c.signal_metadata.isnot(None),
+        *[signals.c[field].is_(None) for field in PROMOTED_FIELDS]
+    )
+    statement = update(signals).where(signals.c.id == bindparam("b_id")).values(
+        signal_metadata=bindparam("b_metadata", type_=signals.c.signal_metadata.type),
+        **{field: bindparam(f"b_{field}") for field in PROMOTED_FIELDS}
+    )
+
+    migrated = 0
+    last_id = 0
+    while True:
+        # BEGIN IMMEDIATE: a read transaction cannot be upgraded once another connection has committed
+        with engine.connect().execution_options(sqlite_begin="IMMEDIATE") as conn, conn.begin():
+            rows = conn.execute(
+                select(signals.c.id, raw).where(pending, signals.c.id > last_id).order_by(signals.c.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for signal_id, value in rows:
+                try:
+                    metadata = parse_metadata(value)
+                except ValueError:
+                    # Keep unparseable text readable as a JSON string rather than losing it
+                    metadata = {"raw": value}
+                columns = promoted_columns(metadata)
+                if all(v is None for v in columns.values()) and _is_json(value):
+                    continue
+                updates.append({
+                    "b_id": signal_id,
+                    "b_metadata": metadata,
+                    **{f"b_{field}": columns[field] for field in PROMOTED_FIELDS},
+                })
+            if updates:
+                conn.execute(statement, updates)
+                migrated += len(updates)
+
+    if migrated:
+        logger.info(f"Migrated metadata of {migrated} signals to JSON")
+    return migrated
+
+
+def _is_json(value) -> bool:
+    if not isinstance(value, str):
+        return True
+    try:
+        json.loads(value)
+        return True
+    except ValueError:
+        return False
+
+
+def metadata_filters(
+    model_version: Optional[str] = None,
+    market_sentiment: Optional[str] = None,  # comma-separated for several
+    min_volatility: Optional[float] = None,
+    max_volatility: Optional[float] = None,
+) -> list:
+    """SQL predicates on the promoted metadata columns"""
+    filters = []
+    if model_version is not None:
+        filters.append(Signal.model_version == model_version)
+    if market_sentiment is not None:
+        filters.append(Signal.market_sentiment.in_([s.strip() for s in market_sentiment.split(",")]))
+    if min_volatility is not None:
+        filters.append(Signal.volatility >= min_volatility)
+    if max_volatility is not None:
+        filters.append(Signal.volatility <= max_volatility)
+    return filters
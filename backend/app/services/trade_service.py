@@ -1,26 +1,120 @@
 import ccxt
 import asyncio
-from typing import Dict, List, Optional, Any
+import time
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 import json
 import logging
 
+from .exchange_simulator import SimulatedExchange
+from .order_store import order_store
 from .redis_service import redis_service
+from .risk_engine import risk_engine
+from .shared_orders import shared_orders
 from ..models.signal import Signal
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.metrics import histogram
+from ..core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+ORDER_ID_PREFIX = "mock_order_"
+MOCK_FILL_PRICE = 50000.0
+
+# ccxt unified order statuses to ours
+EXCHANGE_STATUSES = {"open": "pending", "closed": "filled", "canceled": "cancelled", "expired": "cancelled", "rejected": "rejected"}
+
 
 class TradeService:
     def __init__(self):
         self.exchanges = {}
         self.mock_mode = True  # Start in mock mode for development
-        self.mock_orders = {}  # Store mock orders in memory
-        self.order_counter = 1
+        self.tickers: Dict[Tuple[str, str], Dict] = {}  # latest ticker per (exchange, symbol)
+        self.ticker_listeners: List[Callable[[Dict], None]] = []
+        self.order_listeners: List[Callable[[Dict], None]] = []
+        self.exchange_latency = histogram("exchange_calls")
+        self.exchange_stats = {"calls": 0, "retries": 0, "errors": 0}
+        # The event loop only keeps weak references to tasks; hold fills and watchers until they finish
+        self.tasks: Set[asyncio.Task] = set()
+        
+    def _track(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+    
+    def add_ticker_listener(self, listener: Callable[[Dict], None]):
+        """Call listener synchronously with every ticker that enters the cache"""
+        self.ticker_listeners.append(listener)
+    
+    def add_order_listener(self, listener: Callable[[Dict], None]):
+        """Call listener synchronously with every order update before it is published"""
+        self.order_listeners.append(listener)
+    
+    async def publish_order_update(self, update: Dict):
+        """Notify order listeners and publish the update on the order_updates channel"""
+        for listener in self.order_listeners:
+            try:
+                listener(update)
+            except Exception as e:
+                logger.error(f"Order listener failed: {e}")
+        await redis_service.publish_signal("order_updates", update)
+    
+    def reference_price(self, exchange: str, symbol: str, price: Optional[float] = None) -> Optional[float]:
+        """Price used to value an order: its limit price, else the cached ticker, else the mock fill price"""
+        if price is not None:
+            return price
+        ticker = self.tickers.get((exchange, symbol))
+        if ticker and ticker.get("price"):
+            return ticker["price"]
+        return MOCK_FILL_PRICE if self.mock_mode else None
+    
+    async def restore_orders(self):
+        """Reload open orders and positions persisted by a previous process"""
+        await shared_orders.advance(order_store.last_sequence(ORDER_ID_PREFIX))
+        open_orders = order_store.load_open_orders()
+        await shared_orders.restore([
+            {
+                "id": row["id"],
+                "exchange": row["exchange"],
+                "symbol": row["symbol"],
+                "side": row["side"],
+                "amount": row["amount"],
+                "price": row["price"] if row["type"] == "limit" else None,
+                "reference_price": row["price"],
+                "type": row["type"],
+                "status": row["status"],
+                "timestamp": row["created_at"].isoformat() if row["created_at"] else None,
+                "filled": row["filled"],
+                "remaining": row["amount"] - row["filled"],
+                "cost": row["cost"],
+                "user_id": row["user_id"],
+                "strategy_id": row["strategy_id"]
+            }
+            for row in open_orders
+        ])
+        risk_engine.rebuild(order_store.load_positions(), open_orders)
+        await risk_engine.sync_limits(force=True)
+    
+    def update_ticker(self, ticker: Dict):
+        """Store a ticker in the cache and notify listeners"""
+        ticker["received_at"] = time.time()
+        self.tickers[(ticker["exchange"], ticker["symbol"])] = ticker
+        for listener in self.ticker_listeners:
+            try:
+                listener(ticker)
+            except Exception as e:
+                logger.error(f"Ticker listener failed: {e}")
         
     async def initialize_exchanges(self):
-        """Initialize exchange connections in sandbox/mock mode"""
+        """Initialize exchange connections in sandbox/mock mode, or local simulators"""
+        if settings.exchange_mode == "simulated":
+            self.exchanges = {name: SimulatedExchange(name) for name in settings.simulator_exchanges}
+            self.mock_mode = False
+            logger.info(f"Trading against simulated exchanges: {', '.join(self.exchanges)}")
+            return
+        
         try:
             self.exchanges['binance'] = ccxt.binance({
                 'apiKey': 'mock_api_key',
@@ -56,10 +150,9 @@ class TradeService:
                     "exchange": exchange
                 }
             
-            exchange_client = self.exchanges[exchange]
-            ticker = await exchange_client.fetch_ticker(symbol)
+            ticker = await self._exchange_call(exchange, "fetch_ticker", symbol)
             
-            return {
+            data = {
                 "symbol": symbol,
                 "price": ticker['last'],
                 "bid": ticker['bid'],
@@ -68,6 +161,8 @@ class TradeService:
                 "timestamp": datetime.utcnow().isoformat(),
                 "exchange": exchange
             }
+            self.update_ticker(data)
+            return data
             
         except Exception as e:
             logger.error(f"Failed to get market data for {symbol} on {exchange}: {e}")
@@ -82,75 +177,360 @@ class TradeService:
                 "error": str(e)
             }
     
-    async def place_order(self, exchange: str, symbol: str, side: str, amount: float, price: Optional[float] = None) -> Dict:
-        """Place a trading order (mock implementation)"""
+    async def place_order(
+        self,
+        exchange: str,
+        symbol: str,
+        side: str,
+        amount: float,
+        price: Optional[float] = None,
+        user_id: Optional[int] = None,
+        strategy_id: Optional[int] = None,
+        order_id: Optional[str] = None
+    ) -> Dict:
+        """Place a trading order (mock implementation) after pre-trade risk checks"""
+        with tracer.span("trade.place_order", exchange=exchange, symbol=symbol, side=side, amount=amount) as span:
+            try:
+                # Fetched before the risk check: nothing may await between the check and the reservation
+                if order_id is None:
+                    await risk_engine.sync_limits()
+                    order_id = await shared_orders.next_id(ORDER_ID_PREFIX)
+                reference_price = self.reference_price(exchange, symbol, price)
+                allowed, reason = risk_engine.check(user_id, symbol, side, amount, reference_price)
+                if not allowed:
+                    logger.warning(f"Order rejected by risk checks: {side} {amount} {symbol} on {exchange}: {reason}")
+                    return {
+                        "success": False,
+                        "error": "Risk check failed",
+                        "message": reason
+                    }
+                
+                span.set(order_id=order_id)
+                
+                order = {
+                    "id": order_id,
+                    "exchange": exchange,
+                    "symbol": symbol,
+                    "side": side,  # 'buy' or 'sell'
+                    "amount": amount,
+                    "price": price,
+                    "type": "market" if price is None else "limit",
+                    "status": "pending",
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "filled": 0.0,
+                    "remaining": amount,
+                    "cost": 0.0,
+                    "reference_price": reference_price,
+                    "user_id": user_id,
+                    "strategy_id": strategy_id
+                }
+                
+                risk_engine.reserve(order_id, user_id, symbol, side, amount, reference_price)
+                
+                if not self.mock_mode and exchange in self.exchanges:
+                    return await self._place_exchange_order(order)
+                
+                await shared_orders.save(order)
+                order_store.save(order)
+                
+                self._track(self._process_mock_order(order_id))
+                
+                logger.info(f"Mock order placed: {order_id} - {side} {amount} {symbol} on {exchange}")
+                
+                return {
+                    "success": True,
+                    "order_id": order_id,
+                    "status": "pending",
+                    "message": f"Mock order placed successfully"
+                }
+                
+            except Exception as e:
+                logger.error(f"Failed to place order: {e}")
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "message": "Failed to place order"
+                }
+    
+    async def place_orders(self, exchange: str, orders: List[Dict]) -> List[Dict]:
+        """Place several orders on one exchange; results are returned in input order"""
+        # Up to exchange_order_concurrency requests in flight. Ids are taken in one round
+        # trip up front, so each order passes its risk check before its first await and the
+        # semaphore admits waiters in order: checks still see the orders in input order.
+        semaphore = asyncio.Semaphore(settings.exchange_order_concurrency)
+        await risk_engine.sync_limits()
+        order_ids = await shared_orders.next_ids(ORDER_ID_PREFIX, len(orders))
+        
+        async def place(order: Dict, order_id: str) -> Dict:
+            async with semaphore:
+                return await self.place_order(
+                    exchange=exchange,
+                    symbol=order["symbol"],
+                    side=order["side"],
+                    amount=order["amount"],
+                    price=order.get("price"),
+                    user_id=order.get("user_id"),
+                    strategy_id=order.get("strategy_id"),
+                    order_id=order_id
+                )
+        
+        return list(await asyncio.gather(*[place(order, order_id) for order, order_id in zip(orders, order_ids)]))
+    
+    async def _exchange_call(self, exchange: str, method: str, *args):
+        """Call an exchange client method, retrying network errors and rate limits with backoff"""
+        client = self.exchanges[exchange]
+        with tracer.span(f"exchange.{method}", root=False, exchange=exchange) as span:
+            for attempt in range(settings.exchange_max_retries + 1):
+                self.exchange_stats["calls"] += 1
+                start = time.perf_counter()
+                try:
+                    return await getattr(client, method)(*args)
+                except ccxt.NetworkError as e:
+                    if attempt == settings.exchange_max_retries:
+                        self.exchange_stats["errors"] += 1
+                        raise
+                    self.exchange_stats["retries"] += 1
+                    span.set(retries=attempt + 1)
+                    logger.debug(f"Retrying {method} on {exchange} after {type(e).__name__}: {e}")
+                    backoff = settings.exchange_rate_limit_backoff if isinstance(e, ccxt.RateLimitExceeded) else settings.exchange_retry_backoff
+                    await asyncio.sleep(backoff * 2 ** attempt)
+                except ccxt.BaseError:
+                    self.exchange_stats["errors"] += 1
+                    raise
+                finally:
+                    self.exchange_latency.record(time.perf_counter() - start)
+    
+    async def _place_exchange_order(self, order: Dict) -> Dict:
+        """Send an order that passed risk checks to its exchange and apply the state it reports"""
+        order_id = order["id"]
         try:
-            order_id = f"mock_order_{self.order_counter}"
-            self.order_counter += 1
-            
-            order = {
-                "id": order_id,
-                "exchange": exchange,
-                "symbol": symbol,
-                "side": side,  # 'buy' or 'sell'
-                "amount": amount,
-                "price": price,
-                "type": "market" if price is None else "limit",
-                "status": "pending",
-                "timestamp": datetime.utcnow().isoformat(),
-                "filled": 0.0,
-                "remaining": amount,
-                "cost": 0.0
-            }
-            
-            self.mock_orders[order_id] = order
-            
-            asyncio.create_task(self._process_mock_order(order_id))
-            
-            logger.info(f"Mock order placed: {order_id} - {side} {amount} {symbol} on {exchange}")
-            
+            # The clientOrderId makes retries after a lost response idempotent
+            placed = await self._exchange_call(
+                order["exchange"], "create_order", order["symbol"], order["type"], order["side"],
+                order["amount"], order["price"], {"clientOrderId": order_id}
+            )
+        except ccxt.NetworkError as e:
+            # The last attempt may have reached the exchange; only its order book can tell
+            try:
+                placed = await self._find_exchange_order(order)
+            except ccxt.BaseError as lookup_error:
+                return await self._keep_unconfirmed_order(order, lookup_error)
+            if placed is None:
+                return await self._reject_exchange_order(order, e)
+        except ccxt.BaseError as e:
+            return await self._reject_exchange_order(order, e)
+        
+        # Other workers only see the order once the exchange has acknowledged it,
+        # so none of them can cancel it locally while it is in flight
+        order["exchange_order_id"] = placed["id"]
+        changes = self._exchange_changes(order, placed)
+        order.update(changes)
+        await shared_orders.save(order)
+        if changes["filled"] > 0 or order["status"] != "pending":
+            await self._on_order_update(order, changes["filled"])
+        else:
+            order_store.save(order)
+        if order["status"] == "pending":
+            self._track(self._watch_exchange_order(order_id))
+        
+        logger.info(f"Order placed: {order_id} ({placed['id']}) - {order['side']} {order['amount']} {order['symbol']} on {order['exchange']}")
+        
+        return {
+            "success": True,
+            "order_id": order_id,
+            "status": order["status"],
+            "message": f"Order placed on {order['exchange']}"
+        }
+    
+    async def _find_exchange_order(self, order: Dict) -> Optional[Dict]:
+        """
+        Look an order up by its clientOrderId after its placement failed without a response.
+
+        Returns None only when the exchange says it has no such order; a failed
+        lookup raises, since the order may still be live.
+        """
+        try:
+            return await self._exchange_call(order["exchange"], "fetch_order", None, order["symbol"], {"clientOrderId": order["id"]})
+        except ccxt.OrderNotFound:
+            return None
+    
+    async def _keep_unconfirmed_order(self, order: Dict, error: Exception) -> Dict:
+        """Hold an order whose placement could not be confirmed either way, and resolve it by polling"""
+        logger.error(f"Order {order['id']} may be live on {order['exchange']} but could not be looked up: {error}")
+        # Stays pending with its risk reserved until the exchange's order book says otherwise
+        order["unconfirmed"] = True
+        await shared_orders.save(order)
+        order_store.save(order)
+        self._track(self._watch_exchange_order(order["id"]))
+        return {
+            "success": True,
+            "order_id": order["id"],
+            "status": "pending",
+            "message": f"Order sent to {order['exchange']}, placement not yet confirmed"
+        }
+    
+    async def _reject_exchange_order(self, order: Dict, error: Exception) -> Dict:
+        order["status"] = "rejected"
+        risk_engine.on_cancel(order["id"])
+        await shared_orders.save(order)
+        order_store.save(order)
+        logger.warning(f"Order {order['id']} rejected by {order['exchange']}: {type(error).__name__}: {error}")
+        return {
+            "success": False,
+            "error": type(error).__name__,
+            "message": str(error)
+        }
+    
+    @staticmethod
+    def _exchange_changes(order: Dict, remote: Dict) -> Dict:
+        """Fields of a local order that change to match the exchange's view of it"""
+        filled = remote.get("filled") or 0.0
+        return {
+            "status": EXCHANGE_STATUSES.get(remote.get("status"), order["status"]),
+            "filled": filled,
+            "remaining": remote.get("remaining", order["amount"] - filled),
+            "cost": remote.get("cost") or order["cost"]
+        }
+    
+    async def _apply_exchange_order(self, order: Dict, remote: Dict) -> Dict:
+        """Bring an order up to date with the exchange's view; returns its current state"""
+        changes = self._exchange_changes(order, remote)
+        fill_quantity = changes["filled"] - order["filled"]
+        if fill_quantity <= 0 and changes["status"] == order["status"]:
+            return order
+        
+        applied, current = await shared_orders.transition(order["id"], order["status"], changes)
+        if applied:
+            await self._on_order_update(current, fill_quantity)
+        return current or order
+    
+    async def _on_order_update(self, order: Dict, fill_quantity: float):
+        """Settle risk for a transition this worker made, persist it and publish it"""
+        if fill_quantity > 0:
+            risk_engine.on_fill(order["id"], fill_quantity)
+        if order["status"] in ("cancelled", "rejected"):
+            risk_engine.on_cancel(order["id"])
+        order_store.save(order)
+        
+        await self.publish_order_update({
+            "order_id": order["id"],
+            "user_id": order.get("user_id"),
+            "exchange": order["exchange"],
+            "symbol": order["symbol"],
+            "status": order["status"],
+            "filled": order["filled"],
+            "remaining": order["remaining"],
+            "cost": order["cost"],
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    
+    def _sync_risk(self, order: Optional[Dict]):
+        """Settle this worker's reservation for an order another worker filled or cancelled"""
+        if order is None:
+            return
+        if order["status"] == "filled":
+            risk_engine.on_fill(order["id"], order["amount"])
+        elif order["status"] in ("cancelled", "rejected"):
+            risk_engine.on_cancel(order["id"])
+    
+    async def _watch_exchange_order(self, order_id: str):
+        """Poll a resting exchange order until it is filled or cancelled"""
+        while True:
+            await asyncio.sleep(settings.exchange_poll_seconds)
+            order = await shared_orders.get(order_id)
+            if order is None or order["status"] != "pending":
+                self._sync_risk(order)
+                return
+            try:
+                if order.get("unconfirmed"):
+                    order = await self._confirm_exchange_order(order)
+                    if order is None or order["status"] != "pending":
+                        return
+                remote = await self._exchange_call(order["exchange"], "fetch_order", order["exchange_order_id"], order["symbol"])
+            except ccxt.OrderNotFound as e:
+                logger.warning(f"Exchange lost track of order {order_id}: {e}")
+                return
+            except ccxt.BaseError as e:
+                logger.warning(f"Failed to poll order {order_id}: {e}")
+                continue
+            await self._apply_exchange_order(order, remote)
+    
+    async def _confirm_exchange_order(self, order: Dict) -> Optional[Dict]:
+        """Find an unconfirmed order on its exchange by clientOrderId; rejects it if the exchange has none"""
+        placed = await self._find_exchange_order(order)
+        if placed is None:
+            applied, current = await shared_orders.transition(order["id"], "pending", {"status": "rejected", "unconfirmed": False})
+            if applied:
+                logger.warning(f"Order {order['id']} never reached {order['exchange']}, rejected")
+                await self._on_order_update(current, 0.0)
+            else:
+                self._sync_risk(current)
+            return current
+        applied, current = await shared_orders.transition(
+            order["id"], "pending", {"exchange_order_id": placed["id"], "unconfirmed": False}
+        )
+        if not applied:
+            self._sync_risk(current)
+            return current
+        logger.info(f"Order {order['id']} confirmed on {order['exchange']} as {placed['id']}")
+        return current
+    
+    async def _cancel_exchange_order(self, order: Dict) -> Dict:
+        try:
+            try:
+                remote = await self._exchange_call(order["exchange"], "cancel_order", order["exchange_order_id"], order["symbol"])
+            except ccxt.OrderNotFound:
+                # Filled or cancelled since the last poll; pick up its final state
+                remote = await self._exchange_call(order["exchange"], "fetch_order", order["exchange_order_id"], order["symbol"])
+        except ccxt.BaseError as e:
             return {
-                "success": True,
-                "order_id": order_id,
-                "status": "pending",
-                "message": f"Mock order placed successfully"
+                "success": False,
+                "error": type(e).__name__,
+                "message": f"Failed to cancel order {order['id']}: {e}"
             }
-            
-        except Exception as e:
-            logger.error(f"Failed to place order: {e}")
+        
+        order = await self._apply_exchange_order(order, remote)
+        if order["status"] != "cancelled":
             return {
                 "success": False,
-                "error": str(e),
-                "message": "Failed to place order"
+                "error": "Cannot cancel order",
+                "message": f"Order {order['id']} is {order['status']} and cannot be cancelled"
             }
+        logger.info(f"Order cancelled on {order['exchange']}: {order['id']}")
+        return {
+            "success": True,
+            "message": f"Order {order['id']} cancelled successfully"
+        }
     
     async def _process_mock_order(self, order_id: str):
         """Simulate order processing and filling"""
-        await asyncio.sleep(2)  # Simulate processing delay
-        
-        if order_id in self.mock_orders:
-            order = self.mock_orders[order_id]
-            
-            order["status"] = "filled"
-            order["filled"] = order["amount"]
-            order["remaining"] = 0.0
-            order["cost"] = order["amount"] * (order["price"] or 50000.0)
+        with tracer.span("trade.fill", root=False, order_id=order_id):
+            await asyncio.sleep(2)  # Simulate processing delay
             
-            await redis_service.publish_signal("order_updates", {
-                "order_id": order_id,
-                "status": "filled",
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            logger.info(f"Mock order filled: {order_id}")
+            order = await shared_orders.get(order_id)
+            if order is not None and order["status"] == "pending":
+                fill_quantity = order["remaining"]
+                applied, order = await shared_orders.transition(order_id, "pending", {
+                    "status": "filled",
+                    "filled": order["amount"],
+                    "remaining": 0.0,
+                    "cost": order["amount"] * (order["price"] or order["reference_price"] or MOCK_FILL_PRICE)
+                })
+                if applied:
+                    await self._on_order_update(order, fill_quantity)
+                    logger.info(f"Mock order filled: {order_id}")
+                    return
+            # Cancelled meanwhile, possibly by another worker
+            self._sync_risk(order)
     
     async def get_order_status(self, exchange: str, order_id: str) -> Dict:
         """Get order status"""
         try:
-            if order_id in self.mock_orders:
+            order = await shared_orders.get(order_id)
+            if order is not None:
                 return {
                     "success": True,
-                    "order": self.mock_orders[order_id]
+                    "order": order
                 }
             
             return {
@@ -170,16 +550,21 @@ class TradeService:
     async def cancel_order(self, exchange: str, order_id: str) -> Dict:
         """Cancel an order"""
         try:
-            if order_id in self.mock_orders:
-                order = self.mock_orders[order_id]
+            order = await shared_orders.get(order_id)
+            if order is not None:
+                if order["status"] == "pending" and order.get("unconfirmed"):
+                    return {
+                        "success": False,
+                        "error": "Cannot cancel order",
+                        "message": f"Order {order_id} is not confirmed by {order['exchange']} yet, retry shortly"
+                    }
+                if order["status"] == "pending" and order.get("exchange_order_id"):
+                    return await self._cancel_exchange_order(order)
+                applied = False
                 if order["status"] == "pending":
-                    order["status"] = "cancelled"
-                    
-                    await redis_service.publish_signal("order_updates", {
-                        "order_id": order_id,
-                        "status": "cancelled",
-                        "timestamp": datetime.utcnow().isoformat()
-                    })
+                    applied, order = await shared_orders.transition(order_id, "pending", {"status": "cancelled"})
+                if applied:
+                    await self._on_order_update(order, 0.0)
                     
                     logger.info(f"Mock order cancelled: {order_id}")
                     
@@ -209,8 +594,17 @@ class TradeService:
             }
     
     async def get_portfolio_balance(self, exchange: str) -> Dict:
-        """Get portfolio balance (mock implementation)"""
+        """Get portfolio balance from the exchange, or mock balances in mock mode"""
         try:
+            if not self.mock_mode and exchange in self.exchanges:
+                balance = await self._exchange_call(exchange, "fetch_balance")
+                return {
+                    "success": True,
+                    "exchange": exchange,
+                    "balances": {currency: balance[currency] for currency in balance["total"]},
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            
             return {
                 "success": True,
                 "exchange": exchange,
@@ -229,6 +623,17 @@ class TradeService:
                 "error": str(e),
                 "message": "Failed to get portfolio balance"
             }
+    
+    def get_stats(self) -> Dict:
+        return {
+            "mode": "mock" if self.mock_mode else settings.exchange_mode,
+            **self.exchange_stats,
+            "latency": self.exchange_latency.snapshot(),
+            "exchanges": {
+                name: client.get_stats() if hasattr(client, "get_stats") else {}
+                for name, client in self.exchanges.items()
+            }
+        }
 
 
 trade_service = TradeService()
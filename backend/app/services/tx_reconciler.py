@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import select
+
+from .chain_client import ChainClient, create_chain_client
+from .redis_service import redis_service
+from .wallet_service import chunked, wallet_service
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.db_writer import db_writer
+from ..models.wallet import WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+# (max age in seconds, poll interval in seconds): young transactions are
+# checked often, old ones back off so a long tail of stuck hashes stays cheap.
+POLL_SCHEDULE = [
+    (5 * 60, 15),
+    (60 * 60, 60),
+    (24 * 60 * 60, 5 * 60),
+]
+MAX_POLL_INTERVAL = 30 * 60
+
+
+def poll_interval(age_seconds: float) -> float:
+    for max_age, interval in POLL_SCHEDULE:
+        if age_seconds < max_age:
+            return interval
+    return MAX_POLL_INTERVAL
+
+
+def _age_seconds(created_at: Optional[datetime], now: datetime) -> float:
+    if created_at is None:
+        return 0.0
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return max(0.0, (now - created_at).total_seconds())
+
+
+class TransactionReconciler:
+    def __init__(self, chain_client: Optional[ChainClient] = None, session_factory=SessionLocal):
+        self.chain_client = chain_client
+        self.session_factory = session_factory
+        self.scheduler = None
+        self.next_check: Dict[str, float] = {}
+        self.stats = {"runs": 0, "checked": 0, "updated": 0, "errors": 0}
+
+    async def start(self):
+        """Start the periodic reconciliation job"""
+        if self.chain_client is None:
+            self.chain_client = create_chain_client()
+
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.run_once,
+            'interval',
+            seconds=settings.tx_reconciler_interval_seconds,
+            id='tx_reconciliation',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+        logger.info("Transaction reconciler started")
+
+    async def stop(self):
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+        if self.chain_client:
+            await self.chain_client.close()
+
+    def _pending_page(self, last_id: int) -> list:
+        """One page of pending transactions after last_id; blocking, so run it in a thread"""
+        db = self.session_factory()
+        try:
+            return db.execute(
+                select(WalletTransaction.id, WalletTransaction.hash,
+                       WalletTransaction.network, WalletTransaction.created_at)
+                .where(WalletTransaction.status == "pending", WalletTransaction.id > last_id)
+                .order_by(WalletTransaction.id)
+                .limit(settings.tx_reconciler_batch_size)
+            ).all()
+        finally:
+            db.close()
+
+    async def _due_batches(self):
+        """Yield batches of due pending transactions using keyset pagination on id"""
+        now_wall = datetime.utcnow()
+        now = time.monotonic()
+        last_id = 0
+        pending_hashes = set()
+
+        while True:
+            rows = await asyncio.to_thread(self._pending_page, last_id)
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            due = []
+            for row in rows:
+                pending_hashes.add(row.hash)
+                if self.next_check.get(row.hash, 0.0) <= now:
+                    due.append((row.hash, row.network, _age_seconds(row.created_at, now_wall)))
+            if due:
+                yield due
+
+        # Forget schedules for hashes that are no longer pending
+        for tx_hash in list(self.next_check):
+            if tx_hash not in pending_hashes:
+                del self.next_check[tx_hash]
+
+    async def _query(self, semaphore: asyncio.Semaphore, network: str, hashes: List[str]) -> Dict[str, str]:
+        async with semaphore:
+            try:
+                return await self.chain_client.get_transaction_statuses(network, hashes)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Chain status lookup failed for {len(hashes)} {network} transactions: {e}")
+                return {}
+
+    async def reconcile_batch(self, due: List[Tuple[str, str, float]]) -> List[Dict]:
+        """Query the chain for one batch concurrently and write changed statuses in bulk"""
+        by_network: Dict[str, List[str]] = {}
+        ages = {}
+        for tx_hash, network, age in due:
+            by_network.setdefault(network, []).append(tx_hash)
+            ages[tx_hash] = age
+
+        semaphore = asyncio.Semaphore(settings.tx_reconciler_concurrency)
+        lookups = [
+            self._query(semaphore, network, list(chunk))
+            for network, hashes in by_network.items()
+            for chunk in chunked(hashes, settings.tx_reconciler_lookup_size)
+        ]
+        statuses: Dict[str, str] = {}
+        for result in await asyncio.gather(*lookups):
+            statuses.update(result)
+
+        now = time.monotonic()
+        for tx_hash, age in ages.items():
+            self.next_check[tx_hash] = now + poll_interval(age)
+        self.stats["checked"] += len(ages)
+
+        changes = [
+            {"hash": tx_hash, "status": status}
+            for tx_hash, status in statuses.items()
+            if status != "pending"
+        ]
+        if not changes:
+            return []
+
+        try:
+            results = await db_writer.run(
+                lambda db: wallet_service.update_statuses(db, changes), session_factory=self.session_factory
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to write reconciled statuses: {e}")
+            return []
+
+        updated = [r for r in results if r["result"] == "updated"]
+        for item in updated:
+            self.next_check.pop(item["hash"], None)
+        self.stats["updated"] += len(updated)
+
+        if updated:
+            await redis_service.publish_signal("wallet_updates", {
+                "updates": [
+                    {"hash": r["hash"], "status": r["status"], "previous_status": r["previous_status"]}
+                    for r in updated
+                ],
+                "timestamp": datetime.utcnow().isoformat()
+            })
+        return updated
+
+    async def run_once(self) -> int:
+        """Reconcile every due pending transaction once"""
+        self.stats["runs"] += 1
+        updated = 0
+        try:
+            async for due in self._due_batches():
+                updated += len(await self.reconcile_batch(due))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error in transaction reconciliation: {e}")
+
+        if updated:
+            logger.info(f"Reconciled {updated} pending transactions")
+        return updated
+
+
+tx_reconciler = TransactionReconciler()
@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, Iterator, List, Sequence
+import logging
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.wallet import WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+VALID_STATUSES = {"pending", "confirmed", "failed"}
+
+# Fields that identify a transfer on-chain; a replayed hash with different
+# values here is reported as a conflict instead of being overwritten.
+IMMUTABLE_FIELDS = ("from_address", "to_address", "amount", "token", "network")
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class WalletService:
+    def __init__(self, lookup_chunk_size: int = 500):
+        self.lookup_chunk_size = lookup_chunk_size
+
+    def _load_existing(self, db: Session, hashes: Iterable[str]) -> Dict[str, WalletTransaction]:
+        """Fetch existing transactions for the given hashes in chunked IN queries"""
+        existing = {}
+        for chunk in chunked(list(hashes), self.lookup_chunk_size):
+            rows = db.execute(
+                select(WalletTransaction).where(WalletTransaction.hash.in_(chunk))
+            ).scalars()
+            for row in rows:
+                existing[row.hash] = row
+        return existing
+
+    def upsert_transactions(self, db: Session, transactions: List[Dict]) -> List[Dict]:
+        """
+        Idempotently insert or update a batch of transactions keyed on hash.
+
+        Runs inside the caller's transaction; the caller commits or rolls back.
+        Returns one result per input item, in input order.
+        """
+        results: List[Dict] = [None] * len(transactions)
+        seen = set()
+        unique = []
+
+        for index, tx in enumerate(transactions):
+            if tx["status"] not in VALID_STATUSES:
+                results[index] = {"hash": tx["hash"], "result": "invalid",
+                                  "error": f"Unknown status {tx['status']}"}
+            elif tx["hash"] in seen:
+                results[index] = {"hash": tx["hash"], "result": "duplicate"}
+            else:
+                seen.add(tx["hash"])
+                unique.append((index, tx))
+
+        existing = self._load_existing(db, (tx["hash"] for _, tx in unique))
+
+        to_insert = []
+        insert_indexes = []
+        to_update = []
+        for index, tx in unique:
+            current = existing.get(tx["hash"])
+            if current is None:
+                to_insert.append(tx)
+                insert_indexes.append(index)
+                continue
+
+            conflicts = [f for f in IMMUTABLE_FIELDS if getattr(current, f) != tx[f]]
+            if conflicts:
+                results[index] = {"hash": tx["hash"], "id": current.id, "result": "conflict",
+                                  "error": f"Fields differ from stored transaction: {', '.join(conflicts)}"}
+            elif current.status != tx["status"]:
+                to_update.append({"id": current.id, "status": tx["status"]})
+                results[index] = {"hash": tx["hash"], "id": current.id, "result": "updated"}
+            else:
+                results[index] = {"hash": tx["hash"], "id": current.id, "result": "unchanged"}
+
+        if to_insert:
+            ids = self.insert_transactions(db, to_insert)
+            for index, tx in zip(insert_indexes, to_insert):
+                results[index] = {"hash": tx["hash"], "id": ids[tx["hash"]], "result": "created"}
+
+        if to_update:
+            db.execute(update(WalletTransaction), to_update)
+
+        return results
+
+    def insert_transactions(self, db: Session, rows: List[Dict]) -> Dict[str, int]:
+        """Multi-row insert of new transactions, returning hash -> id"""
+        inserted = db.execute(
+            insert(WalletTransaction).returning(WalletTransaction.id, WalletTransaction.hash),
+            rows
+        )
+        return {row.hash: row.id for row in inserted}
+
+    def update_statuses(self, db: Session, updates: List[Dict]) -> List[Dict]:
+        """
+        Apply a batch of {hash, status} updates with one bulk UPDATE.
+
+        Runs inside the caller's transaction. Returns one result per input item.
+        """
+        results: List[Dict] = [None] * len(updates)
+        latest: Dict[str, int] = {}
+
+        for index, item in enumerate(updates):
+            if item["status"] not in VALID_STATUSES:
+                results[index] = {"hash": item["hash"], "result": "invalid",
+                                  "error": f"Unknown status {item['status']}"}
+            else:
+                if item["hash"] in latest:
+                    previous = latest[item["hash"]]
+                    results[previous] = {"hash": item["hash"], "result": "superseded"}
+                latest[item["hash"]] = index
+
+        existing = self._load_existing(db, latest.keys())
+
+        changes = []
+        for tx_hash, index in latest.items():
+            status = updates[index]["status"]
+            current = existing.get(tx_hash)
+            if current is None:
+                results[index] = {"hash": tx_hash, "result": "not_found"}
+            elif current.status == status:
+                results[index] = {"hash": tx_hash, "id": current.id, "result": "unchanged",
+                                  "status": status}
+            else:
+                changes.append({"id": current.id, "status": status})
+                results[index] = {"hash": tx_hash, "id": current.id, "result": "updated",
+                                  "previous_status": current.status, "status": status}
+
+        if changes:
+            db.execute(update(WalletTransaction), changes)
+
+        return results
+
+
+def summarize(results: List[Dict]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for item in results:
+        counts[item["result"]] = counts.get(item["result"], 0) + 1
+    return counts
+
+
+wallet_service = WalletService()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import and_, bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from .chain_client import ChainClient, create_chain_client
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.db_writer import db_writer
+from ..models.vault import WithdrawalRequest
+
+logger = logging.getLogger(__name__)
+
+withdrawals = WithdrawalRequest.__table__
+
+
+def processing_fee(amount: float) -> float:
+    return max(settings.withdrawal_min_fee, amount * settings.withdrawal_fee_rate)
+
+
+def _claimable(now: datetime):
+    return or_(
+        withdrawals.c.status == "pending",
+        and_(withdrawals.c.status == "processing", withdrawals.c.lease_expires_at < now)
+    )
+
+
+class WithdrawalProcessor:
+    """
+    Claims pending withdrawals in batches under a lease token and pays them out.
+
+    Any number of worker processes can run this: the claim is a single UPDATE
+    that stamps a fresh lease token (with SKIP LOCKED where the database
+    supports it), and every later write is fenced on that token, so a worker
+    whose lease expired cannot overwrite the next owner. The transfer hash is
+    persisted before broadcasting, so a request re-claimed after a crash is
+    re-broadcast under the same hash instead of paying out twice.
+    """
+
+    def __init__(self, chain_client: Optional[ChainClient] = None, session_factory=SessionLocal):
+        self.chain_client = chain_client
+        self.session_factory = session_factory
+        self.scheduler = None
+        self.stats = {"claimed": 0, "completed": 0, "retried": 0, "failed": 0}
+
+    async def start(self):
+        """Start the periodic withdrawal processing job"""
+        if self.chain_client is None:
+            self.chain_client = create_chain_client()
+
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.run_once,
+            'interval',
+            seconds=settings.withdrawal_interval_seconds,
+            id='withdrawal_processing',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+        logger.info("Withdrawal processor started")
+
+    async def stop(self):
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+
+    async def claim(self, limit: int) -> Tuple[str, List[Dict]]:
+        """Atomically lease up to `limit` claimable requests to a new token"""
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+
+        candidates = (
+            select(withdrawals.c.id)
+            .where(_claimable(now))
+            .order_by(withdrawals.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+        def lease(db: Session) -> List[Dict]:
+            # The claimable condition is repeated on the outer UPDATE so that a
+            # row taken by a concurrent claim is re-checked and skipped.
+            db.execute(
+                update(withdrawals)
+                .where(withdrawals.c.id.in_(candidates.scalar_subquery()), _claimable(now))
+                .values(
+                    status="processing",
+                    lease_token=token,
+                    lease_expires_at=now + timedelta(seconds=settings.withdrawal_lease_seconds),
+                    attempts=func.coalesce(withdrawals.c.attempts, 0) + 1
+                )
+            )
+            return [dict(row) for row in db.execute(
+                select(withdrawals.c.id, withdrawals.c.amount, withdrawals.c.withdrawal_address,
+                       withdrawals.c.transaction_hash, withdrawals.c.attempts)
+                .where(withdrawals.c.lease_token == token)
+                .order_by(withdrawals.c.id)
+            ).mappings()]
+
+        claimed = await db_writer.run(lease, session_factory=self.session_factory)
+        self.stats["claimed"] += len(claimed)
+        return token, claimed
+
+    async def _fenced_update(self, token: str, values: List[Dict], **columns):
+        """Bulk update rows by id, only where this worker still holds the lease"""
+        if not values:
+            return 0
+        statement = (
+            update(withdrawals)
+            .where(withdrawals.c.id == bindparam("b_id"), withdrawals.c.lease_token == token)
+            .values(**{name: bindparam(param) for name, param in columns.items()})
+        )
+        return await db_writer.run(lambda db: db.execute(statement, values).rowcount,
+                                   session_factory=self.session_factory)
+
+    async def _pay(self, semaphore: asyncio.Semaphore, request: Dict) -> Optional[str]:
+        async with semaphore:
+            try:
+                await self.chain_client.broadcast(settings.withdrawal_network, request["transaction_hash"])
+                return None
+            except Exception as e:
+                return str(e)
+
+    async def process_batch(self, token: str, claimed: List[Dict]) -> int:
+        network = settings.withdrawal_network
+
+        # 1. Assign transfer hashes to new requests and persist them before broadcasting
+        fresh = [r for r in claimed if not r["transaction_hash"]]
+        for request in fresh:
+            request["transaction_hash"] = await self.chain_client.prepare_transfer(
+                network, request["withdrawal_address"], request["amount"], f"withdrawal:{request['id']}"
+            )
+        await self._fenced_update(
+            token,
+            [{"b_id": r["id"], "b_hash": r["transaction_hash"]} for r in fresh],
+            transaction_hash="b_hash"
+        )
+
+        # 2. Broadcast concurrently; already-known hashes are no-ops on the node
+        semaphore = asyncio.Semaphore(settings.withdrawal_concurrency)
+        errors = await asyncio.gather(*(self._pay(semaphore, r) for r in claimed))
+
+        # 3. Record outcomes in bulk. Retries keep the row leased to nobody
+        # until a backoff expires, which is when it becomes claimable again.
+        now = datetime.utcnow()
+        finished, retry, failed = [], [], []
+        for request, error in zip(claimed, errors):
+            if error is None:
+                finished.append({"b_id": request["id"], "b_status": "completed", "b_now": now,
+                                 "b_fee": processing_fee(request["amount"]), "b_error": None})
+            elif request["attempts"] >= settings.withdrawal_max_attempts:
+                failed.append({"b_id": request["id"], "b_status": "failed", "b_now": now,
+                               "b_fee": 0.0, "b_error": error})
+            else:
+                backoff = timedelta(seconds=settings.withdrawal_interval_seconds * 2 ** request["attempts"])
+                retry.append({"b_id": request["id"], "b_error": error, "b_token": None,
+                              "b_expires": now + backoff})
+
+        done = await self._fenced_update(
+            token, [{**r, "b_token": None, "b_expires": None} for r in finished + failed],
+            status="b_status", processed_at="b_now", processing_fee="b_fee", last_error="b_error",
+            lease_token="b_token", lease_expires_at="b_expires"
+        )
+        await self._fenced_update(
+            token, retry,
+            last_error="b_error", lease_token="b_token", lease_expires_at="b_expires"
+        )
+
+        self.stats["completed"] += len(finished)
+        self.stats["failed"] += len(failed)
+        self.stats["retried"] += len(retry)
+        for request in failed:
+            logger.error(f"Withdrawal {request['b_id']} failed after {settings.withdrawal_max_attempts} attempts: {request['b_error']}")
+        return done
+
+    async def run_once(self) -> int:
+        """Claim and process batches until no claimable requests remain"""
+        processed = 0
+        try:
+            while True:
+                token, claimed = await self.claim(settings.withdrawal_batch_size)
+                if not claimed:
+                    break
+                processed += await self.process_batch(token, claimed)
+        except Exception as e:
+            logger.error(f"Error in withdrawal processing: {e}")
+
+        if processed:
+            logger.info(f"Processed {processed} withdrawal requests")
+        return processed
+
+
+withdrawal_processor = WithdrawalProcessor()
@@ -0,0 +1,53 @@
+"""
+Full arbitrage scan latency (target: 2,000 symbols x 5 exchanges under 1 ms).
+
+    python benchmarks/bench_arbitrage.py [--symbols 2000] [--exchanges 5]
+"""
+import argparse
+import random
+import time
+
+from common import report, timed
+
+from app.services.arbitrage_scanner import PriceMatrix
+
+
+def build_matrix(symbols: int, exchanges: int) -> PriceMatrix:
+    rng = random.Random(11)
+    names = [f"ex{e}" for e in range(exchanges)]
+    matrix = PriceMatrix({name: 0.001 for name in names}, default_fee=0.001, capacity=symbols)
+    now = time.time()
+    for s in range(symbols):
+        mid = rng.uniform(1, 60000)
+        for name in names:
+            # Quotes within +-0.3% of each other, so a small fraction clears the fees
+            quote = mid * (1 + rng.uniform(-0.003, 0.003))
+            matrix.update(name, f"SYM{s}/USDT", quote * 0.9995, quote * 1.0005, now)
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--exchanges", type=int, default=5)
+    args = parser.parse_args()
+
+    matrix = build_matrix(args.symbols, args.exchanges)
+    pairs = args.symbols * args.exchanges * (args.exchanges - 1)
+
+    (symbols, _, _, _), durations = timed(lambda: matrix.scan(0.001, 60.0), repeat=200)
+    report(f"scan {args.symbols}x{args.exchanges}", durations, items=pairs)
+    print(f"opportunities above 10 bps: {len(symbols)}")
+
+    rng = random.Random(5)
+    now = time.time()
+    _, durations = timed(
+        lambda: matrix.update(f"ex{rng.randrange(args.exchanges)}", f"SYM{rng.randrange(args.symbols)}/USDT",
+                              100.0, 100.1, now),
+        repeat=10000
+    )
+    report("single ticker update", durations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Bandwidth vs CPU for response compression, plus the cost of a conditional GET.
+
+    python benchmarks/bench_compression.py [--signals 100 1000 5000]
+
+For each payload size prints the compressed size, ratio, and median
+compression time per gzip level / brotli quality; then times a full
+GET /api/signals/ against a 304 revalidation of the same URL.
+"""
+import argparse
+import gzip
+import json
+import random
+
+from common import make_session_factory, report, timed
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import brotli
+
+GZIP_LEVELS = [1, 6, 9]
+BROTLI_QUALITIES = [1, 4, 6, 11]
+
+
+def make_payload(count: int) -> bytes:
+    rng = random.Random(7)
+    signals = [
+        {
+            "id": i,
+            "timestamp": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "exchange": rng.choice(["binance", "coinbase", "kraken"]),
+            "symbol": rng.choice(["BTC/USDT", "ETH/USDT", "SOL/USDT"]),
+            "signal_type": rng.choice(["BUY", "SELL", "HOLD"]),
+            "confidence": rng.uniform(0.5, 0.99),
+            "price": rng.uniform(100, 60000),
+            "volume": rng.uniform(1, 1000),
+            "metadata": json.dumps({"model_version": "1.0.0", "volatility": rng.uniform(0.1, 0.5)}),
+        }
+        for i in range(count)
+    ]
+    return json.dumps(jsonable_encoder({"signals": signals})).encode()
+
+
+def bench_codecs(count: int):
+    body = make_payload(count)
+    print(f"\n{count} signals, {len(body):,} bytes uncompressed")
+    for level in GZIP_LEVELS:
+        compressed, durations = timed(lambda: gzip.compress(body, compresslevel=level, mtime=0), repeat=7)
+        report(f"gzip -{level}  {len(compressed):>9,} B  x{len(body) / len(compressed):5.1f}", durations)
+    if brotli is None:
+        print("brotli not installed, skipping (install the compression extra)")
+        return
+    for quality in BROTLI_QUALITIES:
+        compressed, durations = timed(lambda: brotli.compress(body, quality=quality), repeat=7)
+        report(f"br q{quality:<3} {len(compressed):>9,} B  x{len(body) / len(compressed):5.1f}", durations)
+
+
+def bench_conditional_get(count: int):
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.core.database import get_db
+    from app.main import app
+    from app.models.signal import Signal
+
+    settings.rate_limit_enabled = False
+    Session = make_session_factory()
+    db = Session()
+    db.add_all(
+        Signal(exchange="binance", symbol="BTC/USDT", signal_type="BUY", confidence=0.7, price=50000.0 + i, volume=1.0)
+        for i in range(count)
+    )
+    db.commit()
+
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    params = {"limit": count}
+    etag = client.get("/api/signals/", params=params).headers["etag"]
+
+    print(f"\nGET /api/signals/?limit={count}")
+    _, durations = timed(lambda: client.get("/api/signals/", params=params), repeat=20)
+    report("full response", durations)
+    _, durations = timed(lambda: client.get("/api/signals/", params=params, headers={"If-None-Match": etag}), repeat=20)
+    report("304 revalidation", durations)
+    app.dependency_overrides.pop(get_db, None)
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signals", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    for count in args.signals:
+        bench_codecs(count)
+    bench_conditional_get(max(args.signals))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Order placement through TradeService against the local exchange simulator, under
+several latency, error-rate and rate-limit profiles, with a concurrency sweep.
+
+    python benchmarks/bench_exchange_sim.py [--orders 400] [--concurrency 1,10,50]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from common import report
+
+import app.services.trade_service as trade_module
+from app.core.config import settings
+from app.services.risk_engine import RiskEngine
+from app.services.trade_service import TradeService
+
+# name: (latency median and p99 ms, error rate, rate limit requests/s and burst)
+PROFILES = {
+    "ideal": ((0.0, 0.0), 0.0, (1e6, 1e6)),
+    "colocated": ((2.0, 10.0), 0.001, (1e6, 1e6)),
+    "internet": ((40.0, 250.0), 0.01, (1e6, 1e6)),
+    "rate-limited": ((40.0, 250.0), 0.01, (20.0, 50.0)),
+    "flaky": ((40.0, 250.0), 0.1, (1e6, 1e6)),
+}
+
+
+async def run(orders: int, concurrency: int):
+    trade_module.risk_engine = RiskEngine()
+    service = TradeService()
+    await service.initialize_exchanges()
+    await service.get_market_data("sim", "BTC/USDT")
+    # Alternating sides keep the position, and so the risk checks, flat
+    batch = [{"symbol": "BTC/USDT", "side": "buy" if i % 2 else "sell", "amount": 0.01, "user_id": 1}
+             for i in range(orders)]
+    service.exchange_latency.reset()
+    start = time.perf_counter()
+    results = await service.place_orders("sim", batch)
+    elapsed = time.perf_counter() - start
+    return service, results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--concurrency", default="1,10,50")
+    args = parser.parse_args()
+
+    # Rejections are expected under the harsher profiles; keep the output to the results
+    logging.disable(logging.CRITICAL)
+    settings.exchange_mode = "simulated"
+    settings.simulator_exchanges = ["sim"]
+    settings.exchange_retry_backoff = 0.05
+    for name, (latency_ms, error_rate, rate_limit) in PROFILES.items():
+        settings.simulator_latency_ms = latency_ms
+        settings.simulator_error_rate = error_rate
+        settings.simulator_rate_limit = rate_limit
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            settings.exchange_order_concurrency = concurrency
+            service, results, elapsed = asyncio.run(run(args.orders, concurrency))
+            failed = sum(1 for result in results if not result["success"])
+            latency = service.exchange_latency.snapshot()
+            report(f"{name} concurrency={concurrency}", [elapsed], items=args.orders)
+            print(f"    failed {failed}  retries {service.exchange_stats['retries']}"
+                  f"  call p50 {latency['p50_ms']:.1f} ms  p99 {latency['p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
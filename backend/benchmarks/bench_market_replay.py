@@ -0,0 +1,61 @@
+"""
+Market data recorder append rate and replay throughput.
+
+    python benchmarks/bench_market_replay.py [--events 1000000]
+
+Records synthetic tickers into a temporary directory, then replays them as
+fast as possible into a no-op sink and through TradeService's ticker cache.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from common import report
+
+from app.services.market_recorder import MarketDataReader, MarketRecorder, MarketReplayer
+from app.services.trade_service import trade_service
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    symbols = [f"SYM{i}/USDT" for i in range(200)]
+    exchanges = ["binance", "coinbase", "kraken"]
+    tickers = [
+        {"exchange": rng.choice(exchanges), "symbol": rng.choice(symbols), "bid": 100.0, "ask": 100.1,
+         "price": 100.05, "volume": 10.0, "received_at": 1_700_000_000 + i * 0.001}
+        for i in range(args.events)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = MarketRecorder(directory, segment_records=250_000)
+        start = time.perf_counter()
+        for ticker in tickers:
+            recorder.record_ticker(ticker)
+        recorder.close()
+        report("record", [time.perf_counter() - start], items=args.events)
+
+        reader = MarketDataReader(directory)
+        start = time.perf_counter()
+        total = sum(len(records) for records in reader.records())
+        report("mmap scan (numpy)", [time.perf_counter() - start], items=total)
+
+        replayer = MarketReplayer(reader, on_ticker=lambda ticker: None, on_order_update=lambda update: None)
+        start = time.perf_counter()
+        asyncio.run(replayer.replay(speed=None))
+        report("replay, no-op sink", [time.perf_counter() - start], items=args.events)
+
+        replayer = MarketReplayer(reader)
+        start = time.perf_counter()
+        asyncio.run(replayer.replay(speed=None))
+        report("replay into TradeService", [time.perf_counter() - start], items=args.events)
+        print(f"ticker cache size: {len(trade_service.tickers)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Model inference latency per batch versus batch size, in-process and in the worker pool.
+
+    python benchmarks/bench_model_inference.py [--backend app.services.model_backend:MockModel] [--workers 2]
+"""
+import argparse
+import asyncio
+import time
+
+from common import report
+
+from app.services.model_backend import ModelRunner
+
+BATCH_SIZES = (1, 8, 64, 512, 4096)
+
+
+async def measure(runner: ModelRunner, batch_size: int, repeat: int):
+    rows = [{"exchange": "binance", "symbol": f"SYM{i}/USDT", "price": 100.0, "volume": 1.0} for i in range(batch_size)]
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await runner.predict(rows)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def run(backend: str, workers: int, repeat: int):
+    runner = ModelRunner(backend, workers=workers)
+    await runner.start()
+    try:
+        for batch_size in BATCH_SIZES:
+            durations = await measure(runner, batch_size, repeat)
+            report(f"workers={workers} batch={batch_size}", durations, items=batch_size)
+
+        # The same 512 rows sent one at a time, as a per-symbol loop would
+        rows = 512
+        single = await measure(runner, 1, rows)
+        report(f"workers={workers} 512 x batch=1", [sum(single)], items=rows)
+    finally:
+        await runner.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="app.services.model_backend:MockModel")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.backend, 0, args.repeat))
+    asyncio.run(run(args.backend, args.workers, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
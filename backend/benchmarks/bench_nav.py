@@ -0,0 +1,74 @@
+"""
+NAV engine benchmark: vectorized mark/accrual over a large vault.
+
+    python benchmarks/bench_nav.py [--investments 1000000] [--persist 100000]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from common import make_session_factory, report, timed
+
+from app.models.vault import Investment, Vault
+from app.services.nav_engine import NAVEngine, VaultBook
+
+
+def bench_accrue(count: int):
+    rng = np.random.default_rng(7)
+    principal = rng.uniform(1000, 100000, count)
+    book = VaultBook(
+        vault_id=1,
+        ids=np.arange(1, count + 1, dtype=np.int64),
+        principal=principal,
+        units=principal / rng.uniform(0.8, 1.2, count),
+        high_water_mark=principal.copy(),
+        fees=np.zeros(count),
+        nav_per_share=1.0,
+        last_accrual_at=datetime(2025, 1, 1),
+    )
+    state = {"nav": 1.0, "at": datetime(2025, 1, 1)}
+
+    def step():
+        state["nav"] *= 1.0 + rng.normal(0.0005, 0.01)
+        state["at"] += timedelta(hours=1)
+        return book.accrue(state["nav"], state["at"], 0.02, 0.2)
+
+    _, durations = timed(step, repeat=20)
+    report(f"accrue {count:,} investments", durations, count)
+
+
+def bench_persisted_mark(count: int):
+    Session = make_session_factory()
+    db = Session()
+    vault = Vault(name="bench", nav_per_share=1.0)
+    db.add(vault)
+    db.commit()
+    db.execute(
+        Investment.__table__.insert(),
+        [{"investor_id": i, "vault_id": vault.id, "amount": 1000.0 + i % 5000, "token": "USDT",
+          "transaction_hash": f"0x{i:x}", "status": "confirmed", "entry_price": 1.0}
+         for i in range(count)]
+    )
+    db.commit()
+
+    engine = NAVEngine()
+    _, durations = timed(lambda: engine.get_book(db, vault), repeat=1)
+    report(f"load book {count:,} investments", durations, count)
+
+    navs = iter([1.01, 1.02, 0.99, 1.03, 1.05])
+    _, durations = timed(lambda: engine.mark(db, vault, next(navs)), repeat=3)
+    report(f"mark + persist {count:,} investments", durations, count)
+    db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--investments", type=int, default=1_000_000)
+    parser.add_argument("--persist", type=int, default=100_000,
+                        help="investments for the SQLite round-trip benchmark (0 to skip)")
+    args = parser.parse_args()
+
+    bench_accrue(args.investments)
+    if args.persist:
+        bench_persisted_mark(args.persist)
@@ -0,0 +1,43 @@
+"""
+Pre-trade risk check latency with many accounts and open orders.
+
+    python benchmarks/bench_risk.py [--users 10000] [--open-orders 200000] [--checks 200000]
+"""
+import argparse
+import random
+import time
+
+from common import report
+
+from app.services.risk_engine import RiskEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--open-orders", type=int, default=200_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    symbols = [f"SYM{i}/USDT" for i in range(500)]
+    engine = RiskEngine()
+    for i in range(args.open_orders):
+        engine.reserve(f"o{i}", rng.randrange(args.users), rng.choice(symbols), rng.choice(("buy", "sell")), 0.01, 100.0)
+
+    orders = [
+        (rng.randrange(args.users), rng.choice(symbols), rng.choice(("buy", "sell")), rng.uniform(0.01, 5), 100.0)
+        for _ in range(args.checks)
+    ]
+    engine.latency.reset()
+    start = time.perf_counter()
+    for order in orders:
+        engine.check(*order)
+    elapsed = time.perf_counter() - start
+
+    report(f"check ({args.open_orders:,} open orders)", [elapsed / args.checks], items=1)
+    print(engine.latency.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Bulk signal ingestion throughput on one worker (target: 50k signals/s).
+
+    python benchmarks/bench_signal_ingest.py [--signals 200000] [--chunk-size 2000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from common import make_session_factory
+
+from app.services.signal_ingest import SignalIngestor, parse_signal
+
+
+def make_body(count: int) -> bytes:
+    rng = random.Random(3)
+    lines = []
+    for i in range(count):
+        lines.append(json.dumps({
+            "idempotency_key": f"bench-{i}",
+            "exchange": rng.choice(["binance", "coinbase", "kraken"]),
+            "symbol": rng.choice(["BTC/USDT", "ETH/USDT", "SOL/USDT"]),
+            "signal_type": rng.choice(["BUY", "SELL", "HOLD"]),
+            "confidence": rng.uniform(0.5, 0.99),
+            "price": rng.uniform(100, 60000),
+            "volume": rng.uniform(1, 1000),
+            "metadata": {"model_version": "bench", "volatility": rng.uniform(0.1, 0.5)},
+        }))
+    return "\n".join(lines).encode()
+
+
+async def stream(body: bytes, size: int = 64 * 1024):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signals", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    body = make_body(args.signals)
+    lines = body.decode().split("\n")
+
+    start = time.perf_counter()
+    for line in lines:
+        parse_signal(line)
+    parse_seconds = time.perf_counter() - start
+    print(f"parse only          {args.signals / parse_seconds:12,.0f} signals/s")
+
+    Session = make_session_factory()
+    db = Session()
+    ingestor = SignalIngestor(chunk_size=args.chunk_size)
+
+    start = time.perf_counter()
+    result = asyncio.run(ingestor.ingest(db, stream(body)))
+    seconds = time.perf_counter() - start
+    print(f"ingest (new)        {result['accepted'] / seconds:12,.0f} signals/s  {result}")
+
+    start = time.perf_counter()
+    result = asyncio.run(ingestor.ingest(db, stream(body)))
+    seconds = time.perf_counter() - start
+    print(f"ingest (all dupes)  {args.signals / seconds:12,.0f} signals/s  duplicates={result['duplicates']}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
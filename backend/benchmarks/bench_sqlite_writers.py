@@ -0,0 +1,107 @@
+"""
+Concurrent small writes to a file-backed SQLite database: every thread committing on its own
+connection (default rollback journal, then WAL) versus all threads going through the single-writer queue.
+
+    python benchmarks/bench_sqlite_writers.py [--threads 16] [--writes 200]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import common  # noqa: F401  puts the backend on sys.path
+
+from app.core.database import Base, configure_sqlite
+from app.core.db_writer import DatabaseWriter
+from app.models.log import Log
+
+
+def write_one(db, i):
+    db.execute(insert(Log.__table__), [{"bot_id": f"bot-{i % 50}", "action": "trade", "status": "ok"}])
+
+
+def run(mode: str, threads: int, writes: int, path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+    if mode != "journal":
+        configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    writer = DatabaseWriter(Session, engine)
+    if mode == "writer":
+        writer.start()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_reading = threading.Event()
+
+    def work(t):
+        own = []
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                if mode == "writer":
+                    writer.run_sync(lambda db: write_one(db, i))
+                else:
+                    db = Session()
+                    try:
+                        write_one(db, i)
+                        db.commit()
+                    finally:
+                        db.close()
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+                continue
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    def read():
+        # A dashboard-style reader polling alongside the writers
+        while not stop_reading.is_set():
+            with engine.connect() as conn:
+                conn.execute(select(Log.id).order_by(Log.id.desc()).limit(50)).all()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop_reading.set()
+    reader.join()
+    writer.stop()
+    engine.dispose()
+
+    latencies.sort()
+    locked = sum("locked" in error for error in errors)
+    p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+    print(f"{mode:<8} {len(latencies) / elapsed:12,.0f} writes/s  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+          f"  errors {len(errors)} ({locked} locked)"
+          + (f"  {writer.stats['writes'] / max(writer.stats['transactions'], 1):.1f} writes/txn" if mode == "writer" else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200, help="per thread")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.writes} single-row writes, one concurrent reader")
+    for mode in ("journal", "wal", "writer"):
+        with tempfile.TemporaryDirectory() as directory:
+            run(mode, args.threads, args.writes, os.path.join(directory, "bench.db"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.core.admission import ConcurrencyLimiter, CRITICAL, LOW, NORMAL, route_class
+from app.services.rate_limiter import RateLimiter
+
+
+def test_route_classes():
+    assert route_class("/api/trade/order") == CRITICAL
+    assert route_class("/api/trade/order/mock_order_1") == CRITICAL
+    assert route_class("/api/reports/signals/analytics") == LOW
+    assert route_class("/api/signals/export") == LOW
+    assert route_class("/api/strategies/") == NORMAL
+
+
+def test_low_priority_is_shed_first():
+    limiter = ConcurrencyLimiter(10, {CRITICAL: 1.0, NORMAL: 0.8, LOW: 0.5})
+    for _ in range(5):
+        assert limiter.try_acquire(LOW)
+    assert not limiter.try_acquire(LOW)
+    for _ in range(3):
+        assert limiter.try_acquire(NORMAL)
+    assert not limiter.try_acquire(NORMAL)
+    assert limiter.try_acquire(CRITICAL)
+    assert limiter.try_acquire(CRITICAL)
+    assert not limiter.try_acquire(CRITICAL)
+
+
+def test_local_buckets_consume_all_or_nothing():
+    limiter = RateLimiter()
+    limits = [("client", 1.0, 5.0), ("client:low", 1.0, 2.0)]
+
+    assert asyncio.run(limiter.check(limits)) == (True, 0.0)
+    assert asyncio.run(limiter.check(limits)) == (True, 0.0)
+    allowed, retry_after = asyncio.run(limiter.check(limits))
+    assert not allowed and retry_after > 0
+    # The rejected request did not drain the wider client bucket
+    assert limiter.local_buckets["client"].tokens >= 2.9
+
+
+def test_rate_limited_response(client):
+    for _ in range(5):
+        assert client.get("/api/reports/logs").status_code == 200
+    response = client.get("/api/reports/logs")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
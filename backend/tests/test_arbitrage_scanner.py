@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from app.services.arbitrage_scanner import ArbitrageScanner, PriceMatrix
+
+
+def test_fee_adjusted_spreads_and_edge_triggered_publishing():
+    scanner = ArbitrageScanner(PriceMatrix({"binance": 0.001, "coinbase": 0.001}, default_fee=0.002))
+    now = time.time()
+
+    def tick(exchange, symbol, bid, ask):
+        scanner.on_ticker({"exchange": exchange, "symbol": symbol, "bid": bid, "ask": ask, "received_at": now})
+
+    tick("binance", "BTC/USDT", 99.9, 100.0)
+    tick("coinbase", "BTC/USDT", 101.0, 101.1)
+    # 0.3% gross on ETH is eaten by 0.1% + 0.2% fees
+    tick("binance", "ETH/USDT", 9.99, 10.0)
+    tick("kraken", "ETH/USDT", 10.03, 10.04)
+
+    [opportunity] = scanner.opportunities
+    assert (opportunity["symbol"], opportunity["buy_exchange"], opportunity["sell_exchange"]) == (
+        "BTC/USDT", "binance", "coinbase"
+    )
+    assert abs(opportunity["net_spread"] - (101.0 * 0.999 / (100.0 * 1.001) - 1)) < 1e-12
+
+    # Still open: not reported as new again
+    assert scanner.scan() == []
+
+    tick("coinbase", "BTC/USDT", 100.0, 100.1)
+    assert scanner.opportunities == []
+
+
+def test_scans_scheduled_from_the_loop_are_referenced_until_done():
+    scanner = ArbitrageScanner(PriceMatrix({}, default_fee=0.0))
+
+    async def scenario():
+        scanner.on_ticker({"exchange": "a", "symbol": "X", "bid": 99.0, "ask": 100.0, "received_at": time.time()})
+        scanner.on_ticker({"exchange": "b", "symbol": "X", "bid": 99.0, "ask": 100.0, "received_at": time.time()})
+        pending = len(scanner.tasks)
+        await asyncio.sleep(0)
+        return pending
+
+    # Ticks arriving before the scan runs share it
+    assert asyncio.run(scenario()) == 1
+    assert not scanner.tasks and scanner.stats["scans"] == 1
+
+
+def test_stale_quotes_are_ignored():
+    matrix = PriceMatrix({}, default_fee=0.0)
+    matrix.update("a", "X", 110.0, 111.0, at=0.0)
+    matrix.update("b", "X", 99.0, 100.0, at=1000.0)
+    symbols, _, _, _ = matrix.scan(min_spread=0.0, max_age=10.0, now=1000.0)
+    assert len(symbols) == 0
+    symbols, buys, sells, _ = matrix.scan(min_spread=0.0, max_age=2000.0, now=1000.0)
+    assert (symbols.tolist(), buys.tolist(), sells.tolist()) == ([0], [1], [0])
+
+
+def test_stale_asks_are_not_bought():
+    matrix = PriceMatrix({}, default_fee=0.0)
+    matrix.update("a", "X", 89.0, 90.0, at=0.0)
+    matrix.update("b", "X", 99.0, 100.0, at=1000.0)
+    symbols, _, _, _ = matrix.scan(min_spread=0.0, max_age=10.0, now=1000.0)
+    assert len(symbols) == 0
@@ -0,0 +1,38 @@
+from sqlalchemy import func, select
+
+from app.core.bulk import copy_rows
+from app.core.database import engine_options, normalize_url
+from app.models.log import Log
+from app.models.signal import Signal
+
+
+def test_postgres_urls_use_psycopg_with_pooling():
+    assert normalize_url("postgresql://u:p@db/app") == "postgresql+psycopg://u:p@db/app"
+    assert normalize_url("postgres://u:p@db/app") == "postgresql+psycopg://u:p@db/app"
+    assert normalize_url("postgresql+asyncpg://db/app") == "postgresql+asyncpg://db/app"
+    assert normalize_url("sqlite:///./x.db") == "sqlite:///./x.db"
+
+    options = engine_options("postgresql+psycopg://db/app")
+    assert options["pool_pre_ping"] and options["pool_size"] > 0
+    assert "statement_timeout" in options["connect_args"]["options"]
+    assert engine_options("sqlite:///./x.db") == {"connect_args": {"check_same_thread": False}}
+
+
+def test_copy_rows_fallback(db_session):
+    rows = [{"exchange": "binance", "symbol": "BTC/USDT", "signal_type": "BUY", "confidence": 0.5,
+             "price": 1.0, "signal_metadata": {"model_version": "x"}} for _ in range(2500)]
+    assert copy_rows(db_session, Signal.__table__, rows) == 2500
+    assert copy_rows(db_session, Signal.__table__, []) == 0
+    db_session.commit()
+    assert db_session.scalar(select(func.count()).select_from(Signal)) == 2500
+    assert db_session.query(Signal).first().signal_metadata == {"model_version": "x"}
+
+
+def test_bulk_log_ingestion(client, db_session):
+    response = client.post("/api/reports/logs", json=[
+        {"bot_id": "b1", "action": "trade", "status": "ok"},
+        {"bot_id": "b2", "action": "cancel", "status": "error", "metadata": "{\"reason\": \"timeout\"}"},
+    ])
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 2
+    assert {log.bot_id for log in db_session.query(Log)} == {"b1", "b2"}
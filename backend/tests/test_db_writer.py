@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, configure_sqlite
+from app.core.db_writer import DatabaseWriter
+from app.models.log import Log
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writer.db'}", connect_args={"check_same_thread": False})
+    configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def writer(file_engine):
+    writer = DatabaseWriter(sessionmaker(autocommit=False, autoflush=False, bind=file_engine), file_engine)
+    writer.start()
+    try:
+        yield writer
+    finally:
+        writer.stop()
+
+
+def _log(action):
+    return lambda db: db.execute(insert(Log.__table__).returning(Log.__table__.c.id),
+                                 [{"bot_id": "b", "action": action, "status": "ok"}]).scalar_one()
+
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(Log))
+
+
+def test_sqlite_pragmas(file_engine):
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+
+def test_queued_writes_share_transactions(writer, file_engine):
+    async def main():
+        return await asyncio.gather(*[writer.run(_log(f"a{i}")) for i in range(200)])
+
+    ids = asyncio.run(main())
+    assert len(set(ids)) == 200
+    assert _count(file_engine) == 200
+    stats = writer.get_stats()
+    assert stats["running"] and stats["writes"] == 200 and stats["failed"] == 0
+    assert stats["transactions"] < 200
+
+
+def test_failing_write_only_rolls_back_itself(writer, file_engine):
+    def fail(db):
+        _log("doomed")(db)
+        raise ValueError("boom")
+
+    futures = [writer.submit(_log("before")), writer.submit(fail), writer.submit(_log("after"))]
+    assert futures[0].result() and futures[2].result()
+    with pytest.raises(ValueError):
+        futures[1].result()
+    with file_engine.connect() as conn:
+        assert set(conn.scalars(select(Log.action))) == {"before", "after"}
+    assert writer.get_stats()["failed"] == 1
+
+
+def test_runs_directly_when_not_running(file_engine, db_session):
+    writer = DatabaseWriter(sessionmaker(bind=file_engine), file_engine)
+    assert not writer.running
+    assert asyncio.run(writer.run(_log("direct")))
+    assert writer.run_sync(_log("sync"))
+    assert _count(file_engine) == 2
+
+    # A session on another database is committed in place even while the writer runs
+    writer.start()
+    try:
+        asyncio.run(writer.run(_log("other"), db=db_session))
+    finally:
+        writer.stop()
+    assert db_session.scalar(select(func.count()).select_from(Log)) == 1
+    assert _count(file_engine) == 2
+    assert writer.get_stats()["writes"] == 0
@@ -0,0 +1,172 @@
+import asyncio
+
+import ccxt
+import pytest
+
+from app.core.config import settings
+from app.services.exchange_simulator import SimulatedExchange
+from app.services import trade_service as trade_module
+from app.services.risk_engine import RiskEngine
+from app.services.trade_service import TradeService
+
+
+def make_exchange(**kwargs):
+    options = {"latency_ms": (0.0, 0.0), "error_rate": 0.0, "rate_limit": (1000.0, 1000.0), "seed": 1}
+    return SimulatedExchange("sim", **{**options, **kwargs})
+
+
+def test_market_orders_fill_and_move_balances():
+    exchange = make_exchange(balances={"USDT": 100_000.0, "BTC": 1.0})
+
+    async def scenario():
+        ticker = await exchange.fetch_ticker("BTC/USDT")
+        assert ticker["bid"] < ticker["last"] < ticker["ask"]
+        order = await exchange.create_order("BTC/USDT", "market", "buy", 0.5, None, {"clientOrderId": "c1"})
+        # A retried request with the same clientOrderId returns the original order
+        again = await exchange.create_order("BTC/USDT", "market", "buy", 0.5, None, {"clientOrderId": "c1"})
+        return order, again, await exchange.fetch_balance()
+
+    order, again, balance = asyncio.run(scenario())
+    assert order["status"] == "closed" and order["filled"] == 0.5 and order["average"] > 0
+    assert again["id"] == order["id"] and exchange.stats["orders"] == 1
+    assert balance["BTC"]["free"] == pytest.approx(1.5)
+    assert balance["USDT"]["free"] == pytest.approx(100_000.0 - order["cost"] - order["fee"]["cost"])
+    assert balance["USDT"]["used"] == pytest.approx(0.0)
+
+
+def test_limit_orders_rest_lock_funds_and_cancel():
+    exchange = make_exchange(balances={"USDT": 100_000.0})
+
+    async def scenario():
+        with pytest.raises(ccxt.InsufficientFunds):
+            await exchange.create_order("BTC/USDT", "limit", "buy", 10, 40_000.0)
+        order = await exchange.create_order("BTC/USDT", "limit", "buy", 1, 40_000.0)
+        locked = (await exchange.fetch_balance())["USDT"]["used"]
+        cancelled = await exchange.cancel_order(order["id"])
+        with pytest.raises(ccxt.OrderNotFound):
+            await exchange.cancel_order(order["id"])
+        return order, locked, cancelled, await exchange.fetch_balance()
+
+    order, locked, cancelled, balance = asyncio.run(scenario())
+    assert order["status"] == "open" and locked > 40_000.0
+    assert cancelled["status"] == "canceled"
+    assert balance["USDT"]["free"] == pytest.approx(100_000.0) and balance["USDT"]["used"] == pytest.approx(0.0)
+
+
+def test_rate_limit_raises_429():
+    exchange = make_exchange(rate_limit=(0.001, 3.0))
+
+    async def scenario():
+        results = await asyncio.gather(*[exchange.fetch_ticker("ETH/USDT") for _ in range(5)], return_exceptions=True)
+        return [type(result) for result in results]
+
+    outcomes = asyncio.run(scenario())
+    assert outcomes.count(ccxt.RateLimitExceeded) == 2
+    assert exchange.stats["rate_limited"] == 2
+
+
+@pytest.fixture
+def simulated(monkeypatch):
+    monkeypatch.setattr(settings, "exchange_mode", "simulated")
+    monkeypatch.setattr(settings, "simulator_exchanges", ["sim"])
+    monkeypatch.setattr(settings, "simulator_latency_ms", (0.0, 0.0))
+    monkeypatch.setattr(settings, "simulator_error_rate", 0.0)
+    monkeypatch.setattr(settings, "simulator_rate_limit", (1000.0, 1000.0))
+    monkeypatch.setattr(settings, "exchange_retry_backoff", 0.0)
+    monkeypatch.setattr(settings, "exchange_poll_seconds", 0.01)
+    engine = RiskEngine()
+    monkeypatch.setattr(trade_module, "risk_engine", engine)
+    service = TradeService()
+    asyncio.run(service.initialize_exchanges())
+    yield service
+    # The check latency histogram is process-wide
+    engine.latency.reset()
+
+
+def test_trade_service_places_orders_on_simulator(simulated):
+    user_id = 4901
+
+    async def scenario():
+        await simulated.get_market_data("sim", "BTC/USDT")
+        results = await simulated.place_orders("sim", [
+            {"symbol": "BTC/USDT", "side": side, "amount": 0.1, "user_id": user_id}
+            for side in ("buy", "sell", "buy")
+        ])
+        resting = await simulated.place_order("sim", "BTC/USDT", "buy", 0.1, price=1000.0, user_id=user_id)
+        cancelled = await simulated.cancel_order("sim", resting["order_id"])
+        return results, resting, cancelled
+
+    results, resting, cancelled = asyncio.run(scenario())
+    assert [result["status"] for result in results] == ["filled"] * 3
+    assert resting["status"] == "pending" and cancelled["success"]
+    exposure = trade_module.risk_engine.exposure(user_id)
+    assert exposure["positions"]["BTC/USDT"] == pytest.approx(0.1) and exposure["open_orders"] == 0
+    assert simulated.get_stats()["exchanges"]["sim"]["fills"] == 3
+
+
+def test_trade_service_tracks_orders_it_could_not_confirm(simulated, monkeypatch):
+    user_id = 4903
+    exchange = simulated.exchanges["sim"]
+    create_order, fetch_order = exchange.create_order, exchange.fetch_order
+    outage = {"on": True}
+
+    async def lossy_create(symbol, type, side, amount, price=None, params=None):
+        # The first order reaches the book, the second never does; neither response arrives
+        if amount == 0.1:
+            await create_order(symbol, type, side, amount, price, params)
+        raise ccxt.NetworkError("sim connection reset by peer")
+
+    async def flaky_fetch(id, symbol=None, params=None):
+        if outage["on"]:
+            raise ccxt.ExchangeNotAvailable("sim 503 Service Unavailable")
+        return await fetch_order(id, symbol, params)
+
+    monkeypatch.setattr(exchange, "create_order", lossy_create)
+    monkeypatch.setattr(exchange, "fetch_order", flaky_fetch)
+
+    async def scenario():
+        await simulated.get_market_data("sim", "BTC/USDT")
+        live = await simulated.place_order("sim", "BTC/USDT", "buy", 0.1, price=1000.0, user_id=user_id)
+        lost = await simulated.place_order("sim", "BTC/USDT", "buy", 0.2, price=1000.0, user_id=user_id)
+        held = trade_module.risk_engine.exposure(user_id)["open_orders"]
+        watching = len(simulated.tasks)
+        refused = await simulated.cancel_order("sim", live["order_id"])
+        outage["on"] = False
+        await asyncio.sleep(0.1)
+        statuses = [dict((await simulated.get_order_status("sim", result["order_id"]))["order"]) for result in (live, lost)]
+        cancelled = await simulated.cancel_order("sim", live["order_id"])
+        await asyncio.sleep(0.05)
+        return live, lost, held, watching, refused, statuses, cancelled
+
+    live, lost, held, watching, refused, (confirmed, rejected), cancelled = asyncio.run(scenario())
+    # Unconfirmed orders stay pending with their risk reserved rather than being rejected
+    assert live["status"] == lost["status"] == "pending" and held == 2
+    assert not refused["success"]
+    assert confirmed["status"] == "pending" and confirmed["exchange_order_id"]
+    assert rejected["status"] == "rejected"
+    assert cancelled["success"]
+    assert trade_module.risk_engine.exposure(user_id)["open_orders"] == 0
+    assert exchange.stats["orders"] == 1
+    # Watchers are referenced until they finish
+    assert watching == 2 and not simulated.tasks
+
+
+def test_trade_service_retries_lost_responses_idempotently(simulated):
+    exchange = simulated.exchanges["sim"]
+    exchange.error_rate = 0.4
+    exchange.rng.seed(3)
+
+    async def scenario():
+        await simulated.get_market_data("sim", "ETH/USDT")
+        return await simulated.place_orders("sim", [
+            {"symbol": "ETH/USDT", "side": "buy" if i % 2 else "sell", "amount": 1.0, "user_id": 4902}
+            for i in range(20)
+        ])
+
+    results = asyncio.run(scenario())
+    placed = [result for result in results if result["success"]]
+    assert simulated.exchange_stats["retries"] > 0
+    # Lost responses were retried with the same clientOrderId, so nothing was placed twice
+    assert exchange.stats["orders"] == len(placed)
+    assert all(not result["success"] and result["error"] in ("NetworkError", "RequestTimeout")
+               for result in results if result not in placed)
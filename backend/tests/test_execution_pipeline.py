@@ -0,0 +1,101 @@
+import asyncio
+import json
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy.orm import sessionmaker
+
+from app.core.metrics import LatencyHistogram
+from app.models.strategy import Strategy
+from app.models.user import User
+from app.services import execution_pipeline as pipeline_module
+from app.services.execution_pipeline import ExecutionPipeline
+from app.services.redis_service import redis_service
+
+
+def test_signals_become_batched_orders(db_session, monkeypatch):
+    user = User(email="trader@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    db_session.add_all([
+        Strategy(user_id=user.id, name="auto", market="BTC/USDT", state="active",
+                 config=json.dumps({"auto_execute": True, "min_confidence": 0.8, "notional": 1000})),
+        Strategy(user_id=user.id, name="manual", market="BTC/USDT", state="active", config="{}"),
+        Strategy(user_id=user.id, name="paused", market="BTC/USDT", state="inactive",
+                 config=json.dumps({"auto_execute": True})),
+    ])
+    db_session.commit()
+
+    batches = []
+
+    async def place_orders(exchange, orders):
+        batches.append((exchange, orders))
+        return [{"success": True, "order_id": f"o{i}"} for i in range(len(orders))]
+
+    monkeypatch.setattr(pipeline_module.trade_service, "place_orders", place_orders)
+    pipeline = ExecutionPipeline(sessionmaker(bind=db_session.get_bind()))
+    pipeline.load_strategies()
+
+    def signal(signal_id, exchange="binance", confidence=0.9, signal_type="BUY"):
+        return {"id": signal_id, "exchange": exchange, "symbol": "BTC/USDT", "signal_type": signal_type,
+                "confidence": confidence, "price": 50000.0, "timestamp": datetime.utcnow().isoformat()}
+
+    async def scenario():
+        await pipeline.submit(signal(1))
+        await pipeline.submit(signal(1))  # redelivery
+        await pipeline.submit(signal(2, confidence=0.7))  # below threshold
+        await pipeline.submit(signal(3, signal_type="HOLD"))
+        await pipeline.submit(signal(4, signal_type="SELL", confidence=1.0))
+        await pipeline.submit(signal(5, exchange="coinbase"))
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    by_exchange = {exchange: orders for exchange, orders in batches}
+    assert len(batches) == 2
+    assert [(o["signal_id"], o["side"]) for o in by_exchange["binance"]] == [(1, "buy"), (4, "sell")]
+    assert by_exchange["binance"][1]["amount"] == 1000 / 50000.0
+    assert [o["signal_id"] for o in by_exchange["coinbase"]] == [5]
+    assert pipeline.stats["duplicates"] == 1
+    assert pipeline.end_to_end.total == 3
+
+
+def test_each_signal_is_executed_by_one_worker(db_session, monkeypatch):
+    user = User(email="workers@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    db_session.add(Strategy(user_id=user.id, name="auto", market="ETH/USDT", state="active",
+                            config=json.dumps({"auto_execute": True, "min_confidence": 0.5})))
+    db_session.commit()
+    monkeypatch.setattr(redis_service, "redis_client", fakeredis.FakeAsyncRedis())
+
+    placed = []
+
+    async def place_orders(exchange, orders):
+        placed.extend(orders)
+        return [{"success": True, "order_id": f"o{i}"} for i in range(len(orders))]
+
+    monkeypatch.setattr(pipeline_module.trade_service, "place_orders", place_orders)
+    workers = [ExecutionPipeline(sessionmaker(bind=db_session.get_bind())) for _ in range(2)]
+    for worker in workers:
+        worker.load_strategies()
+    signal = {"id": 42, "exchange": "binance", "symbol": "ETH/USDT", "signal_type": "BUY",
+              "confidence": 0.9, "price": 3000.0}
+
+    async def scenario():
+        # Both workers receive the same published signal
+        await asyncio.gather(*[worker.submit(dict(signal)) for worker in workers])
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert [order["signal_id"] for order in placed] == [42]
+    assert sorted(worker.stats["claimed_elsewhere"] for worker in workers) == [0, 1]
+
+
+def test_latency_histogram_percentiles():
+    h = LatencyHistogram("test")
+    for ms in range(1, 101):
+        h.record(ms / 1000)
+    assert abs(h.percentile(50) - 0.050) < 0.050 * 0.13
+    assert abs(h.percentile(99) - 0.099) < 0.099 * 0.13
+    assert h.percentile(100) == 0.1
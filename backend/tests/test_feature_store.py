@@ -0,0 +1,62 @@
+import asyncio
+import math
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.services.feature_store import FeatureStore
+
+
+def _store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return FeatureStore(interval=60, hot_window=3, session_factory=sessionmaker(bind=engine))
+
+
+def _feed(store, exchange, symbol, prices, start=6000.0):
+    for i, price in enumerate(prices):
+        # Two ticks per bar; the later one is the close
+        store.on_ticker({"exchange": exchange, "symbol": symbol, "price": price - 1, "volume": 10.0 + i,
+                         "recorded_at": start + i * 60})
+        store.on_ticker({"exchange": exchange, "symbol": symbol, "price": price, "volume": 10.0 + i,
+                         "recorded_at": start + i * 60 + 30})
+
+
+def test_bars_are_computed_once_and_served_from_every_tier():
+    store = _store()
+    _feed(store, "binance", "BTC/USDT", [100.0, 110.0, 99.0, 105.0, 120.0, 130.0])
+    _feed(store, "kraken", "ETH/USDT", [10.0, 11.0])
+
+    # Six bars started, five closed; the first close has no return yet
+    assert store.stats["bars"] == 6
+    assert store.stats["computed"] == 4
+    latest = asyncio.run(store.get_many([("binance", "BTC/USDT"), ("kraken", "ETH/USDT")]))
+    btc = latest[("binance", "BTC/USDT")]
+    assert btc["timestamp"] == 6000.0 + 5 * 60  # close of the fifth bar
+    assert math.isclose(btc["values"]["return_1"], math.log(120.0 / 105.0))
+    assert math.isclose(btc["values"]["return_window"], math.log(120.0 / 100.0))
+    assert latest[("kraken", "ETH/USDT")] is None
+    assert store.stats["hot_hits"] == 1
+
+    rows = list(store.pending)
+    assert asyncio.run(store.flush()) == 4
+    # Another worker computing the same bars does not duplicate them
+    asyncio.run(store.write(rows))
+    # Only three bars stay hot; an older point in time is answered from the history
+    early = asyncio.run(store.get_many([("binance", "BTC/USDT")], at=6000.0 + 2 * 60 + 1))
+    assert early[("binance", "BTC/USDT")]["timestamp"] == 6000.0 + 2 * 60
+    assert math.isclose(early[("binance", "BTC/USDT")]["values"]["return_1"], math.log(110.0 / 100.0))
+    assert store.stats["history_hits"] == 1
+
+    history = store.history("binance", "BTC/USDT")
+    assert [row["timestamp"] for row in history] == [6000.0 + i * 60 for i in range(2, 6)]
+
+
+def test_late_ticks_are_ignored():
+    store = _store()
+    store.on_ticker({"exchange": "binance", "symbol": "BTC/USDT", "price": 100.0, "recorded_at": 6000.0})
+    store.on_ticker({"exchange": "binance", "symbol": "BTC/USDT", "price": 101.0, "recorded_at": 6060.0})
+    store.on_ticker({"exchange": "binance", "symbol": "BTC/USDT", "price": 999.0, "recorded_at": 6010.0})
+    assert store.series[("binance", "BTC/USDT")].price == 101.0
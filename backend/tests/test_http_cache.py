@@ -0,0 +1,84 @@
+from app.core.compression import choose_encoding
+from app.core.config import settings
+from app.models.signal import Signal
+from app.models.strategy import Strategy
+
+
+def add_signals(db_session, count):
+    for i in range(count):
+        db_session.add(Signal(
+            exchange="binance", symbol="BTC/USDT", signal_type="BUY",
+            confidence=0.5, price=50000.0 + i, volume=1.0, signal_metadata={}
+        ))
+    db_session.commit()
+
+
+def test_signals_list_revalidates_with_etag(client, db_session):
+    add_signals(db_session, 3)
+
+    first = client.get("/api/signals/", params={"exchange": "binance"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "last-modified" in first.headers
+
+    unchanged = client.get("/api/signals/", params={"exchange": "binance"}, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    other_query = client.get("/api/signals/", params={"exchange": "kraken"}, headers={"If-None-Match": etag})
+    assert other_query.status_code == 200
+
+    add_signals(db_session, 1)
+    changed = client.get("/api/signals/", params={"exchange": "binance"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()["signals"]) == 4
+
+
+def test_performance_report_sees_edits_within_one_second(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "cache_single_process", True)
+    strategy = Strategy(user_id=1, name="first", market="BTC/USDT", config="{}")
+    db_session.add(strategy)
+    db_session.commit()
+    client.put(f"/api/strategies/{strategy.id}", params={"name": "second"})
+
+    first = client.get("/api/reports/performance")
+    etag = first.headers["etag"]
+
+    # updated_at is stored to the second, so only the tag version tells these edits apart
+    client.put(f"/api/strategies/{strategy.id}", params={"name": "third"})
+    changed = client.get("/api/reports/performance", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["strategies"][0]["name"] == "third"
+
+
+def test_strategy_responses_skip_validators_without_tag_versions(client, db_session, monkeypatch):
+    # No Redis and no single-process versions: an edit within the same second would go unnoticed
+    monkeypatch.setattr(settings, "cache_single_process", False)
+    db_session.add(Strategy(user_id=1, name="first", market="BTC/USDT", config="{}"))
+    db_session.commit()
+
+    for path in ("/api/reports/performance", "/api/strategies/"):
+        response = client.get(path, headers={"If-None-Match": "*", "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        assert response.status_code == 200
+        assert "etag" not in response.headers and "last-modified" not in response.headers
+
+
+def test_large_responses_are_compressed(client, db_session):
+    add_signals(db_session, 50)
+
+    response = client.get("/api/signals/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(response.json()["signals"]) == 50
+
+    raw = client.get("/api/signals/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+
+    small = client.get("/healthz", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_encoding_negotiation():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*;q=0.5") in ("br", "gzip")
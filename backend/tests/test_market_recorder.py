@@ -0,0 +1,52 @@
+import asyncio
+import math
+
+from app.services.market_recorder import MarketDataReader, MarketRecorder, MarketReplayer
+
+
+def test_record_roll_and_replay(tmp_path):
+    recorder = MarketRecorder(str(tmp_path), segment_records=3)
+    for i in range(5):
+        recorder.record_ticker({"exchange": "binance", "symbol": "BTC/USDT", "bid": 100.0 + i, "ask": 101.0 + i,
+                                "price": 100.5 + i, "volume": None, "received_at": 1000.0 + i * 0.01})
+    recorder.record_order_update({"order_id": "mock_order_1", "exchange": "binance", "symbol": "BTC/USDT",
+                                  "status": "filled", "filled": 1.0, "remaining": 0.0, "cost": 100.0})
+    recorder.close()
+    assert recorder.stats["segments"] == 2
+
+    # Reopening resumes the partially filled second segment
+    recorder = MarketRecorder(str(tmp_path), segment_records=3)
+    recorder.record_ticker({"exchange": "kraken", "symbol": "ETH/USDT", "bid": 1.0, "ask": 2.0, "received_at": 2000.0})
+    recorder.close()
+
+    reader = MarketDataReader(str(tmp_path))
+    events = list(reader.events())
+    assert len(events) == 7
+    assert [e["bid"] for e in events[:5]] == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert events[0]["volume"] is None
+    assert events[5]["kind"] == "order_update"
+    assert (events[5]["order_id"], events[5]["status"], events[5]["cost"]) == ("mock_order_1", "filled", 100.0)
+    assert events[6]["exchange"] == "kraken"
+    assert [e["bid"] for e in reader.events(start=1000.02, end=1000.04)] == [102.0, 103.0]
+
+    tickers, updates = [], []
+
+    async def on_order_update(update):
+        updates.append(update)
+
+    replayer = MarketReplayer(reader, on_ticker=tickers.append, on_order_update=on_order_update)
+    assert asyncio.run(replayer.replay(speed=None)) == 7
+    assert len(tickers) == 6 and len(updates) == 1
+    assert all(t["replayed"] for t in tickers)
+
+    # Five tickers 10 ms apart replayed at 10x take about 4 ms, not 40 ms
+    loop_time = asyncio.run(_timed(replayer.replay(speed=10.0, end=1000.05)))
+    assert loop_time < 0.03
+    assert math.isclose(tickers[-1]["bid"], 104.0)
+
+
+async def _timed(coroutine):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await coroutine
+    return loop.time() - start
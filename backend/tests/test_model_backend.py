@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from app.services.ai_service import ai_service
+from app.services.model_backend import ModelBackend, ModelRunner, model_runner
+
+
+class EchoModel(ModelBackend):
+    version = "echo"
+
+    def load(self):
+        self.loads = getattr(self, "loads", 0) + 1
+
+    def predict(self, rows):
+        return [{"signal_type": "HOLD", "confidence": 0.5, "metadata": {"model_version": self.version,
+                 "symbol": row["symbol"], "loads": self.loads}} for row in rows]
+
+
+class ShortModel(ModelBackend):
+    def predict(self, rows):
+        return rows[1:]
+
+
+class IncompleteModel(ModelBackend):
+    version = "incomplete"
+
+
+class WorkerlessModel(EchoModel):
+    def load(self):
+        if multiprocessing.parent_process() is not None:
+            raise RuntimeError("no model in worker processes")
+        super().load()
+
+
+def test_in_process_runner_batches():
+    runner = ModelRunner("tests.test_model_backend:EchoModel", workers=0)
+    rows = [{"symbol": f"S{i}/USDT"} for i in range(10)]
+    predictions = asyncio.run(runner.predict(rows))
+    assert [p["metadata"]["symbol"] for p in predictions] == [r["symbol"] for r in rows]
+    again = asyncio.run(runner.predict(rows))
+    assert again[0]["metadata"]["loads"] == 1
+    assert runner.stats == {"batches": 2, "rows": 20, "errors": 0}
+
+
+def test_backend_without_predict_fails_to_load():
+    runner = ModelRunner("tests.test_model_backend:IncompleteModel", workers=0)
+    with pytest.raises(TypeError):
+        asyncio.run(runner.start())
+
+
+def test_prediction_count_mismatch_is_an_error():
+    runner = ModelRunner("tests.test_model_backend:ShortModel", workers=0)
+    with pytest.raises(ValueError):
+        asyncio.run(runner.predict([{"symbol": "A/USDT"}, {"symbol": "B/USDT"}]))
+
+
+def test_process_pool_runner():
+    async def run():
+        runner = ModelRunner("app.services.model_backend:MockModel", workers=1)
+        await runner.start()
+        try:
+            return await runner.predict([{"symbol": "BTC/USDT"}] * 3)
+        finally:
+            await runner.stop()
+
+    predictions = asyncio.run(run())
+    assert len(predictions) == 3
+    assert all(p["signal_type"] in ("BUY", "SELL", "HOLD") and 0.6 <= p["confidence"] <= 0.95 for p in predictions)
+
+
+def test_pool_that_cannot_start_falls_back_to_in_process():
+    async def run():
+        runner = ModelRunner("tests.test_model_backend:WorkerlessModel", workers=1)
+        await runner.start()
+        try:
+            return runner._pool, await runner.predict([{"symbol": "BTC/USDT"}])
+        finally:
+            await runner.stop()
+
+    pool, [prediction] = asyncio.run(run())
+    assert pool is None and prediction["metadata"]["loads"] == 1
+
+
+def test_generate_signals_uses_one_batch(monkeypatch):
+    monkeypatch.setattr(ai_service, "model_loaded", True)
+    monkeypatch.setattr(model_runner, "workers", 0)
+    batches = model_runner.stats["batches"]
+    signals = asyncio.run(ai_service.generate_signals([
+        ("binance", "BTC/USDT", {"price": 100.0, "volume": 5.0}),
+        ("kraken", "ETH/USDT", None),
+    ]))
+    asyncio.run(model_runner.stop())
+    assert model_runner.stats["batches"] == batches + 1
+    assert (signals[0]["exchange"], signals[0]["price"], signals[0]["volume"]) == ("binance", 100.0, 5.0)
+    assert signals[1]["symbol"] == "ETH/USDT" and signals[1]["metadata"]["model_version"] == "v1.0"
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.vault import Investment, Vault
+from app.services.nav_engine import NAVEngine, VaultBook
+
+
+def _book(principal, entry):
+    principal = np.array(principal, dtype=float)
+    return VaultBook(
+        vault_id=1,
+        ids=np.arange(1, len(principal) + 1),
+        principal=principal,
+        units=principal / np.array(entry, dtype=float),
+        high_water_mark=principal.copy(),
+        fees=np.zeros(len(principal)),
+        nav_per_share=1.0,
+        last_accrual_at=datetime(2025, 1, 1),
+    )
+
+
+def test_management_fee_is_prorated_over_elapsed_time():
+    book = _book([1000.0], [1.0])
+    accrued = book.accrue(1.0, datetime(2026, 1, 1), management_fee=0.02, performance_fee=0.0)
+    assert accrued["management_fee"] == pytest.approx(20.0)
+    assert book.value[0] == pytest.approx(980.0)
+
+
+def test_performance_fee_only_charged_above_high_water_mark():
+    book = _book([1000.0, 1000.0], [1.0, 1.25])
+    start = datetime(2025, 1, 1)
+
+    book.accrue(1.25, start, management_fee=0.0, performance_fee=0.2)
+    # First investment gained 250, second entered at 1.25 and is flat
+    assert book.fees.tolist() == pytest.approx([50.0, 0.0])
+
+    book.accrue(1.0, start, management_fee=0.0, performance_fee=0.2)
+    book.accrue(1.25, start, management_fee=0.0, performance_fee=0.2)
+    # Recovering to a previous peak does not charge again
+    assert book.fees.tolist() == pytest.approx([50.0, 0.0])
+
+
+def test_mark_persists_values(db_session):
+    vault = Vault(name="Alpha", management_fee=0.0, performance_fee=0.1)
+    db_session.add(vault)
+    db_session.commit()
+    db_session.add_all([
+        Investment(investor_id=1, vault_id=vault.id, amount=1000.0, token="USDT",
+                   transaction_hash="0x1", status="confirmed", entry_price=1.0),
+        Investment(investor_id=2, vault_id=vault.id, amount=500.0, token="USDT",
+                   transaction_hash="0x2", status="pending", entry_price=1.0),
+    ])
+    db_session.commit()
+
+    result = NAVEngine().mark(db_session, vault, 1.1, as_of=datetime(2025, 1, 1) + timedelta(days=1))
+    assert result["investments"] == 1
+    assert result["total_value"] == pytest.approx(1090.0)
+
+    investment = db_session.query(Investment).filter(Investment.transaction_hash == "0x1").one()
+    assert investment.current_value == pytest.approx(1090.0)
+    assert investment.profit_loss == pytest.approx(90.0)
+    assert db_session.get(Vault, vault.id).total_value == pytest.approx(1090.0)
@@ -0,0 +1,69 @@
+from app.services.order_stream import OrderStreamHub, format_event
+
+
+def _update(order_id, status="filled", user_id=1, exchange="binance"):
+    return {"order_id": order_id, "status": status, "user_id": user_id, "exchange": exchange}
+
+
+def test_filters_and_dedupe():
+    hub = OrderStreamHub(buffer_size=10)
+    everyone, _ = hub.subscribe()
+    user_two, _ = hub.subscribe(user_id=2)
+    kraken, _ = hub.subscribe(exchange="kraken")
+
+    hub.publish(_update("a"))
+    hub.publish(_update("b", user_id=2, exchange="kraken"))
+    hub.publish(_update("b", user_id=2, exchange="kraken"))  # same update via Redis and locally
+    hub.publish(_update("b", status="cancelled", user_id=2))
+
+    assert everyone.queue.qsize() == 3
+    assert [u["order_id"] for _, u in user_two.queue._queue] == ["b", "b"]
+    assert kraken.queue.qsize() == 1
+    assert hub.stats["duplicates"] == 1
+
+    hub.unsubscribe(everyone)
+    assert hub.get_stats()["subscribers"] == 2
+
+
+def test_partial_fills_are_not_duplicates():
+    hub = OrderStreamHub(buffer_size=10)
+    subscriber, _ = hub.subscribe()
+    for filled in (0.2, 0.5, 0.5):
+        hub.publish({**_update("a", status="pending"), "filled": filled})
+    assert [u["filled"] for _, u in subscriber.queue._queue] == [0.2, 0.5]
+    assert hub.stats["duplicates"] == 1
+
+
+def test_resume_from_last_event_id():
+    hub = OrderStreamHub(buffer_size=3)
+    for i in range(5):
+        hub.publish(_update(f"o{i}", user_id=i % 2))
+
+    # Sequence 3 is the last one the client saw; 4 and 5 are still buffered
+    subscriber, resumed = hub.subscribe(user_id=0, last_event_id=hub.event_id(3))
+    assert resumed
+    assert [(s, u["order_id"]) for s, u in subscriber.queue._queue] == [(5, "o4")]
+
+    # Sequence 1 has fallen out of the buffer, as has anything from another process
+    assert hub.subscribe(last_event_id=hub.event_id(1))[1] is False
+    assert hub.subscribe(last_event_id="deadbeef-4")[1] is False
+    assert hub.subscribe(last_event_id="garbage")[1] is False
+    assert hub.stats["resets"] == 3
+
+
+def test_slow_subscriber_is_cut_off(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "order_stream_queue_size", 2)
+    hub = OrderStreamHub(buffer_size=10)
+    slow, _ = hub.subscribe()
+    for i in range(4):
+        hub.publish(_update(f"o{i}"))
+    assert slow.overflowed
+    assert slow.queue.qsize() == 2
+    assert hub.stats["overflows"] == 1
+
+
+def test_format_event():
+    assert format_event("e-1", {"a": 1}) == 'id: e-1\ndata: {"a": 1}\n\n'
+    assert format_event(None, {}, "reset") == "event: reset\ndata: {}\n\n"
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.profiling import RequestProfiler, request_profiler
+from app.models.profile import RequestProfile
+from app.models.strategy import Strategy
+
+
+@pytest.fixture
+def profiling(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "slow_request_ms", 60_000.0)
+    monkeypatch.setattr(request_profiler, "session_factory", sessionmaker(bind=db_session.get_bind()))
+    db_session.add(Strategy(name="s", market="BTC/USDT", pnl=1.0))
+    db_session.commit()
+    return client
+
+
+def test_fast_requests_are_not_recorded(profiling, db_session):
+    response = profiling.get("/api/reports/performance")
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert db_session.query(RequestProfile).count() == 0
+
+    # A wrong token is treated like no token
+    response = profiling.get("/api/reports/performance", headers={"X-Profile": "guess"})
+    assert "x-profile-id" not in response.headers
+
+
+def test_requested_profile_has_sql_and_call_stack(profiling):
+    response = profiling.get("/api/reports/performance?days=7", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    request_id = response.headers["x-profile-id"]
+
+    detail = profiling.get(f"/api/admin/profiles/{request_id}", headers={"X-Admin-Token": "secret"}).json()
+    assert detail["reason"] == "requested"
+    assert detail["path"] == "/api/reports/performance" and detail["query"] == "days=7"
+    assert detail["status_code"] == 200
+    assert detail["sql_count"] == len(detail["statements"]) > 0
+    assert any("FROM strategies" in statement["sql"] for statement in detail["statements"])
+    assert detail["profile"]["functions"] and "sqlalchemy" in detail["profile"]["packages_self_ms"]
+    assert detail["profile"]["concurrent_requests"] == 0
+
+
+def test_profile_counts_requests_that_overlapped_it():
+    profiler = RequestProfiler()
+    profiler.enter()
+    profiler.enter()
+    profile = profiler.try_start()
+    # Started while the profile was on, and finished before it stopped
+    profiler.enter()
+    profiler.leave()
+    assert profiler.try_start() is None
+    assert profiler.finish(profile) == 2
+
+    profiler.leave()
+    assert profiler.finish(profiler.try_start()) == 0
+
+
+def test_slow_requests_are_recorded_without_profile(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "slow_request_ms", 0.0)
+    profiling.get("/api/reports/performance")
+
+    listing = profiling.get("/api/admin/profiles?reason=slow", headers={"X-Admin-Token": "secret"}).json()
+    slow = [p for p in listing["profiles"] if p["path"] == "/api/reports/performance"]
+    assert slow and not slow[0]["profiled"] and slow[0]["sql_count"] > 0
+    assert listing["stats"]["slow"] >= 1
+
+
+def test_admin_endpoints_require_token(profiling, monkeypatch):
+    assert profiling.get("/api/admin/profiles").status_code == 401
+    assert profiling.get("/api/admin/profiles", headers={"X-Admin-Token": "nope"}).status_code == 401
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert profiling.get("/api/admin/profiles", headers={"X-Admin-Token": "secret"}).status_code == 403
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.config import settings
+from app.services.redis_service import RedisService
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.up = True
+        self.published = []
+
+    async def ping(self):
+        if not self.up:
+            raise RedisConnectionError("down")
+        return True
+
+    async def publish(self, channel, payload):
+        if not self.up:
+            raise RedisConnectionError("down")
+        self.published.append((channel, json.loads(payload)))
+
+    def pipeline(self, transaction=False):
+        return FlakyPipeline(self)
+
+
+class FlakyPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def publish(self, channel, payload):
+        self.commands.append((channel, payload))
+
+    async def execute(self):
+        for channel, payload in self.commands:
+            await self.client.publish(channel, payload)
+
+
+def test_outage_spills_and_replays_in_order(monkeypatch):
+    monkeypatch.setattr(settings, "redis_spill_max_size", 3)
+    monkeypatch.setattr(settings, "redis_reconnect_min_delay", 0.01)
+    monkeypatch.setattr(settings, "redis_health_check_interval", 0.01)
+
+    async def scenario():
+        fake = FlakyRedis()
+        service = RedisService()
+        service.redis_client = fake
+        monitor = asyncio.create_task(service._monitor())
+
+        assert await service.publish_signal("ch", {"n": 0})
+        fake.up = False
+        for n in range(1, 5):
+            assert not await service.publish_signal("ch", {"n": n})
+        assert service.redis_client is None
+        assert service.stats["dropped"] == 1
+
+        fake.up = True
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if service.connected and not service.spill:
+                break
+        monitor.cancel()
+        return fake, service
+
+    fake, service = asyncio.run(scenario())
+    assert [message["n"] for _, message in fake.published] == [0, 2, 3, 4]
+    assert service.stats["reconnects"] == 1
+    assert service.stats["replayed"] == 3
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services.response_cache import ResponseCache
+
+
+def test_invalidation_by_tag():
+    cache = ResponseCache(single_process=True)
+    calls = []
+
+    def loader(value):
+        def load():
+            calls.append(value)
+            return {"value": value}
+        return load
+
+    async def scenario():
+        first = await cache.get_or_load("r", {"id": 1}, ["strategy:1"], loader("a"))
+        second = await cache.get_or_load("r", {"id": 1}, ["strategy:1"], loader("b"))
+        other = await cache.get_or_load("r", {"id": 2}, ["strategy:2"], loader("c"))
+        await cache.invalidate("strategy:1")
+        third = await cache.get_or_load("r", {"id": 1}, ["strategy:1"], loader("d"))
+        untouched = await cache.get_or_load("r", {"id": 2}, ["strategy:2"], loader("e"))
+        return first, second, other, third, untouched
+
+    first, second, other, third, untouched = asyncio.run(scenario())
+    assert (first, second, third) == ({"value": "a"}, {"value": "a"}, {"value": "d"})
+    assert other == untouched == {"value": "c"}
+    assert calls == ["a", "c", "d"]
+
+
+def test_bypassed_without_redis_when_multi_process():
+    cache = ResponseCache(single_process=False)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {}
+
+    asyncio.run(cache.get_or_load("r", {}, ["t"], load))
+    asyncio.run(cache.get_or_load("r", {}, ["t"], load))
+    assert len(calls) == 2
+    assert cache.stats["bypassed"] == 2
@@ -0,0 +1,147 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base, configure_sqlite
+from app.models.log import Log
+from app.models.signal import Signal
+from app.models.summary import LogDailySummary, SignalDailySummary
+from app.models.wallet import WalletTransaction
+from app.services.retention import POLICIES, RetentionJob
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_expired_rows_are_summarized_archived_and_deleted(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "retention_chunk_size", 7)
+    monkeypatch.setattr(settings, "retention_chunk_pause", 0)
+    monkeypatch.setattr(settings, "retention_archive_dir", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "retention_days", {"signals": 30, "logs": 10, "wallet_transactions": 90})
+    engine = _engine(tmp_path)
+    now = datetime(2026, 6, 1)
+    old = now - timedelta(days=40)
+
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        [Signal(exchange="binance", symbol="BTC/USDT", signal_type="BUY", confidence=0.5, price=10.0, volume=1.0,
+                timestamp=old) for _ in range(20)]
+        + [Signal(exchange=None, symbol="ETH/USDT", signal_type="SELL", confidence=0.9, price=2.0, timestamp=old)
+           for _ in range(3)]
+        + [Signal(exchange="binance", symbol="BTC/USDT", signal_type="BUY", confidence=0.5, price=10.0,
+                  timestamp=now - timedelta(days=1))]
+        + [Log(bot_id="b1", action="trade", status="ok", timestamp=old) for _ in range(5)]
+        + [WalletTransaction(hash=f"h{i}", from_address="a", to_address="b", amount="1", token="ETH",
+                             status="pending" if i == 0 else "confirmed", created_at=now - timedelta(days=100))
+           for i in range(3)]
+    )
+    db.commit()
+
+    report = RetentionJob(engine).run(now=now)
+    tables = {table["table"]: table for table in report["tables"]}
+    assert tables["signals"]["rows_deleted"] == 23
+    assert tables["signals"]["chunks"] == 4
+    assert tables["logs"]["rows_deleted"] == 5
+    assert tables["wallet_transactions"]["rows_deleted"] == 2
+    assert "feature_values" not in tables
+    assert report["rows_deleted"] == 30
+
+    assert db.scalar(select(func.count()).select_from(Signal)) == 1
+    assert db.scalar(select(WalletTransaction.hash)) == "h0"  # pending transfers are kept
+    summaries = {(s.exchange, s.symbol): s for s in db.query(SignalDailySummary)}
+    btc = summaries[("binance", "BTC/USDT")]
+    assert (btc.day, btc.count, btc.confidence_sum, btc.price_sum) == (old.date(), 20, 10.0, 200.0)
+    assert summaries[("", "ETH/USDT")].count == 3
+    assert db.query(LogDailySummary).one().count == 5
+
+    with gzip.open(tmp_path / "archive" / f"wallet_transactions-{datetime.utcnow():%Y%m%d}.jsonl.gz", "rt") as f:
+        assert sorted(json.loads(line)["hash"] for line in f) == ["h1", "h2"]
+    db.close()
+
+
+def test_rows_purged_by_two_workers_are_summarized_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "retention_chunk_size", 50)
+    engine = _engine(tmp_path)
+    other_worker = create_engine(f"sqlite:///{tmp_path / 'retention.db'}")
+    now = datetime(2026, 6, 1)
+    db = sessionmaker(bind=engine)()
+    db.add_all([Signal(exchange="binance", symbol="BTC/USDT", signal_type="BUY", confidence=0.5, price=10.0,
+                       timestamp=now - timedelta(days=40)) for _ in range(10)])
+    db.commit()
+    signals = next(policy for policy in POLICIES if policy.name == "signals")
+    raced = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def purge_elsewhere_first(conn, cursor, statement, parameters, context, executemany):
+        # The other worker purges the same chunk between this worker's select and delete
+        if statement.startswith("DELETE") and not raced:
+            raced.append(RetentionJob(other_worker).purge(signals, 30, now))
+
+    mine = RetentionJob(engine).purge(signals, 30, now)
+    assert raced[0]["rows_deleted"] == 10 and mine["rows_deleted"] == 0
+    assert db.query(SignalDailySummary).one().count == 10
+    db.close()
+
+
+def test_purge_takes_the_write_lock_up_front(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_busy_timeout_ms", 50)
+    path = tmp_path / "retention.db"
+    engine, other_writer = create_engine(f"sqlite:///{path}"), create_engine(f"sqlite:///{path}")
+    configure_sqlite(engine)
+    configure_sqlite(other_writer)
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2026, 6, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Log.__table__), [{"bot_id": "b", "timestamp": now - timedelta(days=40)}] * 5)
+    logs = next(policy for policy in POLICIES if policy.name == "logs")
+    blocked = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def commit_elsewhere(conn, cursor, statement, parameters, context, executemany):
+        # Under a deferred BEGIN this commit would land and the DELETE would fail to take the lock
+        if statement.startswith("DELETE") and not blocked:
+            try:
+                with other_writer.begin() as other:
+                    other.execute(insert(Log.__table__), [{"bot_id": "other"}])
+                blocked.append(False)
+            except OperationalError:
+                blocked.append(True)
+
+    assert RetentionJob(engine).purge(logs, 10, now)["rows_deleted"] == 5
+    assert blocked == [True]
+
+
+def test_reclaim_releases_free_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "retention_vacuum_free_ratio", 0.2)
+    engine = _engine(tmp_path)
+    db = sessionmaker(bind=engine)()
+    db.add_all([Log(bot_id="b", log_metadata="x" * 500) for _ in range(2000)])
+    db.commit()
+    db.query(Log).delete()
+    db.commit()
+    db.close()
+
+    job = RetentionJob(engine)
+    # Switching an existing file to incremental mode takes a full VACUUM, which only a forced run does
+    assert job.reclaim()["incremental"] is False
+    first = job.reclaim(force=True)
+    assert first["vacuumed"] and first["bytes_reclaimed"] > 500_000
+    assert job.reclaim() == {"vacuumed": False, "bytes_reclaimed": 0, "free_bytes": 0}
+
+    # Later passes release pages incrementally instead of rewriting the file
+    db = sessionmaker(bind=engine)()
+    db.add_all([Log(bot_id="b", log_metadata="x" * 500) for _ in range(2000)])
+    db.commit()
+    db.query(Log).delete()
+    db.commit()
+    db.close()
+    second = job.reclaim()
+    assert second["vacuumed"] and second["bytes_reclaimed"] > 500_000
@@ -0,0 +1,126 @@
+import asyncio
+
+import fakeredis
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes import trade as trade_routes
+from app.core.config import settings
+from app.services.redis_service import redis_service
+from app.services.order_store import OrderStore
+from app.services.risk_engine import RiskEngine
+
+
+def test_limits_reservations_fills_and_cancels():
+    engine = RiskEngine()
+    engine.set_limits(1, max_order_notional=1000, max_position_notional=1500, max_open_orders=2)
+
+    assert engine.check(1, "BTC/USDT", "hold", 1, 100)[0] is False
+    assert engine.check(1, "BTC/USDT", "buy", -1, 100)[0] is False
+    assert engine.check(1, "BTC/USDT", "buy", 1, None)[0] is False
+    assert engine.check(1, "BTC/USDT", "buy", 11, 100)[0] is False  # order notional
+
+    assert engine.check(1, "BTC/USDT", "buy", 8, 100) == (True, "ok")
+    engine.reserve("a", 1, "BTC/USDT", "buy", 8, 100)
+    # 8 pending + 8 more would exceed the 1500 position limit
+    allowed, reason = engine.check(1, "BTC/USDT", "buy", 8, 100)
+    assert not allowed and "Position" in reason
+    # Selling reduces the worst case, so it passes
+    assert engine.check(1, "BTC/USDT", "sell", 5, 100)[0]
+
+    engine.reserve("b", 1, "ETH/USDT", "buy", 1, 100)
+    allowed, reason = engine.check(1, "SOL/USDT", "buy", 1, 100)
+    assert not allowed and "Open order limit" in reason
+
+    engine.on_fill("a", 8)
+    engine.on_cancel("b")
+    exposure = engine.exposure(1)
+    assert exposure["open_orders"] == 0
+    assert exposure["open_notional"] == 0.0
+    assert exposure["positions"] == {"BTC/USDT": 8}
+
+    # Other users get the defaults
+    assert engine.check(2, "BTC/USDT", "buy", 8, 100)[0]
+    assert engine.latency.total == 9
+
+
+def test_rebuild_from_persisted_orders(db_session):
+    store = OrderStore(sessionmaker(bind=db_session.get_bind()))
+    base = {"exchange": "binance", "symbol": "BTC/USDT", "type": "limit", "price": 100.0,
+            "timestamp": "2025-01-01T00:00:00", "user_id": 7}
+    store.save({**base, "id": "mock_order_9", "side": "buy", "amount": 3.0, "filled": 3.0, "status": "filled"})
+    store.save({**base, "id": "mock_order_10", "side": "sell", "amount": 1.0, "filled": 1.0, "status": "filled"})
+    store.save({**base, "id": "mock_order_11", "side": "buy", "amount": 2.0, "filled": 0.0, "status": "pending"})
+    assert asyncio.run(store.flush()) == 3
+    # A later transition of the same order overwrites the earlier row
+    store.save({**base, "id": "mock_order_11", "side": "buy", "amount": 2.0, "filled": 0.0, "status": "pending"})
+    asyncio.run(store.flush())
+
+    engine = RiskEngine()
+    engine.rebuild(store.load_positions(), store.load_open_orders())
+    exposure = engine.exposure(7)
+    assert exposure["positions"] == {"BTC/USDT": 2.0}
+    assert exposure["pending_buy"] == {"BTC/USDT": 2.0}
+    assert exposure["open_notional"] == 200.0
+    assert store.last_sequence("mock_order_") == 11
+
+    engine.on_fill("mock_order_11", 2.0)
+    assert engine.exposure(7)["positions"] == {"BTC/USDT": 4.0}
+
+
+def test_limits_are_split_across_workers(monkeypatch):
+    monkeypatch.setattr(settings, "risk_workers", 2)
+    engine = RiskEngine()
+    engine.rebuild([{"user_id": 1, "symbol": "BTC/USDT", "quantity": 10.0}], [])
+    engine.set_limits(1, max_position_notional=2000, max_open_orders=4, max_open_notional=2000)
+
+    # Each worker may add half the headroom of 10 more BTC at 100
+    assert engine.check(1, "BTC/USDT", "buy", 5, 100)[0]
+    allowed, reason = engine.check(1, "BTC/USDT", "buy", 6, 100)
+    assert not allowed and "Position" in reason
+    # Reducing the position stays allowed
+    assert engine.check(1, "BTC/USDT", "sell", 9, 100)[0]
+
+    allowed, reason = engine.check(1, "ETH/USDT", "buy", 11, 100)
+    assert not allowed and "1000.00" in reason
+    engine.reserve("a", 1, "ETH/USDT", "buy", 1, 100)
+    engine.reserve("b", 1, "ETH/USDT", "buy", 1, 100)
+    allowed, reason = engine.check(1, "ETH/USDT", "buy", 1, 100)
+    assert not allowed and "Open order limit 2 reached" in reason
+
+def test_order_endpoint_rejects_orders_over_limit(client):
+    response = client.post("/api/trade/order", json={
+        "exchange": "binance", "symbol": "BTC/USDT", "side": "buy",
+        "amount": settings.risk_max_order_notional, "price": 2.0
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is False
+    assert data["error"] == "Risk check failed"
+
+
+def test_limit_overrides_reach_every_worker(monkeypatch):
+    monkeypatch.setattr(redis_service, "redis_client", fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr(settings, "risk_limits_refresh_seconds", 60.0)
+    setter, other = RiskEngine(), RiskEngine()
+
+    async def scenario():
+        await other.sync_limits()
+        await setter.save_limits(3, max_order_notional=500)
+        # Within the refresh interval the other worker keeps its copy
+        await other.sync_limits()
+        stale = other.limits(3)["max_order_notional"]
+        await other.sync_limits(force=True)
+        return stale
+
+    stale = asyncio.run(scenario())
+    assert stale == settings.risk_max_order_notional
+    assert other.limits(3)["max_order_notional"] == 500.0
+    assert other.check(3, "BTC/USDT", "buy", 6, 100)[0] is False
+
+
+def test_setting_limits_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    monkeypatch.setattr(trade_routes, "risk_engine", RiskEngine())
+    assert client.put("/api/trade/risk/3/limits", json={"max_open_orders": 1}).status_code == 401
+    response = client.put("/api/trade/risk/3/limits", json={"max_open_orders": 1}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200 and response.json()["limits"]["max_open_orders"] == 1.0
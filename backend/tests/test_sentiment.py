@@ -0,0 +1,107 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from app.models.signal import Signal
+from app.services.redis_service import redis_service
+from app.services.sentiment import CHANNEL, SentimentTracker, WindowCounter
+
+
+def test_window_counter_expires_buckets():
+    counter = WindowCounter(window=60, width=10)
+    counter.add(1000.0, 0, 0.8)
+    counter.add(1035.0, 1, 0.5)
+    assert counter.read(1040.0) == [0.8, 0.5, 0.0, 2]
+    # The first bucket leaves the window at 1060, the second at 1090
+    assert counter.read(1060.0) == [0.0, 0.5, 0.0, 1]
+    assert counter.add(1000.0, 2, 1.0) is False
+    assert counter.read(10_000.0) == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_windows_per_symbol_and_overall():
+    tracker = SentimentTracker()
+    now = 1_000_000.0
+    tracker.record("BTC/USDT", "BUY", 0.9, now - 60)
+    tracker.record("BTC/USDT", "BUY", 0.7, now - 1800)
+    tracker.record("ETH/USDT", "SELL", 0.6, now - 120)
+    tracker.record("ETH/USDT", "HOLD", 0.5, now - 7200)
+    tracker.record("ETH/USDT", "MAYBE", 0.5, now)
+
+    assert tracker.analyze(window="5m", now=now)["signals"] == 2
+    hour = tracker.analyze(window="1h", now=now)
+    assert hour["signals"] == 3
+    assert hour["score"] == pytest.approx((1.6 - 0.6) / 2.2)
+    assert hour["overall_sentiment"] == "bullish"
+    assert hour["fear_greed_index"] == round(50 + 50 * hour["score"])
+
+    day = tracker.analyze(["ETH/USDT", "SOL/USDT"], window="24h", now=now)
+    assert day["signals"] == 2
+    assert day["overall_sentiment"] == "bearish"
+    assert day["symbols"]["SOL/USDT"]["signals"] == 0
+    assert day["confidence"] == pytest.approx(0.55)
+    assert tracker.stats["skipped"] == 1
+
+    with pytest.raises(ValueError):
+        tracker.analyze(window="1w")
+
+
+def test_warm_from_database_then_follow_stream(db_session):
+    db_session.add_all([
+        Signal(exchange="binance", symbol="BTC/USDT", signal_type="BUY", confidence=0.8, price=1.0,
+               timestamp=datetime.utcnow() - timedelta(minutes=2)),
+        Signal(exchange="binance", symbol="BTC/USDT", signal_type="SELL", confidence=0.8, price=1.0,
+               timestamp=datetime.utcnow() - timedelta(days=2)),
+    ])
+    db_session.commit()
+
+    tracker = SentimentTracker(session_factory=lambda: db_session)
+    tracker.warm()
+    assert tracker.analyze(["BTC/USDT"], "24h")["signals"] == 1
+
+    # Signals already loaded are not counted again when they arrive on the channel
+    tracker.on_message({"id": tracker.warm_id, "symbol": "BTC/USDT", "signal_type": "BUY", "confidence": 0.8,
+                        "timestamp": datetime.utcnow().isoformat()})
+    tracker.on_message({"id": tracker.warm_id + 1, "symbol": "BTC/USDT", "signal_type": "SELL", "confidence": 0.4,
+                        "timestamp": datetime.utcnow().isoformat()})
+    result = tracker.analyze(["BTC/USDT"], "5m")
+    assert result["signals"] == 2
+    assert result["score"] == pytest.approx(0.4 / 1.2)
+
+
+def test_signals_published_during_warm_up_are_counted(db_session, monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_service, "redis_client", fakeredis.FakeAsyncRedis(server=server))
+    publisher = fakeredis.FakeRedis(server=server)
+    tracker = SentimentTracker(session_factory=lambda: db_session)
+    warm = tracker.warm
+
+    def warm_then_publish():
+        warm()
+        # Arrives after the warm-up query, before the consumer task runs
+        publisher.publish(CHANNEL, json.dumps({"id": 7, "symbol": "ETH/USDT", "signal_type": "BUY",
+                                               "confidence": 0.5, "timestamp": datetime.utcnow().isoformat()}))
+
+    monkeypatch.setattr(tracker, "warm", warm_then_publish)
+
+    async def scenario():
+        await tracker.start()
+        try:
+            for _ in range(100):
+                if tracker.stats["recorded"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await tracker.stop()
+
+    asyncio.run(scenario())
+    assert tracker.analyze(["ETH/USDT"], "5m")["signals"] == 1
+
+
+def test_sentiment_endpoint(client):
+    response = client.get("/api/signals/sentiment?symbols=BTC/USDT&window=5m")
+    assert response.status_code == 200
+    assert response.json()["window"] == "5m"
+    assert client.get("/api/signals/sentiment?window=2h").status_code == 400
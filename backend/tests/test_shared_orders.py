@@ -0,0 +1,135 @@
+import asyncio
+from datetime import timedelta
+
+import fakeredis
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.order import Order
+from app.services import trade_service as trade_module
+from app.services.redis_service import redis_service
+from app.services.order_store import OrderStore
+from app.services.risk_engine import RiskEngine
+from app.services.shared_orders import SharedOrders
+from app.services.trade_service import TradeService
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_service, "redis_client", client)
+    return client
+
+
+def make_order(order_id, status="pending"):
+    return {"id": order_id, "exchange": "binance", "symbol": "BTC/USDT", "side": "buy", "amount": 1.0,
+            "price": 100.0, "type": "limit", "status": status, "filled": 0.0, "remaining": 1.0, "cost": 0.0}
+
+
+def test_ids_are_unique_across_workers(shared_redis):
+    workers = [SharedOrders(), SharedOrders()]
+
+    async def scenario():
+        await workers[0].advance(41)
+        singles = await asyncio.gather(*[worker.next_id("o_") for worker in workers for _ in range(50)])
+        batch = await workers[1].next_ids("o_", 5)
+        # Restoring an older sequence never moves the counter back
+        await workers[0].advance(10)
+        return singles, batch, await workers[0].next_id("o_")
+
+    singles, batch, last = asyncio.run(scenario())
+    assert len(set(singles)) == 100 and min(int(i[2:]) for i in singles) == 42
+    assert batch == [f"o_{n}" for n in range(142, 147)]
+    assert last == "o_147"
+
+
+def test_cancel_and_fill_race_has_one_winner(shared_redis):
+    placer, other = SharedOrders(), SharedOrders()
+
+    async def scenario():
+        await placer.save(make_order("o_1"))
+        seen = (await other.get("o_1"))["status"]
+        cancelled, _ = await other.transition("o_1", "pending", {"status": "cancelled"})
+        filled, current = await placer.transition("o_1", "pending", {"status": "filled", "filled": 1.0})
+        return seen, cancelled, filled, current, await shared_redis.ttl("orders:o_1")
+
+    seen, cancelled, filled, current, ttl = asyncio.run(scenario())
+    assert seen == "pending"
+    assert cancelled and not filled
+    # The placer's cached order was refreshed in place
+    assert current is placer.local["o_1"] and current["status"] == "cancelled" and current["filled"] == 0.0
+    assert ttl > 0 and placer.stats["conflicts"] == 1
+
+
+def test_restore_keeps_newer_shared_state(shared_redis):
+    worker, restarted = SharedOrders(), SharedOrders()
+
+    async def scenario():
+        await worker.save(make_order("o_1", status="cancelled"))
+        await restarted.restore([make_order("o_1"), make_order("o_2")])
+        return await restarted.get("o_1"), await SharedOrders().get("o_2")
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == "cancelled"
+    assert second["status"] == "pending"
+
+
+def test_falls_back_to_local_state_without_redis():
+    orders = SharedOrders()
+
+    async def scenario():
+        ids = [await orders.next_id("o_") for _ in range(3)]
+        await orders.save(make_order(ids[0]))
+        applied, order = await orders.transition(ids[0], "pending", {"status": "cancelled"})
+        again, _ = await orders.transition(ids[0], "pending", {"status": "filled"})
+        return ids, applied, again, order
+
+    ids, applied, again, order = asyncio.run(scenario())
+    assert ids == ["o_1", "o_2", "o_3"] and orders.stats["local_ids"] == 3
+    assert applied and not again and order["status"] == "cancelled"
+
+
+def test_orders_are_visible_and_cancellable_from_another_worker(shared_redis, monkeypatch):
+    placer, other = SharedOrders(), SharedOrders()
+    engine = RiskEngine()
+    monkeypatch.setattr(trade_module, "risk_engine", engine)
+    service = TradeService()
+
+    async def scenario():
+        monkeypatch.setattr(trade_module, "shared_orders", placer)
+        placed = await service.place_order("binance", "BTC/USDT", "buy", 0.1, user_id=5001)
+
+        monkeypatch.setattr(trade_module, "shared_orders", other)
+        status = (await service.get_order_status("binance", placed["order_id"]))["order"]["status"]
+        cancelled = await service.cancel_order("binance", placed["order_id"])
+
+        # The placing worker's cache still says pending; it re-reads the shared state
+        monkeypatch.setattr(trade_module, "shared_orders", placer)
+        return placed, status, cancelled, await service.get_order_status("binance", placed["order_id"])
+
+    placed, status, cancelled, after = asyncio.run(scenario())
+    assert status == "pending"
+    assert cancelled["success"]
+    assert after["order"]["status"] == "cancelled"
+    assert placer.local[placed["order_id"]]["status"] == "cancelled"
+
+
+def test_late_flush_does_not_revive_finished_orders(db_session):
+    factory = sessionmaker(bind=db_session.get_bind())
+    placer, canceller = OrderStore(factory), OrderStore(factory)
+    placer.save({**make_order("o_1"), "timestamp": "2026-01-01T00:00:00"})
+    placer.save({**make_order("o_2"), "timestamp": "2026-01-01T00:00:00"})
+    canceller.save(make_order("o_1", status="cancelled"))
+    canceller.save(make_order("o_2", status="filled"))
+    # A skewed clock stamps the placer's stale row later than the fill
+    placer.pending["o_2"]["updated_at"] += timedelta(hours=1)
+
+    async def scenario():
+        # The worker that finished the orders flushes first
+        await canceller.flush()
+        await placer.flush()
+
+    asyncio.run(scenario())
+    statuses = {order.id: order.status for order in db_session.query(Order)}
+    assert statuses == {"o_1": "cancelled", "o_2": "filled"}
+    assert placer.load_open_orders() == []
@@ -0,0 +1,54 @@
+import json
+
+from app.models.signal import Signal
+from app.services.signal_ingest import SignalIngestor, parse_signal
+
+
+def _ndjson(items):
+    return "\n".join(json.dumps(item) for item in items)
+
+
+def _signal(key, **overrides):
+    signal = {"idempotency_key": key, "exchange": "binance", "symbol": "BTC/USDT",
+              "signal_type": "BUY", "confidence": 0.8, "price": 50000.0, "volume": 2.0,
+              "metadata": {"model_version": "ext-1"}}
+    signal.update(overrides)
+    return signal
+
+
+def test_bulk_ingest_deduplicates_on_idempotency_key(client, db_session):
+    body = _ndjson([_signal("a"), _signal("b"), _signal("a"), _signal(None)])
+    response = client.post("/api/signals/bulk", content=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["accepted"], data["duplicates"], data["rejected"]) == (3, 1, 0)
+
+    # Replaying the same request accepts nothing new except the keyless signal
+    data = client.post("/api/signals/bulk", content=body).json()
+    assert (data["accepted"], data["duplicates"]) == (1, 3)
+    assert db_session.query(Signal).count() == 4
+
+
+def test_bulk_ingest_reports_invalid_lines(client):
+    body = "\n".join([
+        json.dumps(_signal("ok")),
+        "{not json",
+        json.dumps(_signal("bad-type", signal_type="MAYBE")),
+        json.dumps({"idempotency_key": "missing"}),
+        ""
+    ])
+    data = client.post("/api/signals/bulk", content=body).json()
+    assert data["accepted"] == 1
+    assert data["rejected"] == 3
+    assert [error["line"] for error in data["errors"]] == [2, 3, 4]
+
+
+def test_returned_ids_belong_to_their_rows(db_session):
+    keys = ["k1", None, "k2", None, None, "k1"]
+    rows = [parse_signal(json.dumps(_signal(key, price=float(i)))) for i, key in enumerate(keys)]
+    accepted = SignalIngestor().insert_chunk(db_session, rows)
+    db_session.commit()
+
+    assert len(accepted) == 5
+    for signal_id, row in accepted:
+        assert db_session.get(Signal, signal_id).price == row["price"]
@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+from app.models.signal import Signal
+from app.services.signal_metadata import migrate_signal_metadata
+
+
+def test_legacy_repr_metadata_is_migrated(db_session):
+    legacy = "{'model_version': 'v1.0', 'indicators': ['RSI'], 'market_sentiment': 'bullish', 'volatility': 0.3}"
+    db_session.execute(
+        text("INSERT INTO signals (exchange, symbol, signal_type, confidence, price, volume, signal_metadata) "
+             "VALUES ('binance', 'BTC/USDT', 'BUY', 0.8, 50000, 1, :metadata)"),
+        [{"metadata": legacy}, {"metadata": "not a dict"}]
+    )
+    db_session.commit()
+
+    assert migrate_signal_metadata(db_session.get_bind()) == 2
+    assert migrate_signal_metadata(db_session.get_bind()) == 0
+
+    db_session.expire_all()
+    migrated, unparseable = db_session.query(Signal).order_by(Signal.id).all()
+    assert migrated.signal_metadata["indicators"] == ["RSI"]
+    assert (migrated.model_version, migrated.market_sentiment, migrated.volatility) == ("v1.0", "bullish", 0.3)
+    assert unparseable.signal_metadata == {"raw": "not a dict"}
+
+
+def test_signal_list_filters_on_promoted_metadata(client):
+    for sentiment, volatility in [("bullish", 0.1), ("bearish", 0.3), ("neutral", 0.45)]:
+        response = client.post("/api/signals/", params={
+            "exchange": "binance", "symbol": "BTC/USDT", "signal_type": "BUY", "confidence": 0.7, "price": 1.0,
+            "metadata": f'{{"model_version": "v2", "market_sentiment": "{sentiment}", "volatility": {volatility}}}'
+        })
+        assert response.status_code == 200
+
+    def sentiments(**params):
+        signals = client.get("/api/signals/", params=params).json()["signals"]
+        return sorted(signal["metadata"]["market_sentiment"] for signal in signals)
+
+    assert sentiments(market_sentiment="bullish,bearish") == ["bearish", "bullish"]
+    assert sentiments(min_volatility=0.2, max_volatility=0.4) == ["bearish"]
+    assert sentiments(model_version="v2", min_volatility=0.2) == ["bearish", "neutral"]
+    assert sentiments(model_version="v1") == []
+
+    bad = client.post("/api/signals/", params={
+        "exchange": "binance", "symbol": "BTC/USDT", "signal_type": "BUY", "confidence": 0.7, "price": 1.0,
+        "metadata": "[1, 2]"
+    })
+    assert bad.status_code == 400
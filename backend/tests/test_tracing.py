@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.tracing import FileExporter, InMemoryExporter, Tracer, parse_traceparent, trace_summary, tracer
+from app.services.execution_pipeline import ExecutionPipeline
+
+
+def test_spans_nest_across_tasks_and_threads(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    local = Tracer([InMemoryExporter(100)])
+
+    async def child(name):
+        with local.span(name, root=False):
+            await asyncio.sleep(0)
+
+    def in_thread():
+        with local.span("thread", root=False):
+            pass
+
+    async def scenario():
+        with local.span("root", job="test") as root:
+            await asyncio.gather(child("task-a"), child("task-b"))
+            await asyncio.to_thread(in_thread)
+        # Without a current span, root=False instrumentation records nothing
+        await child("orphan")
+        return root.context
+
+    context = asyncio.run(scenario())
+    spans = local.memory.trace(context.trace_id)
+    assert {span["name"] for span in spans} == {"root", "task-a", "task-b", "thread"}
+    assert all(span["parent_id"] == context.span_id for span in spans if span["name"] != "root")
+    summary = trace_summary(spans)
+    assert summary["root"] == "root" and summary["span_count"] == 4 and summary["hops"]["task-a"]["count"] == 1
+
+
+def test_errors_and_sampling(monkeypatch):
+    local = Tracer([InMemoryExporter(100)])
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    try:
+        with local.span("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert local.memory.spans[-1]["error"] == "ValueError: boom"
+
+    monkeypatch.setattr(settings, "tracing_sample_rate", 0.0)
+    with local.span("unsampled"):
+        with local.span("child", root=False):
+            assert local.inject({})["traceparent"].endswith("-00")
+    assert len(local.memory.spans) == 1
+    assert local.stats["unsampled"] == 1
+
+
+def test_traceparent_round_trip_through_payload(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    local = Tracer([])
+    with local.span("publish") as span:
+        payload = json.loads(json.dumps(local.inject({"id": 1})))
+    assert local.extract(payload) == span.context
+    assert parse_traceparent(payload["traceparent"]) == span.context
+    assert local.inject({"id": 1}) == {"id": 1}
+    assert parse_traceparent("00-xyz-1-01") is None
+    assert parse_traceparent("00-" + "0" * 32 + "-" + "1" * 16 + "-01") is None
+
+
+def test_signal_subscriber_joins_publisher_trace(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    pipeline = ExecutionPipeline(sessionmaker(bind=db_session.get_bind()))
+
+    async def scenario():
+        with tracer.span("ai.generate_signals") as publisher:
+            payload = json.dumps(tracer.inject({"id": 42, "exchange": "binance", "symbol": "BTC/USDT",
+                                                "signal_type": "HOLD", "confidence": 0.9}))
+        # Delivered later, outside the publisher's context, as the Redis subscriber would see it
+        await pipeline.submit(json.loads(payload))
+        return publisher.context
+
+    context = asyncio.run(scenario())
+    spans = tracer.memory.trace(context.trace_id)
+    consumer = next(span for span in spans if span["name"] == "execution.signal")
+    assert consumer["parent_id"] == context.span_id
+    assert consumer["attributes"]["signal_id"] == 42
+
+
+def test_http_requests_are_traced_with_sql(client, monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    incoming = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+
+    response = client.get("/api/reports/performance", headers={"traceparent": incoming})
+    returned = parse_traceparent(response.headers["traceparent"])
+    assert returned.trace_id == "a" * 32
+
+    trace = client.get(f"/api/admin/traces/{returned.trace_id}", headers={"X-Admin-Token": "secret"}).json()
+    names = [span["name"] for span in trace["spans"]]
+    assert names[0] == "HTTP GET /api/reports/performance"
+    assert trace["spans"][0]["parent_id"] == "b" * 16
+    assert trace["spans"][0]["attributes"]["status_code"] == 200
+    assert "db.query" in trace["hops"] and trace["hops"]["db.query"]["count"] >= 1
+
+
+def test_file_exporter_writes_json_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    exporter = FileExporter(str(tmp_path / "traces" / "spans.jsonl"))
+    local = Tracer([exporter])
+    with local.span("outer"):
+        with local.span("inner", root=False, rows=3):
+            pass
+    local.flush()
+    lines = [json.loads(line) for line in open(exporter.path)]
+    assert [line["name"] for line in lines] == ["inner", "outer"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"] and lines[0]["attributes"] == {"rows": 3}
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.wallet import WalletTransaction
+from app.services.chain_client import ChainClient
+from app.services.tx_reconciler import TransactionReconciler, poll_interval
+
+
+class StaticChainClient(ChainClient):
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.queried = []
+
+    async def get_transaction_statuses(self, network, hashes):
+        self.queried.extend(hashes)
+        return {h: self.statuses[h] for h in hashes if h in self.statuses}
+
+    async def prepare_transfer(self, network, to_address, amount, reference):
+        return f"0x{reference}"
+
+    async def broadcast(self, network, tx_hash):
+        pass
+
+
+def test_poll_interval_backs_off_with_age():
+    assert poll_interval(10) < poll_interval(30 * 60) < poll_interval(6 * 3600) < poll_interval(7 * 86400)
+
+
+def test_reconciler_writes_changed_statuses(db_session):
+    for tx_hash in ("0x1", "0x2", "0x3"):
+        db_session.add(WalletTransaction(hash=tx_hash, from_address="a", to_address="b",
+                                         amount="1", token="ETH", status="pending"))
+    db_session.commit()
+
+    chain = StaticChainClient({"0x1": "confirmed", "0x2": "failed", "0x3": "pending"})
+    reconciler = TransactionReconciler(chain, sessionmaker(bind=db_session.get_bind()))
+
+    assert asyncio.run(reconciler.run_once()) == 2
+    db_session.expire_all()
+    statuses = {tx.hash: tx.status for tx in db_session.query(WalletTransaction)}
+    assert statuses == {"0x1": "confirmed", "0x2": "failed", "0x3": "pending"}
+
+    # The still-pending hash is not due again until its poll interval elapses
+    chain.queried.clear()
+    asyncio.run(reconciler.run_once())
+    assert chain.queried == []
+
+
+def test_pending_transactions_are_read_off_the_event_loop(db_session, monkeypatch):
+    reconciler = TransactionReconciler(StaticChainClient({}), sessionmaker(bind=db_session.get_bind()))
+    pending_page = reconciler._pending_page
+    threads = []
+
+    def recording_page(last_id):
+        threads.append(threading.get_ident())
+        return pending_page(last_id)
+
+    monkeypatch.setattr(reconciler, "_pending_page", recording_page)
+    asyncio.run(reconciler.run_once())
+    assert threads and threading.get_ident() not in threads
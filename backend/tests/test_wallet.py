@@ -0,0 +1,53 @@
+def _tx(tx_hash, status="pending", amount="1.5"):
+    return {
+        "hash": tx_hash,
+        "from_address": "0xfrom",
+        "to_address": "0xto",
+        "amount": amount,
+        "token": "ETH",
+        "status": status
+    }
+
+
+def test_batch_upsert_is_idempotent(client):
+    batch = [_tx("0x1"), _tx("0x2"), _tx("0x1")]
+
+    response = client.post("/api/wallet/tx/batch", json=batch)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["result"] for r in data["results"]] == ["created", "created", "duplicate"]
+
+    response = client.post("/api/wallet/tx/batch", json=[_tx("0x1", status="confirmed"), _tx("0x2"), _tx("0x3")])
+    data = response.json()
+    assert [r["result"] for r in data["results"]] == ["updated", "unchanged", "created"]
+    assert data["counts"] == {"updated": 1, "unchanged": 1, "created": 1}
+
+    assert client.get("/api/wallet/tx/0x1").json()["status"] == "confirmed"
+
+
+def test_batch_upsert_reports_conflicts_and_invalid_status(client):
+    client.post("/api/wallet/tx/batch", json=[_tx("0xa")])
+
+    response = client.post("/api/wallet/tx/batch", json=[_tx("0xa", amount="2"), _tx("0xb", status="lost")])
+    results = response.json()["results"]
+    assert results[0]["result"] == "conflict"
+    assert results[1]["result"] == "invalid"
+    assert client.get("/api/wallet/tx/0xa").json()["amount"] == "1.5"
+
+
+def test_batch_status_update(client):
+    client.post("/api/wallet/tx/batch", json=[_tx("0x1"), _tx("0x2")])
+
+    response = client.patch("/api/wallet/tx/status/batch", json=[
+        {"hash": "0x1", "status": "confirmed"},
+        {"hash": "0x2", "status": "pending"},
+        {"hash": "0x9", "status": "failed"}
+    ])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["result"] for r in results] == ["updated", "unchanged", "not_found"]
+    assert results[0]["previous_status"] == "pending"
+
+
+def test_empty_batch_rejected(client):
+    assert client.post("/api/wallet/tx/batch", json=[]).status_code == 400
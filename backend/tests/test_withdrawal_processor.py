@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.vault import WithdrawalRequest
+from app.services.chain_client import FakeChainClient
+from app.services.withdrawal_processor import WithdrawalProcessor, processing_fee
+
+
+def _add_requests(db_session, count):
+    for i in range(count):
+        db_session.add(WithdrawalRequest(investor_id=1, investment_id=i, amount=5000.0,
+                                         withdrawal_address=f"0xaddr{i}"))
+    db_session.commit()
+
+
+def test_claims_do_not_overlap(db_session):
+    _add_requests(db_session, 5)
+    factory = sessionmaker(bind=db_session.get_bind())
+    first, second = WithdrawalProcessor(session_factory=factory), WithdrawalProcessor(session_factory=factory)
+
+    token_a, claimed_a = asyncio.run(first.claim(3))
+    token_b, claimed_b = asyncio.run(second.claim(3))
+
+    assert token_a != token_b
+    assert len(claimed_a) == 3 and len(claimed_b) == 2
+    assert not {r["id"] for r in claimed_a} & {r["id"] for r in claimed_b}
+    assert asyncio.run(second.claim(3))[1] == []
+
+
+def test_processing_is_idempotent_across_expired_leases(db_session):
+    _add_requests(db_session, 2)
+    chain = FakeChainClient(latency=(0, 0))
+    processor = WithdrawalProcessor(chain, sessionmaker(bind=db_session.get_bind()))
+
+    # A worker claims and records hashes, then dies before finishing
+    token, claimed = asyncio.run(processor.claim(10))
+    asyncio.run(processor._fenced_update(token, [{"b_id": r["id"], "b_hash": f"0xdead{r['id']}"} for r in claimed],
+                                         transaction_hash="b_hash"))
+    db_session.query(WithdrawalRequest).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+
+    assert asyncio.run(processor.run_once()) == 2
+    assert chain.broadcasts == 2
+
+    db_session.expire_all()
+    for request in db_session.query(WithdrawalRequest):
+        assert request.status == "completed"
+        assert request.transaction_hash == f"0xdead{request.id}"
+        assert request.processing_fee == processing_fee(5000.0)
+        assert request.processed_at is not None
+        assert request.lease_token is None
+        assert request.attempts == 2